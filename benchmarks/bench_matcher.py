@@ -0,0 +1,166 @@
+"""
+Benchmark the compiled keyword rules against the original relevance/categorization code
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CATEGORIES, CATEGORY_KEYWORDS, IRRELEVANT_KEYWORDS
+from scraper import WebScraper
+from keyword_matcher import get_rules
+
+def legacy_is_relevant_result(title, description, url):
+    """_is_relevant_result as it was before the keyword rules were precompiled"""
+    if not title or not url or not url.startswith('http'):
+        return False
+    
+    title_lower = title.lower()
+    desc_lower = description.lower()
+    url_lower = url.lower()
+    
+    irrelevant_keywords = [
+        'wikipedia.org', 'dictionary.com', 'merriam-webster', 'urbandictionary', 'definition',
+        'meaning of', 'what is', 'encyclopedia', 'wiki', 'dictionary', 'thesaurus', 'synonym', 'antonym'
+    ]
+    for keyword in irrelevant_keywords:
+        if (keyword in title_lower or 
+            keyword in desc_lower or 
+            keyword in url_lower):
+            return False
+    
+    relevant_keywords = [
+        'summer camp', 'summer program', 'summer institute', 'summer academy', 'summer school',
+        'camp registration', 'apply now', 'application', 'enrollment', 'register', 'program dates',
+        'tuition', 'cost', 'fee', 'deadline', 'admission', 'accepting applications'
+    ]
+    for keyword in relevant_keywords:
+        if (keyword in title_lower or 
+            keyword in desc_lower):
+            return True
+    
+    ai_keywords = ['ai', 'artificial intelligence', 'machine learning', 'deep learning', 'neural network']
+    for keyword in ai_keywords:
+        if (keyword in title_lower or 
+            keyword in desc_lower):
+            return True
+    
+    return True
+
+def legacy_categorize_result(title, description, url):
+    """categorize_result as it was before the keyword rules were precompiled"""
+    text_to_analyze = f"{title} {description} {url}".lower()
+    
+    category_scores = {}
+    for category_key, keywords in CATEGORY_KEYWORDS.items():
+        score = 0
+        for keyword in keywords:
+            if keyword.lower() in text_to_analyze:
+                if keyword.lower() in title.lower():
+                    score += 5
+                elif keyword.lower() in description.lower():
+                    score += 3
+                elif keyword.lower() in url.lower():
+                    score += 1
+        category_scores[category_key] = score
+    
+    if category_scores:
+        best_category = max(category_scores, key=category_scores.get)
+        if category_scores[best_category] > 0:
+            return CATEGORIES[best_category]
+    
+    url_lower = url.lower()
+    if any(word in url_lower for word in ['state', 'community', 'public']):
+        return CATEGORIES['STATE_LOCAL_OPPORTUNITY']
+    elif any(word in url_lower for word in ['online', 'course', 'platform']):
+        return CATEGORIES['SELF_GUIDED_COURSES']
+    elif any(word in url_lower for word in ['scholarship', 'grant', 'fund']):
+        return CATEGORIES['TECHNOLOGY_SCHOLARSHIP']
+    elif any(word in text_to_analyze for word in ['university', 'college', 'institute']):
+        return CATEGORIES['SECONDARY_SCHOOL_FELLOWSHIP']
+    else:
+        return CATEGORIES['OTHER']
+
+def make_synthetic_results(count, seed=42):
+    """Generate search results that mix category, exclusion and filler vocabulary"""
+    rng = random.Random(seed)
+    keywords = [keyword for keywords in CATEGORY_KEYWORDS.values() for keyword in keywords]
+    filler = ('ai summer camp program for high school students learn machine learning '
+              'python robotics data science weekend session apply today online free').split()
+    url_words = ['state', 'community', 'online', 'course', 'grant', 'fund', 'camp', 'ai', 'summer', 'edu']
+    domains = ['example.edu', 'camps.org', 'state.gov', 'learn.io', 'en.wikipedia.org', 'stanford.edu']
+    
+    def phrase(length):
+        words = []
+        for _ in range(length):
+            roll = rng.random()
+            if roll < 0.08:
+                words.append(rng.choice(keywords).title() if rng.random() < 0.3 else rng.choice(keywords))
+            elif roll < 0.082:
+                words.append(rng.choice(IRRELEVANT_KEYWORDS))
+            else:
+                words.append(rng.choice(filler))
+        return ' '.join(words)
+    
+    results = []
+    for index in range(count):
+        path = '-'.join(rng.choice(url_words) for _ in range(rng.randint(1, 4)))
+        results.append({
+            'title': phrase(rng.randint(4, 12)),
+            'description': phrase(rng.randint(15, 40)),
+            'url': f"https://www.{rng.choice(domains)}/{path}/{index}"
+        })
+    return results
+
+def time_function(function, results):
+    """Run a (title, description, url) function over all results and return (seconds, outputs)"""
+    start = time.perf_counter()
+    outputs = [function(r['title'], r['description'], r['url']) for r in results]
+    return time.perf_counter() - start, outputs
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword matching")
+    parser.add_argument('--count', type=int, default=100000, help="Number of synthetic results")
+    args = parser.parse_args()
+    
+    results = make_synthetic_results(args.count)
+    scraper = WebScraper.__new__(WebScraper)  # Only the rule methods are used; skip network clients
+    
+    print(f"Benchmarking on {len(results)} synthetic results (matcher backend: {get_rules().matcher.backend})")
+    print("=" * 60)
+    
+    for name, legacy_function, new_function in [
+        ('_is_relevant_result', legacy_is_relevant_result, scraper._is_relevant_result),
+        ('categorize_result', legacy_categorize_result, scraper.categorize_result)
+    ]:
+        legacy_time, legacy_outputs = time_function(legacy_function, results)
+        new_time, new_outputs = time_function(new_function, results)
+        mismatches = sum(1 for a, b in zip(legacy_outputs, new_outputs) if a != b)
+        
+        print(f"{name}:")
+        print(f"  legacy:   {legacy_time:.2f}s ({legacy_time / len(results) * 1e6:.1f} us/result)")
+        print(f"  compiled: {new_time:.2f}s ({new_time / len(results) * 1e6:.1f} us/result)")
+        print(f"  speedup:  {legacy_time / new_time:.2f}x, mismatches: {mismatches}")
+    
+    # Relevance and categorization run back to back on the same result in the scraper
+    start = time.perf_counter()
+    for r in results:
+        if legacy_is_relevant_result(r['title'], r['description'], r['url']):
+            legacy_categorize_result(r['title'], r['description'], r['url'])
+    legacy_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for r in results:
+        if scraper._is_relevant_result(r['title'], r['description'], r['url']):
+            scraper.categorize_result(r['title'], r['description'], r['url'])
+    new_time = time.perf_counter() - start
+    
+    print("filter + categorize (as used by the search methods):")
+    print(f"  legacy:   {legacy_time:.2f}s, compiled: {new_time:.2f}s, speedup: {legacy_time / new_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
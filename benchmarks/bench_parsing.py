@@ -0,0 +1,92 @@
+"""
+Benchmark SERP parsing backends against the original full-page BeautifulSoup parse. The memory column is the
+Python-heap peak tracemalloc sees, not the parse's real footprint: selectolax (lexbor) and lxml (libxml2) build
+their trees in native memory it can't trace, and selectolax still peaks above the legacy parse on both fixtures
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serp_parser import parse_serp, get_available_backends
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def legacy_parse_bing(content, max_results):
+    """Bing parsing as it was before serp_parser (full html.parser tree)"""
+    soup = BeautifulSoup(content, 'html.parser')
+    parsed = []
+    for result in soup.find_all('li', class_='b_algo')[:max_results]:
+        title_element = result.find('h2')
+        if not title_element:
+            continue
+        link_element = title_element.find('a')
+        if not link_element:
+            continue
+        desc_element = result.find('p')
+        parsed.append({
+            'title': title_element.get_text().strip(),
+            'url': link_element.get('href', ''),
+            'description': desc_element.get_text().strip() if desc_element else ""
+        })
+    return parsed
+
+def legacy_parse_duckduckgo(content, max_results):
+    """DuckDuckGo parsing as it was before serp_parser (full html.parser tree)"""
+    soup = BeautifulSoup(content, 'html.parser')
+    parsed = []
+    for result in soup.find_all('div', class_='result')[:max_results]:
+        title_element = result.find('a', class_='result__a')
+        if not title_element:
+            continue
+        desc_element = result.find('a', class_='result__snippet')
+        parsed.append({
+            'title': title_element.get_text().strip(),
+            'url': title_element.get('href', ''),
+            'description': desc_element.get_text().strip() if desc_element else ""
+        })
+    return parsed
+
+def measure(function, repeat):
+    """Return (seconds per call, peak Python-heap bytes traced by tracemalloc, last output)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        output = function()
+    elapsed = (time.perf_counter() - start) / repeat
+    
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, output
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SERP parsing")
+    parser.add_argument('--repeat', type=int, default=20, help="Parses per measurement")
+    args = parser.parse_args()
+    
+    for engine, legacy_parse in [('bing', legacy_parse_bing), ('duckduckgo', legacy_parse_duckduckgo)]:
+        with open(os.path.join(FIXTURES_DIR, f'{engine}_serp.html'), 'rb') as fixture:
+            content = fixture.read()
+        
+        # "heap peak" leaves out native allocations, so lxml's few KB are not its tree size
+        print(f"{engine} ({len(content) / 1024:.0f} KB fixture)")
+        print("=" * 60)
+        
+        legacy_time, legacy_peak, expected = measure(lambda: legacy_parse(content, 10), args.repeat)
+        print(f"  {'legacy html.parser':<22} {legacy_time * 1000:8.2f} ms  {legacy_peak / 1024:8.0f} KB heap peak")
+        
+        for backend in get_available_backends():
+            elapsed, peak, output = measure(lambda: parse_serp(engine, content, 10, backend=backend), args.repeat)
+            status = 'same results' if output == expected else 'DIFFERENT RESULTS'
+            print(f"  {backend:<22} {elapsed * 1000:8.2f} ms  {peak / 1024:8.0f} KB heap peak  "
+                  f"{legacy_time / elapsed:5.1f}x faster, {status}")
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Load test against the local stand-in server (mock_server.py): runs the real scraper, Sheets and
+translation code over HTTP with injected latency, errors and 429s, and reports throughput and
+per-search latency percentiles.
+
+    python benchmarks/load_test.py --keywords 60 --concurrency 12 --latency-ms 80 --jitter-ms 200
+    python benchmarks/load_test.py --full --error-rate 0.05 --rate-limit-rate 0.05
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import contextlib
+import importlib
+import tempfile
+import argparse
+import logging
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import config
+from mock_server import MockServer, find_free_base_port
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0.0
+
+def configure_environment(base_url, cache_dir):
+    """Point every endpoint at the mock; must run before the scraper modules are imported"""
+    os.environ['MOCK_SERVER_URL'] = base_url
+    os.environ['CACHE_DIR'] = cache_dir
+    os.environ.setdefault('GOOGLE_API_KEY', 'mock')
+    os.environ.setdefault('GOOGLE_SEARCH_ENGINE_ID', 'mock')
+    os.environ.setdefault('GOOGLE_SHEET_ID', 'load-test')
+    os.environ['HTTP_CACHE_ENABLED'] = 'false'  # Every search should reach the server
+    os.environ.setdefault('GOOGLE_DAILY_QUOTA', '1000000')  # Leave quota limits to the mock (--cse-quota)
+    # Only mock_server has read config so far, and it only needs the port offsets
+    importlib.reload(config)
+
+def scale_rate_limits(scraper, scale):
+    """Multiply every per-host and per-engine rate; the production limits would make the test measure only the limiters"""
+    rate_limiter = scraper.rate_limiter
+    rate_limiter.limits = {
+        host: {'rate': limit['rate'] * scale, 'burst': limit['burst']} for host, limit in rate_limiter.limits.items()
+    }
+    rate_limiter.default_limit = dict(rate_limiter.default_limit, rate=rate_limiter.default_limit['rate'] * scale)
+    rate_limiter.buckets = {}
+    for engine in scraper.engines:
+        if engine.rate:
+            engine.rate *= scale
+
+def time_searches(scraper, keywords, max_results, concurrency, full=False):
+    """Run every (keyword, engine) search concurrently and record each search's wall time; full streams
+    the results through the dedupe/translate/upload pipeline while the searches run"""
+    from pipeline import ScrapePipeline
+    from search_engines import EngineScheduler
+
+    latencies = {}
+    result_counts = []
+    for engine in scraper.engines:
+        def run(keyword, max_results, label=engine.label, search_function=engine.search):
+            start = time.perf_counter()
+            try:
+                results = search_function(keyword, max_results)
+                result_counts.append(len(results))
+                return results
+            finally:
+                latencies.setdefault(label, []).append(time.perf_counter() - start)
+        engine.search = run
+
+    pipeline = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # GoogleCustomSearch prints a line per search
+        if full:
+            pipeline = ScrapePipeline(scraper, scraper.sheets_manager.get_existing_urls(),
+                                      scraper.sheets_manager.get_near_duplicate_index(), search_workers=concurrency)
+            pipeline.run(keywords, max_results)
+        else:
+            # The pipeline's scheduler on its own, with the results dropped
+            EngineScheduler(scraper.engines, max_in_flight=concurrency).run(
+                keywords, max_results,
+                lambda engine, keyword, max_results: scraper._run_search(engine.label, engine.search, keyword, max_results),
+                lambda results: None)
+    return sum(result_counts), time.perf_counter() - start, latencies, pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the scraper against the local mock server")
+    parser.add_argument('--keywords', type=int, default=30, help="Number of keywords to search")
+    parser.add_argument('--results', type=int, default=10, help="Results per engine per keyword")
+    parser.add_argument('--concurrency', type=int, default=12, help="Concurrent searches")
+    parser.add_argument('--rate-scale', type=float, default=1000, help="Multiplier for the per-host rate limits")
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--cse-quota', type=int, help="Google Custom Search requests before quota errors")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--full', action='store_true', help="Run the whole pipeline: dedupe, translate and upload to the mock sheet while searching")
+    parser.add_argument('--output', help="Write the report as JSON to this path")
+    parser.add_argument('--metrics', help="Also write the scraper's metrics (Prometheus text) to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    faults = {'all': {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'rate_limit_rate': args.rate_limit_rate
+    }}
+    if args.cse_quota is not None:
+        faults['google_cse'] = {'daily_quota': args.cse_quota}
+    server = MockServer(base_port=find_free_base_port(), faults=faults, seed=args.seed).start()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configure_environment(server.url, cache_dir)
+        from scraper import WebScraper, setup_logging
+        from config import SEARCH_KEYWORDS
+
+        setup_logging(os.path.join(cache_dir, 'load_test.log'))
+        keywords = [f"{SEARCH_KEYWORDS[index % len(SEARCH_KEYWORDS)]} {index // len(SEARCH_KEYWORDS) or ''}".strip()
+                    for index in range(args.keywords)]
+
+        scraper = WebScraper()
+        scale_rate_limits(scraper, args.rate_scale)
+
+        results, search_seconds, latencies, pipeline = time_searches(
+            scraper, keywords, args.results, args.concurrency, full=args.full)
+        searches = sum(len(values) for values in latencies.values())
+        report = {
+            'keywords': len(keywords),
+            'concurrency': args.concurrency,
+            'faults': faults,
+            'searches': searches,
+            'results': results,
+            'search_seconds': round(search_seconds, 3),
+            'searches_per_second': round(searches / search_seconds, 2) if search_seconds else None,
+            'latency_ms': {
+                engine: {name: round(percentile(values, share) * 1000, 1)
+                         for name, share in [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]}
+                for engine, values in latencies.items()
+            }
+        }
+
+        if pipeline is not None:
+            report['upload'] = {
+                'uploaded_results': pipeline.uploaded,
+                'failed_results': pipeline.failed,
+                'first_upload_seconds': round(pipeline.first_upload_seconds, 3)
+                if pipeline.first_upload_seconds is not None else None
+            }
+
+        if args.metrics:
+            from metrics import REGISTRY
+            REGISTRY.write(args.metrics)
+
+        report['server'] = server.state.summary()
+        server.stop()
+
+    print(f"{report['searches']} searches over {report['keywords']} keywords in {report['search_seconds']}s "
+          f"({report['searches_per_second']} searches/s, concurrency {report['concurrency']}), {report['results']} results")
+    for engine, latency in report['latency_ms'].items():
+        print(f"  {engine:<12} p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  p99 {latency['p99']:8.1f} ms")
+    if 'upload' in report:
+        upload = report['upload']
+        print(f"  upload: {upload['uploaded_results']} results uploaded ({upload['failed_results']} failed), "
+              f"first rows after {upload['first_upload_seconds']}s")
+    for service, stats in report['server'].items():
+        if stats['requests']:
+            print(f"  server {service:<11} {stats['requests']:>6} requests  {stats['statuses']}")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Offline benchmark suite for the parse -> filter -> categorize -> dedupe -> serialize pipeline.
+Runs against recorded Bing/DuckDuckGo pages and a Google Custom Search response, and writes a
+JSON report that can be compared with one from another commit (--compare).
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import platform
+import argparse
+import subprocess
+import contextlib
+import logging
+import requests
+from datetime import datetime, timezone
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from scraper import WebScraper
+from sheets_manager import GoogleSheetsManager
+from google_api import GoogleCustomSearch
+from quota_ledger import QuotaLedger
+from engine_health import EngineHealthTracker
+from keyword_matcher import get_rules
+from serp_parser import choose_backend
+from config import COLUMNS
+
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+REPORTS_DIR = os.path.join(BENCHMARKS_DIR, 'reports')
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+REPORT_VERSION = 1
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture:
+        return fixture.read()
+
+class FixtureSession:
+    """Stands in for the scraper's HTTP session and answers every request from a recorded fixture"""
+
+    def __init__(self):
+        self.fixtures = {
+            'www.bing.com': ('text/html; charset=utf-8', read_fixture('bing_serp.html')),
+            'duckduckgo.com': ('text/html; charset=utf-8', read_fixture('duckduckgo_serp.html')),
+            'www.googleapis.com': ('application/json; charset=UTF-8', read_fixture('google_cse.json'))
+        }
+
+    def get(self, url, params=None, **kwargs):
+        content_type, content = self.fixtures[requests.utils.urlparse(url).netloc]
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.headers['Content-Type'] = content_type
+        response.encoding = 'utf-8'
+        response.url = url
+        response.from_cache = False
+        return response
+
+def build_scraper():
+    """A WebScraper wired to the fixtures; no credentials, caches or network needed"""
+    scraper = WebScraper.__new__(WebScraper)
+    scraper.logger = logging.getLogger('benchmark')
+    scraper.session = FixtureSession()
+    scraper.known_urls = None
+    scraper.engine_health = EngineHealthTracker()
+
+    google_api = GoogleCustomSearch.__new__(GoogleCustomSearch)
+    google_api.api_key = 'benchmark'
+    google_api.search_engine_id = 'benchmark'
+    google_api.base_url = "https://www.googleapis.com/customsearch/v1"
+    google_api.session = scraper.session
+    # Benchmark searches must not count against the real daily quota
+    google_api.ledger = QuotaLedger(os.path.join(tempfile.mkdtemp(), 'google_quota.sqlite'), daily_quota=10 ** 9)
+    google_api.page_budget = None
+    scraper.google_api = google_api
+
+    sheets_manager = GoogleSheetsManager.__new__(GoogleSheetsManager)
+    sheets_manager.columns = COLUMNS
+    scraper.sheets_manager = sheets_manager
+    return scraper
+
+def make_results(scraper, size):
+    """Scale the fixture results up to size: unique URLs, plus a share of tracking-parameter duplicates"""
+    pool = []
+    with contextlib.redirect_stdout(io.StringIO()):  # GoogleCustomSearch prints a line per search
+        for search in (scraper.search_bing, scraper.search_duckduckgo, scraper.search_google):
+            for result in search('ai summer camp', 10):
+                pool.append((result['title'], result['url'], result['description']))
+
+    # A page the relevance check rejects, like the ones the engines' relevance filter already dropped
+    pool.append(('Artificial intelligence - Wikipedia', 'https://en.wikipedia.org/wiki/AI', 'Artificial intelligence (AI) is...'))
+
+    results = []
+    for index in range(size):
+        title, url, description = pool[index % len(pool)]
+        separator = '&' if '?' in url else '?'
+        if index % 10 == 9 and index >= 7:
+            # Same page as a few results back, with tracking parameters added
+            url = results[index - 7]['url'] + f"{'&' if '?' in results[index - 7]['url'] else '?'}utm_source=benchmark"
+        else:
+            url = f"{url}{separator}page={index // len(pool)}"
+        results.append({
+            'keyword': 'ai summer camp',
+            'title': title,
+            'url': url,
+            'description': description,
+            'source': 'Benchmark',
+            'category': ''
+        })
+    return results
+
+def time_best(function, repeat):
+    """Best wall time over repeat runs (the least disturbed by the rest of the machine)"""
+    best = None
+    for _ in range(repeat):
+        # Relevance and categorization share a per-result scan cache; start every run cold
+        get_rules().scan_fields.cache_clear()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_page_benchmarks(scraper, repeat):
+    """Fetch-from-fixture, parse and build results for one page of each engine"""
+    benchmarks = {}
+    for name, search in [('search_bing', scraper.search_bing),
+                         ('search_duckduckgo', scraper.search_duckduckgo),
+                         ('search_google', scraper.search_google)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            size = len(search('ai summer camp', 10))
+            seconds = time_best(lambda: search('ai summer camp', 10), repeat)
+        benchmarks[name] = {'size': size, 'repeat': repeat, 'seconds': seconds}
+    return benchmarks
+
+def run_pipeline_benchmarks(scraper, sizes, repeat):
+    """Time each post-search step over result sets of the given sizes"""
+    benchmarks = {}
+    for size in sizes:
+        results = make_results(scraper, size)
+        existing_urls = {result['url'] for result in results[3::10]}
+        rows = [(result['title'], result['description'], result['url']) for result in results]
+        size_repeat = max(1, min(repeat, 100000 // size))
+
+        def pipeline():
+            relevant = [result for result in results
+                        if scraper._is_relevant_result(result['title'], result['description'], result['url'])]
+            for result in relevant:
+                result['category'] = scraper.categorize_result(result['title'], result['description'], result['url'])
+            unique = scraper.remove_duplicates(relevant, existing_urls)
+            scraper.sheets_manager.build_rows(unique)
+
+        steps = [
+            ('is_relevant_result', lambda: [scraper._is_relevant_result(*row) for row in rows]),
+            ('categorize_result', lambda: [scraper.categorize_result(*row) for row in rows]),
+            ('remove_duplicates', lambda: scraper.remove_duplicates(results, existing_urls)),
+            ('build_rows', lambda: scraper.sheets_manager.build_rows(results)),
+            ('pipeline', pipeline)
+        ]
+        for name, function in steps:
+            seconds = time_best(function, size_repeat)
+            benchmarks[f"{name}[{size}]"] = {'size': size, 'repeat': size_repeat, 'seconds': seconds}
+            print(f"  {name:<20} {size:>7} results  {seconds * 1000:10.2f} ms  {seconds / size * 1e6:8.2f} us/result")
+    return benchmarks
+
+def get_commit():
+    """Current git commit, with a -dirty suffix when the tree has local changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_reports(old_report, new_report):
+    """Print new/old time ratios for the benchmarks both reports contain"""
+    print(f"\nCompared with {old_report.get('commit')} ({old_report.get('created_at')})")
+    print("=" * 60)
+    for name, new in new_report['benchmarks'].items():
+        old = old_report['benchmarks'].get(name)
+        if not old:
+            continue
+        ratio = new['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        change = 'faster' if ratio < 1 else 'slower'
+        print(f"  {name:<30} {old['seconds'] * 1000:10.2f} -> {new['seconds'] * 1000:10.2f} ms  "
+              f"({abs(1 - ratio) * 100:5.1f}% {change})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Result-set sizes to time")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per measurement (fewer for large sizes)")
+    parser.add_argument('--output', help="Report path (default: benchmarks/reports/<commit>.json)")
+    parser.add_argument('--compare', help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    scraper = build_scraper()
+
+    report = {
+        'version': REPORT_VERSION,
+        'commit': get_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backends': {'serp_parser': choose_backend(), 'keyword_matcher': get_rules().matcher.backend},
+        'benchmarks': {}
+    }
+
+    print(f"Benchmarks at {report['commit']} (parser: {report['backends']['serp_parser']}, "
+          f"matcher: {report['backends']['keyword_matcher']})")
+    print("=" * 60)
+    page_benchmarks = run_page_benchmarks(scraper, args.repeat)
+    for name, benchmark in page_benchmarks.items():
+        print(f"  {name:<20} {benchmark['size']:>7} results  {benchmark['seconds'] * 1000:10.2f} ms per page")
+    report['benchmarks'].update(page_benchmarks)
+    report['benchmarks'].update(run_pipeline_benchmarks(scraper, args.sizes, args.repeat))
+
+    output = args.output or os.path.join(REPORTS_DIR, f"{report['commit'] or 'report'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"\nReport written to {output}")
+
+    if args.compare:
+        with open(args.compare) as old_file:
+            compare_reports(json.load(old_file), report)
+
+if __name__ == "__main__":
+    main()
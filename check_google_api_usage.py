@@ -2,50 +2,63 @@
 Check Google Custom Search API Usage and Quota
 """
 
-import requests
 import os
+import math
+import argparse
 from dotenv import load_dotenv
-from datetime import datetime
+
+from config import SEARCH_KEYWORDS, GOOGLE_CSE_PAGE_SIZE, GOOGLE_CSE_MAX_RESULTS
+from quota_ledger import QuotaLedger, get_quota_day, get_next_reset
+from google_api import GoogleCustomSearch
+from search_engines import get_results_per_engine
 
 load_dotenv()
 
 def check_api_usage():
-    """Check Google Custom Search API usage"""
+    """Show Google Custom Search API usage from the local quota ledger (spends no queries)"""
     api_key = os.getenv('GOOGLE_API_KEY')
     
     if not api_key:
         print("❌ GOOGLE_API_KEY not found in .env file")
         return
     
-    print("🔍 Checking Google Custom Search API Usage...")
+    print("🔍 Google Custom Search API Usage (local ledger)...")
     print("=" * 50)
     
-    # Method 1: Check via Google Cloud Console API
-    try:
-        # This requires the Cloud Monitoring API to be enabled
-        url = f"https://www.googleapis.com/customsearch/v1"
-        params = {
-            'key': api_key,
-            'cx': 'test',  # Dummy search engine ID for testing
-            'q': 'test'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            print("✅ API key is working")
-        elif response.status_code == 403:
-            print("❌ API key error or quota exceeded")
-            data = response.json()
-            if 'error' in data:
-                print(f"Error: {data['error'].get('message', 'Unknown error')}")
-        else:
-            print(f"⚠️  API response: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Error testing API: {e}")
-    
-    print("\n📊 How to Check Usage:")
+    ledger = QuotaLedger()
+    used, remaining = ledger.get_usage()
+    print(f"Quota day: {get_quota_day()} (Pacific Time)")
+    print(f"Queries used today: {used} of {ledger.daily_quota}")
+    print(f"Queries remaining: {remaining}")
+    if remaining == 0 and used < ledger.daily_quota:
+        print("⚠️  Google reported the quota as exhausted (queries made elsewhere with the same key?)")
+    print(f"Quota resets: {get_next_reset():%Y-%m-%d %H:%M %Z}")
+    
+    daily_usage = ledger.get_daily_usage()
+    if daily_usage:
+        print("\n📅 Last 7 days:")
+        for quota_day, calls in daily_usage:
+            print(f"   {quota_day}: {calls} queries")
+    
+    print("\n📈 KEYWORD YIELD (new URLs per query, last 14 days):")
+    print("=" * 50)
+    
+    yields = ledger.get_keyword_yields()
+    if not yields:
+        print("No queries recorded yet")
+    for keyword, (calls, new_per_call) in sorted(yields.items(), key=lambda item: -item[1][1]):
+        print(f"   {new_per_call:5.1f}  ({calls} queries)  {keyword}")
+    
+    # Google gets the same share of MAX_RESULTS_PER_KEYWORD as in a run, however many engines are enabled
+    pages_per_keyword = math.ceil(min(get_results_per_engine(), GOOGLE_CSE_MAX_RESULTS) / GOOGLE_CSE_PAGE_SIZE)
+    plan = ledger.plan(SEARCH_KEYWORDS, pages_per_keyword)
+    planned = sum(plan.values())
+    print(f"\n🗓️  A run now would spend {planned} queries on {sum(1 for pages in plan.values() if pages)} "
+          f"of {len(SEARCH_KEYWORDS)} keywords")
+    for keyword, pages in plan.items():
+        print(f"   {'✅' if pages else '⏭️ '} {pages} page(s)  {keyword}")
+    
+    print("\n📊 Other Ways to Check Usage:")
     print("=" * 50)
     
     print("1. GOOGLE CLOUD CONSOLE:")
@@ -62,46 +75,15 @@ def check_api_usage():
     print("   - Search for 'Custom Search API'")
     print("   - Look for 'Queries per day'")
     
-    print("\n3. GOOGLE CLOUD CONSOLE - BILLING:")
-    print("   - Go to: https://console.cloud.google.com/")
-    print("   - Select your project")
-    print("   - Go to 'Billing'")
-    print("   - Check 'Reports' for API usage")
-    
-    print("\n4. PROGRAMMATIC CHECK:")
-    print("   - Enable Cloud Monitoring API")
-    print("   - Use Google Cloud Monitoring API")
-    print("   - More complex but automated")
-    
-    print("\n📈 USAGE ESTIMATE:")
-    print("=" * 50)
-    
-    # Calculate estimated usage based on your scraper
-    keywords = [
-        'ai summer camp',
-        'artificial intelligence summer program', 
-        'ai summer camp high school',
-        'machine learning summer camp',
-        'ai summer program students'
-    ]
-    
-    searches_per_run = len(keywords) * 3  # 3 search engines
-    print(f"Keywords per run: {len(keywords)}")
-    print(f"Search engines: 3 (Google API, Bing, DuckDuckGo)")
-    print(f"Total searches per run: {searches_per_run}")
-    print(f"Daily limit: 100 (Google API only)")
-    print(f"Runs per day before hitting limit: {100 // len(keywords)}")
-    
     print("\n💡 TIPS:")
     print("=" * 50)
-    print("• Google API: 100 free searches per day")
+    print(f"• Google API: {ledger.daily_quota} queries per day (GOOGLE_DAILY_QUOTA), reset at midnight Pacific Time")
+    print("• Each run shares out what is left, highest-yield keywords first, and skips Google once it's spent")
     print("• Bing/DuckDuckGo: No limits")
-    print("• You can run the scraper ~20 times per day")
-    print("• Monitor usage in Google Cloud Console")
-    print("• Set up billing alerts if needed")
+    print("• The ledger only sees this machine; set up billing alerts if the key is used elsewhere")
 
 def test_api_quota():
-    """Test API with a simple search to check quota"""
+    """Make one real query (recorded in the ledger) to check the key and engine ID"""
     api_key = os.getenv('GOOGLE_API_KEY')
     search_engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID')
     
@@ -109,36 +91,25 @@ def test_api_quota():
         print("❌ API credentials not configured")
         return
     
-    print("\n🧪 Testing API Quota...")
-    
-    try:
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            'key': api_key,
-            'cx': search_engine_id,
-            'q': 'test',
-            'num': 1
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            print("✅ API is working - quota available")
-            data = response.json()
-            if 'items' in data:
-                print(f"✅ Found {len(data['items'])} test results")
-        elif response.status_code == 403:
-            print("❌ Quota exceeded or API error")
-            data = response.json()
-            if 'error' in data:
-                error_msg = data['error'].get('message', 'Unknown error')
-                print(f"Error: {error_msg}")
-        else:
-            print(f"⚠️  Unexpected response: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Error testing API: {e}")
+    print("\n🧪 Testing API with one query...")
+    
+    google_api = GoogleCustomSearch()
+    if google_api.ledger.remaining() == 0:
+        print("❌ Today's quota is spent; not sending a test query")
+        return
+    
+    results = google_api.search('ai summer camp', 1)
+    if results:
+        print(f"✅ API is working - found {len(results)} test result")
+    else:
+        print("❌ No results: check the key and engine ID, or the quota (see scraper.log)")
+    print(f"Queries remaining today: {google_api.ledger.remaining()}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check Google Custom Search API usage")
+    parser.add_argument('--live', action='store_true', help="Also spend one query to test the API key")
+    args = parser.parse_args()
+    
     check_api_usage()
-    test_api_quota()
+    if args.live:
+        test_api_quota()
@@ -3,6 +3,7 @@ Configuration settings for the AI Summer Camp Web Scraper
 """
 
 import os
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -28,39 +29,208 @@ DEFAULT_KEYWORDS = [
 SEARCH_KEYWORDS = os.getenv('SEARCH_KEYWORDS', '').split(',') if os.getenv('SEARCH_KEYWORDS') else DEFAULT_KEYWORDS
 
 # Search Engines Configuration
+# Engines are built by search_engines.py in this order. Each declares how hard it may be driven and what it is worth:
+# 'max_concurrency' searches in flight at once (with ASYNC_MODE; otherwise one), 'rate' searches per second,
+# 'cost_per_query' in dollars, 'expected_yield' relevant results per search (free engines are scheduled first,
+# then by yield) and 'daily_quota' paid queries per day (None: no cap here)
+SERPAPI_API_KEY = os.getenv('SERPAPI_API_KEY')
 SEARCH_ENGINES = {
     'google': {
-        'base_url': 'https://www.google.com/search',
-        'params': {
-            'q': '',
-            'num': 10,  # Number of results
-            'start': 0
-        },
-        'headers': {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        'label': 'Google',
+        'enabled': True,
+        'max_concurrency': 2,
+        'rate': 1,
+        'cost_per_query': 0,  # Free tier; the quota ledger caps the daily queries (GOOGLE_DAILY_QUOTA)
+        'expected_yield': 8
     },
     'bing': {
-        'base_url': 'https://www.bing.com/search',
-        'params': {
-            'q': '',
-            'count': 10,
-            'first': 0
-        },
-        'headers': {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        'label': 'Bing',
+        'enabled': True,
+        'max_concurrency': 1,
+        'rate': 0.5,
+        'cost_per_query': 0,
+        'expected_yield': 6
+    },
+    'duckduckgo': {
+        'label': 'DuckDuckGo',
+        'enabled': True,
+        'max_concurrency': 1,
+        'rate': 0.5,
+        'cost_per_query': 0,
+        'expected_yield': 5
+    },
+    'serpapi': {
+        'label': 'SerpAPI',
+        'enabled': bool(SERPAPI_API_KEY),
+        'max_concurrency': 2,
+        'rate': 1,
+        'cost_per_query': 0.015,
+        'expected_yield': 9,
+        'daily_quota': int(os.getenv('SERPAPI_DAILY_QUOTA', '30'))
+    },
+    'startpage': {
+        'label': 'Startpage',
+        'enabled': os.getenv('STARTPAGE_ENABLED', 'false').lower() == 'true',
+        'max_concurrency': 1,
+        'rate': 0.2,
+        'cost_per_query': 0,
+        'expected_yield': 5
     }
 }
 
 # Scraping Configuration
 MAX_RESULTS_PER_KEYWORD = 20
 DELAY_BETWEEN_REQUESTS = 2  # seconds
-MAX_RETRIES = 3
+MAX_RETRIES = 3  # Attempts per search request on timeouts, connection errors and 5xx
+
+# Retry and Circuit Breaker Configuration
+# Retries wait base * 2^attempt seconds (capped, with full jitter). An engine that fails
+# CIRCUIT_FAILURE_THRESHOLD requests in a row, or serves a captcha/block page, is skipped for the
+# cooldown; then one probe request decides, and each failed probe doubles the cooldown
+RETRY_BACKOFF_BASE_SECONDS = 1
+RETRY_BACKOFF_MAX_SECONDS = 20
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN_SECONDS = 300
+CIRCUIT_MAX_COOLDOWN_SECONDS = 3600
+BLOCKED_STATUS_CODES = [202, 403, 429]  # DuckDuckGo answers 202 with an anomaly page when it throttles
+# Text that marks a block page (captcha, bot check) when a result page has no results
+BLOCK_PAGE_MARKERS = {
+    'bing': ['captcha', '/challenge'],
+    'duckduckgo': ['anomaly-modal', 'captcha'],
+    'startpage': ['captcha']
+}
+
+# Google Custom Search Configuration
+# Queries deeper than 10 results are paginated (start=1, 11, 21, ...); the API serves at most 100
+GOOGLE_CSE_PAGE_SIZE = 10
+GOOGLE_CSE_MAX_RESULTS = 100
+GOOGLE_CSE_PAGE_CONCURRENCY = int(os.getenv('GOOGLE_CSE_PAGE_CONCURRENCY', 3))  # Pages fetched at once after the first
+
+# Service Endpoint Configuration
+# Every external endpoint can be overridden. MOCK_SERVER_URL (e.g. http://127.0.0.1:8800, see
+# mock_server.py) points all of them at the local stand-in server, one port per service
+MOCK_SERVER_URL = os.getenv('MOCK_SERVER_URL', '').rstrip('/')
+MOCK_SERVICE_PORT_OFFSETS = {'bing': 0, 'duckduckgo': 1, 'google_cse': 2, 'sheets': 3, 'translate': 4}
+
+def _mock_service_url(service, path):
+    """URL of a service on the mock server, or None when no mock server is configured"""
+    if not MOCK_SERVER_URL:
+        return None
+    mock = urlparse(MOCK_SERVER_URL)
+    return f"{mock.scheme}://{mock.hostname}:{mock.port + MOCK_SERVICE_PORT_OFFSETS[service]}{path}"
+
+BING_SEARCH_URL = os.getenv('BING_SEARCH_URL') or _mock_service_url('bing', '/search') or 'https://www.bing.com/search'
+DUCKDUCKGO_SEARCH_URL = os.getenv('DUCKDUCKGO_SEARCH_URL') or _mock_service_url('duckduckgo', '/html/') or 'https://duckduckgo.com/html/'
+SERPAPI_SEARCH_URL = os.getenv('SERPAPI_SEARCH_URL') or 'https://serpapi.com/search.json'
+STARTPAGE_SEARCH_URL = os.getenv('STARTPAGE_SEARCH_URL') or 'https://www.startpage.com/sp/search'
+GOOGLE_CSE_URL = os.getenv('GOOGLE_CSE_URL') or _mock_service_url('google_cse', '/customsearch/v1') or 'https://www.googleapis.com/customsearch/v1'
+SHEETS_API_URL = os.getenv('SHEETS_API_URL') or _mock_service_url('sheets', '')  # None: the real Sheets/Drive APIs
+TRANSLATE_API_URL = os.getenv('TRANSLATE_API_URL') or _mock_service_url('translate', '/language/translate/v2')  # None: googletrans
+
+# Async Execution Configuration
+# When enabled, each engine runs up to its max_concurrency searches at once; otherwise one at a time
+# (engines always search side by side)
+ASYNC_MODE = os.getenv('ASYNC_MODE', 'false').lower() == 'true'
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '6'))  # Total in-flight searches
+
+# Pipeline Configuration
+# Search, dedupe and upload run as concurrent stages joined by bounded queues
+PIPELINE_QUEUE_SIZE = 200  # Results buffered between stages; a full queue makes the stage before it wait
+PIPELINE_BATCH_SIZE = int(os.getenv('PIPELINE_BATCH_SIZE', '25'))  # Results per upload batch
+UPLOAD_FLUSH_SECONDS = float(os.getenv('UPLOAD_FLUSH_SECONDS', '10'))  # A partial batch is uploaded once this old
+
+# Enrichment Configuration
+# When enabled, each new result's landing page is fetched (only its first ENRICHMENT_MAX_BYTES, within
+# ENRICHMENT_PAGE_DEADLINE_SECONDS) and its application deadline, tuition and grade levels fill extra columns.
+# Results that would wait on a full enrichment backlog are uploaded without them, so the scrape never slows down
+ENRICHMENT_ENABLED = os.getenv('ENRICHMENT_ENABLED', 'false').lower() == 'true'
+ENRICHMENT_MAX_CONCURRENCY = int(os.getenv('ENRICHMENT_MAX_CONCURRENCY', '8'))  # Pages fetched at once
+ENRICHMENT_PER_HOST_CONCURRENCY = 2  # Pages fetched at once from any one site
+ENRICHMENT_MAX_BYTES = int(os.getenv('ENRICHMENT_MAX_KB', '64')) * 1024  # Deadlines and prices sit near the top
+ENRICHMENT_PAGE_DEADLINE_SECONDS = float(os.getenv('ENRICHMENT_PAGE_DEADLINE_SECONDS', '8'))
+ENRICHMENT_BACKLOG = 100  # Results waiting on or being enriched before new ones skip enrichment
+ENRICHMENT_COLUMNS = ['Deadline', 'Tuition', 'Grades']
+
+# Rate Limiting Configuration
+# Token bucket per host: 'rate' is requests per second, 'burst' is how many can go back-to-back.
+# Hosts match by suffix (www.bing.com uses 'bing.com'); the most specific entry wins.
+RATE_LIMITS = {
+    'bing.com': {'rate': 1 / DELAY_BETWEEN_REQUESTS, 'burst': 1},
+    'duckduckgo.com': {'rate': 1 / DELAY_BETWEEN_REQUESTS, 'burst': 1},
+    'googleapis.com': {'rate': 1, 'burst': 5},  # Google Custom Search API
+    'sheets.googleapis.com': {'rate': 1, 'burst': 5},  # Sheets API (60 requests/minute/user)
+    'translate.google.com': {'rate': 2, 'burst': 5}
+}
+DEFAULT_RATE_LIMIT = {'rate': 1 / DELAY_BETWEEN_REQUESTS, 'burst': 1}  # Any host not listed above
+# Overridden endpoints keep the rate limit of the service they stand in for
+RATE_LIMIT_HOST_ALIASES = {
+    urlparse(url).netloc.lower(): host
+    for url, host in [(BING_SEARCH_URL, 'bing.com'), (DUCKDUCKGO_SEARCH_URL, 'duckduckgo.com'),
+                      (GOOGLE_CSE_URL, 'googleapis.com')]
+    if not urlparse(url).netloc.lower().endswith(host)
+}
+
+# Local Storage Configuration
+# Caches, indexes and journals live here; mock runs get their own so fake data never mixes with real
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join('.cache', 'mock') if MOCK_SERVER_URL else '.cache')
+
+# HTTP Cache Configuration
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'false').lower() == 'true'
+HTTP_CACHE_FILE = os.path.join(CACHE_DIR, 'http_cache.sqlite')
+# Seconds a cached response stays fresh, per host suffix; hosts not listed are never cached
+HTTP_CACHE_TTLS = {
+    'bing.com': 12 * 3600,
+    'duckduckgo.com': 12 * 3600,
+    'googleapis.com': 20 * 3600,  # Custom Search results (each miss costs quota)
+    'serpapi.com': 20 * 3600,  # Paid per miss
+    'startpage.com': 12 * 3600
+}
+HTTP_CACHE_MAX_STALE = 7 * 24 * 3600  # Keep expired entries this long for ETag/Last-Modified revalidation
+HTTP_CACHE_IGNORED_PARAMS = ['key', 'api_key']  # Query params left out of cache keys (API credentials)
+
+# Google API Quota Configuration
+# Every Custom Search call is recorded in a local ledger; runs share out the day's remaining queries by
+# keyword yield (new URLs per query over the last GOOGLE_YIELD_WINDOW_DAYS) and skip Google once it's spent
+GOOGLE_DAILY_QUOTA = int(os.getenv('GOOGLE_DAILY_QUOTA', 100))  # Free tier: 100 queries/day
+GOOGLE_QUOTA_TIMEZONE = 'America/Los_Angeles'  # The quota resets at midnight Pacific Time
+GOOGLE_QUOTA_LEDGER_FILE = os.path.join(CACHE_DIR, 'google_quota.sqlite')
+GOOGLE_YIELD_WINDOW_DAYS = 14
+# Paid engines (SEARCH_ENGINES entries with a daily_quota) keep a ledger of their own
+ENGINE_QUOTA_LEDGER_FILE = os.path.join(CACHE_DIR, '{engine}_quota.sqlite')
+
+# URL Index Configuration
+URL_INDEX_FILE = os.path.join(CACHE_DIR, 'url_index.sqlite')  # Local copy of URLs already in the sheet
+
+# URL Canonicalization Configuration
+# Query parameters dropped from result URLs; entries ending in '_' match as prefixes
+TRACKING_PARAMS = ['utm_', 'gclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'dclid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'igshid']
+REDIRECT_CACHE_SIZE = 10000  # Redirect wrappers decoded per process before the oldest are forgotten
+
+# Near-Duplicate Detection Configuration
+# Results whose title + description overlap an earlier result (this run or already uploaded) by at
+# least NEAR_DUPLICATE_THRESHOLD (estimated Jaccard similarity of words and word pairs) are dropped
+NEAR_DUPLICATE_ENABLED = os.getenv('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true'
+NEAR_DUPLICATE_INDEX_FILE = os.path.join(CACHE_DIR, 'near_duplicates.sqlite')
+NEAR_DUPLICATE_THRESHOLD = 0.7
+NEAR_DUPLICATE_BANDS = 16  # MinHash LSH: 16 bands x 4 rows = 64 hash functions
+NEAR_DUPLICATE_ROWS_PER_BAND = 4
+NEAR_DUPLICATE_MIN_FEATURES = 8  # Shorter texts are too generic to compare reliably
+
+# Run Journal Configuration
+# Each (keyword, engine) search is checkpointed so `scraper.py --resume` only redoes the remaining work
+RUN_JOURNAL_FILE = os.path.join(CACHE_DIR, 'run_journal.sqlite')
+RUN_RESUME_WINDOW_HOURS = 24  # An unfinished run older than this is not resumed
 
 # Google Sheets Configuration
 SHEET_NAME = 'AI Summer Camps'
 SPANISH_SHEET_NAME = 'AI Summer Camps - Español'
+
+# Translation Configuration
+TRANSLATION_BATCH_CHAR_LIMIT = 4500  # Google Translate rejects requests over 5000 characters
+TRANSLATION_BATCH_MAX_ITEMS = 100  # Strings per batch request
+TRANSLATION_CACHE_ENABLED = os.getenv('TRANSLATION_CACHE_ENABLED', 'true').lower() == 'true'
+TRANSLATION_CACHE_FILE = os.path.join(CACHE_DIR, 'translation_cache.sqlite')
+TRANSLATION_CACHE_MAX_ENTRIES = 50000  # Least recently used translations are evicted past this
 COLUMNS = ['Title', 'URL', 'Category', 'Description', 'Source']
 
 # Category Configuration
@@ -101,10 +271,55 @@ CATEGORY_KEYWORDS = {
     ]
 }
 
+# Fallback clues used when no category keyword matches, checked in order.
+# Scope 'url' only looks at the URL; 'any' looks at the title, description and URL.
+CATEGORY_FALLBACK_RULES = [
+    ('STATE_LOCAL_OPPORTUNITY', 'url', ['state', 'community', 'public']),
+    ('SELF_GUIDED_COURSES', 'url', ['online', 'course', 'platform']),
+    ('TECHNOLOGY_SCHOLARSHIP', 'url', ['scholarship', 'grant', 'fund']),
+    ('SECONDARY_SCHOOL_FELLOWSHIP', 'any', ['university', 'college', 'institute'])
+]
+
+# Keywords that indicate a result is NOT a summer camp program (dictionary/encyclopedia pages)
+IRRELEVANT_KEYWORDS = [
+    'wikipedia.org',
+    'dictionary.com',
+    'merriam-webster',
+    'urbandictionary',
+    'definition',
+    'meaning of',
+    'what is',
+    'encyclopedia',
+    'wiki',
+    'dictionary',
+    'thesaurus',
+    'synonym',
+    'antonym'
+]
+
+# Keyword matching backend: 'auto' uses pyahocorasick when installed, else a compiled regex
+KEYWORD_MATCHER_BACKEND = os.getenv('KEYWORD_MATCHER_BACKEND', 'auto')
+
+# SERP parser backend: 'auto' picks selectolax, then lxml, then BeautifulSoup, whichever is installed
+SERP_PARSER_BACKEND = os.getenv('SERP_PARSER_BACKEND', 'auto')
+
 # Scheduling Configuration
 SCHEDULE_INTERVAL_HOURS = 24  # Run every 24 hours
 SCHEDULE_TIME = '09:00'  # Run at 9 AM
 
+# Run Coordination Configuration
+# Only one scrape runs at a time across all processes on this host (scheduler, manual runs)
+RUN_LOCK_FILE = os.path.join(CACHE_DIR, 'run_lock.sqlite')
+RUN_LEASE_SECONDS = 15 * 60  # Renewed while a run is alive; a crashed run's lease expires after this
+RUN_SKIP_IF_FINISHED_WITHIN_MINUTES = int(os.getenv('RUN_SKIP_IF_FINISHED_WITHIN_MINUTES', 120))
+
+# Metrics Configuration
+# The scheduler daemon serves /metrics on this port (0 disables it); one-shot runs write METRICS_FILE
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))
+METRICS_FILE = os.getenv('METRICS_FILE', 'scraper_metrics.prom')
+METRICS_HISTOGRAM_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]  # Seconds
+
 # Logging Configuration
 LOG_LEVEL = 'INFO'
 LOG_FILE = 'scraper.log' 
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+Per-engine health tracking: retry backoff with jitter and a circuit breaker that skips failing engines
+"""
+
+import time
+import random
+import threading
+import logging
+
+from config import (
+    RETRY_BACKOFF_BASE_SECONDS,
+    RETRY_BACKOFF_MAX_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_COOLDOWN_SECONDS,
+    CIRCUIT_MAX_COOLDOWN_SECONDS
+)
+from metrics import CIRCUIT_TRANSITIONS
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class EngineUnavailable(Exception):
+    """The engine's circuit is open, or the engine is blocking us; don't send requests to it for now"""
+
+class CircuitBreaker:
+    """Closed: requests flow. Open: requests are refused until the cooldown ends. Half-open: one probe decides"""
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN_SECONDS,
+                 max_cooldown=CIRCUIT_MAX_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            CIRCUIT_TRANSITIONS.inc(self.name, state)
+
+    def is_open(self):
+        """Whether requests would be refused right now (a due half-open probe counts as not open)"""
+        with self.lock:
+            return (self.state == OPEN and time.monotonic() < self.open_until) or self.state == HALF_OPEN
+
+    def seconds_until_retry(self):
+        with self.lock:
+            return max(0.0, self.open_until - time.monotonic()) if self.state == OPEN else 0.0
+
+    def allow_request(self):
+        """Whether a request may go out; after the cooldown exactly one caller gets the half-open probe"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                self._set_state(HALF_OPEN)
+                self.logger.info(f"{self.name} circuit half-open: sending one probe request")
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                self.logger.info(f"{self.name} circuit closed: engine is healthy again")
+            self._set_state(CLOSED)
+            self.consecutive_failures = 0
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self, blocked=False, retry_after=None):
+        """Count a failed request; blocked (captcha, 403/429) opens the circuit at once"""
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                # The probe failed: stay away longer each time
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif not blocked and self.consecutive_failures < self.failure_threshold:
+                return
+            cooldown = max(self.cooldown, retry_after or 0)
+            self.open_until = time.monotonic() + cooldown
+            self._set_state(OPEN)
+            reason = 'blocked' if blocked else f"{self.consecutive_failures} consecutive failures"
+            self.logger.warning(f"{self.name} circuit open for {cooldown:.0f}s ({reason})")
+
+    def get_backoff(self, attempt):
+        """Delay before retry number attempt + 1: exponential, capped, with full jitter"""
+        return random.uniform(0, min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+class EngineHealthTracker:
+    """One circuit breaker per engine, created on first use"""
+
+    def __init__(self):
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, engine):
+        with self.lock:
+            if engine not in self.breakers:
+                self.breakers[engine] = CircuitBreaker(engine)
+            return self.breakers[engine]
+
+    def summary(self):
+        """Get {engine: state} for logging"""
+        with self.lock:
+            return {engine: breaker.state for engine, breaker in self.breakers.items()}
+
+_shared_engine_health = None
+_shared_engine_health_lock = threading.Lock()
+
+def get_engine_health():
+    """Get the process-wide engine health tracker shared by all scrapers"""
+    global _shared_engine_health
+    with _shared_engine_health_lock:
+        if _shared_engine_health is None:
+            _shared_engine_health = EngineHealthTracker()
+        return _shared_engine_health
@@ -0,0 +1,249 @@
+"""
+Landing-page enrichment: fetches the start of each new result's page (bounded globally and per site, capped in
+bytes and time) and extracts its application deadline, tuition and grade levels for the extra sheet columns
+"""
+
+import re
+import html
+import time
+import calendar
+import threading
+import logging
+from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    ENRICHMENT_MAX_CONCURRENCY,
+    ENRICHMENT_PER_HOST_CONCURRENCY,
+    ENRICHMENT_MAX_BYTES,
+    ENRICHMENT_PAGE_DEADLINE_SECONDS,
+    ENRICHMENT_BACKLOG,
+    ENRICHMENT_COLUMNS
+)
+from metrics import ENRICHMENT_PAGES, ENRICHMENT_SECONDS, get_request_status
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+CHUNK_SIZE = 8192
+GRACE_SECONDS = 1  # How long past its deadline a page may run before the pipeline stops waiting for it
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+MONTH_PATTERN = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*'
+
+# Text between a cue and its value stays within this many characters
+CUE_WINDOW = 80
+DEADLINE_CUE_PATTERN = re.compile(
+    r'\b(?:deadline|apply by|applications? (?:are |is )?due|due (?:by|on)|register by|registration closes)\b', re.I)
+DATE_PATTERN = re.compile(
+    r'\b(?P<month>' + MONTH_PATTERN + r')\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(?P<year>20\d{2}))?'
+    r'|\b(?P<numeric_month>\d{1,2})/(?P<numeric_day>\d{1,2})/(?P<numeric_year>(?:20)?\d{2})\b', re.I)
+TUITION_CUE_PATTERN = re.compile(r'\b(?:tuition|costs?|fees?|price|pricing)\b', re.I)
+AMOUNT_PATTERN = re.compile(r'\$\s?(\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{2})?')
+FREE_PATTERN = re.compile(
+    r'\b(?:tuition[- ]free|free of charge|at no cost|no cost to (?:students|families|participants)'
+    r'|free (?:for|to) (?:all )?(?:students|participants|attend))\b', re.I)
+ORDINAL = r'(\d{1,2})(?:st|nd|rd|th)?'
+RANGE_SEPARATOR = r'\s*(?:-|–|to|through)\s*'
+GRADE_PATTERNS = [
+    re.compile(r'\bgrades?\s+' + ORDINAL + RANGE_SEPARATOR + ORDINAL + r'\b', re.I),  # grades 9-12
+    re.compile(r'\b' + ORDINAL + RANGE_SEPARATOR + ORDINAL + r'[\s-]+grade', re.I)  # 9th-12th grade(rs)
+]
+AGE_PATTERN = re.compile(r'\bages?\s+(\d{1,2})' + RANGE_SEPARATOR + r'(\d{1,2})\b', re.I)
+# Fallback when a page names the school level but no grade numbers
+SCHOOL_LEVEL_GRADES = {'middle': (6, 8), 'high': (9, 12)}
+SCHOOL_LEVEL_PATTERN = re.compile(r'\b(middle|high)[ -]school(?:ers| students)\b', re.I)
+
+HIDDEN_PATTERN = re.compile(r'<(script|style|noscript)\b.*?(?:</\1\s*>|$)', re.I | re.S)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+SPACE_PATTERN = re.compile(r'\s+')
+
+def html_to_text(content):
+    """Visible text of an HTML document (or a truncated start of one), with whitespace collapsed"""
+    content = HIDDEN_PATTERN.sub(' ', content)
+    content = TAG_PATTERN.sub(' ', content)
+    return SPACE_PATTERN.sub(' ', html.unescape(content)).strip()
+
+def _iter_near(text, cue_pattern, value_pattern):
+    """Yield value matches that follow a cue within CUE_WINDOW characters"""
+    for cue in cue_pattern.finditer(text):
+        yield from value_pattern.finditer(text, cue.end(), cue.end() + CUE_WINDOW)
+
+def _format_date(match):
+    if match.group('month'):
+        month = MONTHS.get(match.group('month').lower()[:3])
+        day, year = int(match.group('day')), match.group('year')
+    else:
+        month, day, year = int(match.group('numeric_month')), int(match.group('numeric_day')), match.group('numeric_year')
+        year = f"20{year}" if len(year) == 2 else year
+    try:
+        # A leap year, so February 29 passes when the page leaves the year out
+        datetime(int(year or 2000), month or 0, day)
+    except ValueError:
+        return None
+    return f"{year}-{month:02d}-{day:02d}" if year else f"{calendar.month_name[month]} {day}"
+
+def extract_deadline(text):
+    """First date given as an application deadline, as YYYY-MM-DD (or 'Month D' when the year is missing)"""
+    for match in _iter_near(text, DEADLINE_CUE_PATTERN, DATE_PATTERN):
+        deadline = _format_date(match)
+        if deadline:
+            return deadline
+    return ''
+
+def extract_tuition(text):
+    """Price (or price range) quoted near tuition/cost/fee wording, or 'Free' for tuition-free programs"""
+    amounts = sorted({
+        int(match.group(1).replace(',', ''))
+        for match in _iter_near(text, TUITION_CUE_PATTERN, AMOUNT_PATTERN)
+    } - {0})
+    if amounts:
+        low, high = amounts[0], amounts[-1]
+        return f"${low:,}" if low == high else f"${low:,}-${high:,}"
+    return 'Free' if FREE_PATTERN.search(text) else ''
+
+def extract_grades(text):
+    """Grade range (e.g. '9-12'), else an age range ('Ages 14-18'), else the school level's grades"""
+    for pattern in GRADE_PATTERNS:
+        for match in pattern.finditer(text):
+            low, high = int(match.group(1)), int(match.group(2))
+            if 1 <= low <= high <= 12:
+                return f"{low}-{high}"
+    for match in AGE_PATTERN.finditer(text):
+        low, high = int(match.group(1)), int(match.group(2))
+        if 5 <= low <= high <= 21:
+            return f"Ages {low}-{high}"
+    levels = [SCHOOL_LEVEL_GRADES[level.lower()] for level in SCHOOL_LEVEL_PATTERN.findall(text)]
+    if levels:
+        return f"{min(low for low, _ in levels)}-{max(high for _, high in levels)}"
+    return ''
+
+def extract_fields(text):
+    """Enrichment fields of a page's text, keyed like the ENRICHMENT_COLUMNS ('' when not found)"""
+    extractors = {'deadline': extract_deadline, 'tuition': extract_tuition, 'grades': extract_grades}
+    return {column.lower(): extractors[column.lower()](text) for column in ENRICHMENT_COLUMNS}
+
+class EnrichmentTask:
+    """A result on its way through the enricher; started_at is set when a worker begins fetching its page"""
+
+    def __init__(self, result):
+        self.result = result
+        self.started_at = None
+        self.future = None
+
+class PageEnricher:
+    """Fetches result pages on its own session and threads, so slow sites never hold up the search engines"""
+
+    def __init__(self, max_concurrency=ENRICHMENT_MAX_CONCURRENCY, per_host_concurrency=ENRICHMENT_PER_HOST_CONCURRENCY,
+                 max_bytes=ENRICHMENT_MAX_BYTES, page_deadline=ENRICHMENT_PAGE_DEADLINE_SECONDS,
+                 backlog=ENRICHMENT_BACKLOG):
+        self.max_bytes = max_bytes
+        self.page_deadline = page_deadline
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.backlog = max(1, backlog)
+        self.host_slots = {}  # Host -> semaphore of per_host_concurrency
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix='enrich')
+        self.logger = logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        adapter = HTTPAdapter(pool_maxsize=max(10, max_concurrency))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _get_host_slot(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.Semaphore(self.per_host_concurrency)
+            return self.host_slots[host]
+
+    def _iter_body(self, response):
+        """Yield body chunks as they arrive, so the deadline is checked even while a site trickles its page out"""
+        read1 = getattr(response.raw, 'read1', None)  # urllib3 2
+        if read1 is None:
+            # Older urllib3 waits for whole chunks, so the read timeout is what bounds a slow page there
+            yield from response.iter_content(chunk_size=CHUNK_SIZE)
+            return
+        while True:
+            chunk = read1(CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+
+    def fetch_text(self, url, deadline):
+        """Read at most max_bytes of an HTML page, stopping at the deadline; returns (status, text or None)"""
+        remaining = max(0.1, deadline - time.monotonic())
+        with self.session.get(url, stream=True, timeout=(remaining, remaining)) as response:
+            if response.status_code >= 400:
+                return str(response.status_code), None
+            content_type = response.headers.get('Content-Type', '').lower()
+            if content_type and 'html' not in content_type:
+                return 'not_html', None
+
+            status, chunks, size = 'ok', [], 0
+            for chunk in self._iter_body(response):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+                if time.monotonic() >= deadline:
+                    # Keep what arrived; the opening of a page is where deadlines and prices usually are
+                    status = 'timeout'
+                    break
+
+            content = b''.join(chunks)[:self.max_bytes]
+            try:
+                return status, content.decode(response.encoding or 'utf-8', errors='replace')
+            except LookupError:
+                return status, content.decode('utf-8', errors='replace')
+
+    def enrich(self, result):
+        """Get a copy of a result with the fields its page gives (blank when the page can't be read in time)"""
+        url = result.get('url', '')
+        started_at = time.monotonic()
+        deadline = started_at + self.page_deadline
+        status, text = 'error', None
+
+        if urlparse(url).scheme in ('http', 'https'):
+            slot = self._get_host_slot(urlparse(url).netloc.lower())
+            if slot.acquire(timeout=self.page_deadline):
+                try:
+                    status, text = self.fetch_text(url, deadline)
+                except requests.Timeout:
+                    status = 'timeout'
+                except Exception as e:
+                    status = get_request_status(e)
+                    self.logger.debug(f"Could not enrich {url}: {str(e)}")
+                finally:
+                    slot.release()
+            else:
+                status = 'timeout'
+
+        ENRICHMENT_PAGES.inc(status)
+        ENRICHMENT_SECONDS.observe(time.monotonic() - started_at)
+        fields = extract_fields(html_to_text(text)) if text else {}
+        return dict(result, **fields)
+
+    def _run_task(self, task):
+        task.started_at = time.monotonic()
+        return self.enrich(task.result)
+
+    def submit(self, result):
+        """Queue a result for enrichment; the task's future gives the enriched result"""
+        task = EnrichmentTask(result)
+        task.future = self.executor.submit(self._run_task, task)
+        return task
+
+    def is_overdue(self, task, now=None):
+        """Whether a task has run past its page deadline (a worker blocked in a read can overshoot it)"""
+        if task.started_at is None:
+            return False
+        return (now or time.monotonic()) - task.started_at > self.page_deadline + GRACE_SECONDS
+
+    def close(self):
+        """Stop taking pages; fetches still running finish in the background within their deadline"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
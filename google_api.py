@@ -2,9 +2,17 @@
 Google Custom Search API Implementation
 """
 
-import requests
 import os
+import math
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from rate_limiter import get_rate_limiter
+from http_cache import CachedSession, get_http_cache
+from metrics import SEARCH_REQUESTS, SEARCH_REQUEST_SECONDS, PARSE_SECONDS, RESULTS_PARSED, get_request_status
+from url_canonicalizer import canonical_key
+from quota_ledger import QuotaLedger, is_quota_error
+from engine_health import EngineUnavailable, get_engine_health
+from config import GOOGLE_CSE_URL, GOOGLE_CSE_PAGE_SIZE, GOOGLE_CSE_MAX_RESULTS, GOOGLE_CSE_PAGE_CONCURRENCY
 
 load_dotenv()
 
@@ -12,37 +20,146 @@ class GoogleCustomSearch:
     def __init__(self):
         self.api_key = os.getenv('GOOGLE_API_KEY')
         self.search_engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID')
-        self.base_url = "https://www.googleapis.com/customsearch/v1"
+        self.base_url = GOOGLE_CSE_URL
+        self.session = CachedSession(cache=get_http_cache(), rate_limiter=get_rate_limiter())
+        self.ledger = QuotaLedger()
+        self.page_budget = None  # {keyword: pages} once a run has planned its budget
         
-    def search(self, keyword, max_results=10):
-        """Search using Google Custom Search API"""
+    def plan_budget(self, keywords, max_results):
+        """Share today's remaining query budget among the keywords of a run, highest-yield first"""
+        pages_per_keyword = math.ceil(min(max_results, GOOGLE_CSE_MAX_RESULTS) / GOOGLE_CSE_PAGE_SIZE)
+        self.page_budget = self.ledger.plan(keywords, pages_per_keyword)
+        return self.page_budget
+    
+    def _fetch_page(self, keyword, start, num):
+        """Fetch one page of results; returns (call ID, status, decoded response), or None when today's budget is spent"""
+        breaker = get_engine_health().get('google')
+        if not breaker.allow_request():
+            raise EngineUnavailable(f"google circuit is open, retrying in {breaker.seconds_until_retry():.0f}s")
+        
+        call_id = self.ledger.reserve(keyword, start)
+        if call_id is None:
+            return None
+        
+        params = {
+            'key': self.api_key,
+            'cx': self.search_engine_id,
+            'q': keyword,
+            'num': num
+        }
+        # Page 1 keeps the parameters it always had, so its cached responses stay valid
+        if start > 1:
+            params['start'] = start
+        
+        try:
+            with SEARCH_REQUEST_SECONDS.time('google'):
+                response = self.session.get(self.base_url, params=params, timeout=15)
+                response.raise_for_status()
+        except Exception as e:
+            status = get_request_status(e)
+            SEARCH_REQUESTS.inc('google', status)
+            if is_quota_error(getattr(e, 'response', None)):
+                # The ledger stops further calls; the engine itself is fine
+                self.ledger.complete(call_id, 'quota_exceeded')
+                self.ledger.mark_exhausted()
+                breaker.record_success()
+            else:
+                self.ledger.complete(call_id, status)
+                breaker.record_failure()
+            raise
+        status = 'cached' if getattr(response, 'from_cache', False) else 'ok'
+        SEARCH_REQUESTS.inc('google', status)
+        breaker.record_success()
+        
+        with PARSE_SECONDS.time('google'):
+            return call_id, status, response.json()
+    
+    def _parse_items(self, keyword, data):
+        """Turn the items of one page into results"""
+        results = [
+            {
+                'keyword': keyword,
+                'title': item.get('title', ''),
+                'url': item.get('link', ''),
+                'description': item.get('snippet', ''),
+                'source': 'Google API'
+            }
+            for item in data.get('items', [])
+        ]
+        RESULTS_PARSED.inc('google', amount=len(results))
+        return results
+    
+    def _count_new_urls(self, page_results, seen_urls, known_urls):
+        """Track a page's URLs; returns how many were new (not on an earlier page nor in known_urls)"""
+        new_urls = 0
+        for result in page_results:
+            key = canonical_key(result['url'])
+            if key not in seen_urls and (known_urls is None or result['url'] not in known_urls):
+                new_urls += 1
+            seen_urls.add(key)
+        return new_urls
+    
+    def _record_page(self, keyword, page, seen_urls, known_urls):
+        """Parse a fetched page and log its yield in the ledger; returns (results, new URL count)"""
+        call_id, status, data = page
+        page_results = self._parse_items(keyword, data)
+        new_urls = self._count_new_urls(page_results, seen_urls, known_urls)
+        self.ledger.complete(call_id, status, len(page_results), new_urls)
+        return page_results, new_urls
+    
+    def search(self, keyword, max_results=10, known_urls=None):
+        """Search using Google Custom Search API, paging until max_results, the end of the results or a page of known URLs"""
         if not self.api_key or not self.search_engine_id:
             print("Google API not configured. Please set GOOGLE_API_KEY and GOOGLE_SEARCH_ENGINE_ID in .env")
             return []
         
+        # A planned run only spends the pages the budget gave this keyword
+        if self.page_budget is not None and keyword in self.page_budget:
+            if self.page_budget[keyword] == 0:
+                print(f"Skipping Google API search for '{keyword}': outside today's query budget")
+                return []
+            max_results = min(max_results, self.page_budget[keyword] * GOOGLE_CSE_PAGE_SIZE)
+        
         results = []
         try:
-            params = {
-                'key': self.api_key,
-                'cx': self.search_engine_id,
-                'q': keyword,
-                'num': min(10, max_results)
-            }
+            max_results = min(max_results, GOOGLE_CSE_MAX_RESULTS)
             
-            response = requests.get(self.base_url, params=params, timeout=15)
-            response.raise_for_status()
+            # The first page tells us how many results the query has, so it goes alone
+            first_page = self._fetch_page(keyword, 1, min(GOOGLE_CSE_PAGE_SIZE, max_results))
+            if first_page is None:
+                print(f"Skipping Google API search for '{keyword}': daily query budget spent")
+                return []
+            seen_urls = set()
+            results, new_urls = self._record_page(keyword, first_page, seen_urls, known_urls)
+            total_results = int(first_page[2].get('searchInformation', {}).get('totalResults', 0))
             
-            data = response.json()
+            last_result = min(max_results, total_results)
+            starts = list(range(GOOGLE_CSE_PAGE_SIZE + 1, last_result + 1, GOOGLE_CSE_PAGE_SIZE))
             
-            if 'items' in data:
-                for item in data['items']:
-                    results.append({
-                        'keyword': keyword,
-                        'title': item.get('title', ''),
-                        'url': item.get('link', ''),
-                        'description': item.get('snippet', ''),
-                        'source': 'Google API'
-                    })
+            # Later pages go out in small concurrent waves over the shared keep-alive session;
+            # a wave is only sent while the previous one still turned up new URLs
+            while starts and new_urls:
+                wave, starts = starts[:GOOGLE_CSE_PAGE_CONCURRENCY], starts[GOOGLE_CSE_PAGE_CONCURRENCY:]
+                with ThreadPoolExecutor(max_workers=len(wave)) as executor:
+                    futures = [
+                        executor.submit(self._fetch_page, keyword, start, min(GOOGLE_CSE_PAGE_SIZE, last_result - start + 1))
+                        for start in wave
+                    ]
+                    # Every page of the wave is already paid for, so all of them are recorded and kept;
+                    # a missing page, a failed one or one without new URLs only stops the next wave
+                    for future in futures:
+                        try:
+                            page = future.result()
+                        except Exception as e:
+                            print(f"Google API page failed for '{keyword}': {str(e)}")
+                            page = None
+                        if page is None:
+                            new_urls = 0
+                            continue
+                        page_results, page_new_urls = self._record_page(keyword, page, seen_urls, known_urls)
+                        results.extend(page_results)
+                        if not page_new_urls:
+                            new_urls = 0
             
             print(f"Found {len(results)} results from Google API for '{keyword}'")
             
@@ -0,0 +1,273 @@
+"""
+Persistent HTTP response cache for search-engine result pages
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from config import (
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_FILE,
+    HTTP_CACHE_TTLS,
+    HTTP_CACHE_MAX_STALE,
+    HTTP_CACHE_IGNORED_PARAMS
+)
+
+# Response headers worth keeping; cookies and hop-by-hop headers are dropped
+STORED_HEADERS = ['Content-Type', 'Content-Encoding', 'ETag', 'Last-Modified', 'Cache-Control', 'Date']
+
+def normalize_request_url(url, params=None):
+    """Build a canonical URL for a GET request so equivalent requests share a cache entry"""
+    parsed = urlparse(url)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        query.extend((str(key), str(value)) for key, value in items if value is not None)
+
+    # Credentials such as the API key don't change the response and must not end up on disk
+    query = sorted((key, value) for key, value in query if key not in HTTP_CACHE_IGNORED_PARAMS)
+
+    return urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        parsed.path or '/',
+        '',
+        urlencode(query),
+        ''
+    ))
+
+class CacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters"""
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.revalidated = 0
+            self.bytes_saved = 0
+            self.bytes_downloaded = 0
+
+    def record(self, outcome, size):
+        """Record a cache lookup outcome: 'hit', 'revalidated' or 'miss'"""
+        with self.lock:
+            if outcome == 'hit':
+                self.hits += 1
+                self.bytes_saved += size
+            elif outcome == 'revalidated':
+                self.revalidated += 1
+                self.bytes_saved += size
+            else:
+                self.misses += 1
+                self.bytes_downloaded += size
+
+    def summary(self):
+        """Get a one-line summary of the counters"""
+        with self.lock:
+            return (f"{self.hits} hits, {self.revalidated} revalidated, {self.misses} misses, "
+                    f"{self.bytes_saved / 1024:.1f} KB saved, {self.bytes_downloaded / 1024:.1f} KB downloaded")
+
+class HTTPCache:
+    def __init__(self, cache_file=HTTP_CACHE_FILE, ttls=None):
+        self.cache_file = cache_file
+        self.ttls = HTTP_CACHE_TTLS if ttls is None else ttls
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self.connection.commit()
+        self.purge_stale()
+
+    def get_ttl(self, url):
+        """Get the TTL in seconds for a URL based on its host (0 means don't cache)"""
+        host = urlparse(url).netloc.lower().split(':')[0]
+        matches = [key for key in self.ttls if host == key or host.endswith('.' + key)]
+        if not matches:
+            return 0
+        return self.ttls[max(matches, key=len)]
+
+    def make_key(self, normalized_url):
+        """Hash a normalized URL into a cache key"""
+        return hashlib.sha256(normalized_url.encode('utf-8')).hexdigest()
+
+    def lookup(self, cache_key):
+        """Get a stored entry as a dict, or None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT url, status_code, headers, body, etag, last_modified, expires_at "
+                "FROM responses WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'cache_key': cache_key,
+            'url': row[0],
+            'status_code': row[1],
+            'headers': json.loads(row[2]),
+            'body': row[3],
+            'etag': row[4],
+            'last_modified': row[5],
+            'expires_at': row[6]
+        }
+
+    def store(self, cache_key, normalized_url, response, ttl):
+        """Store a successful response"""
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(cache_key, url, status_code, headers, body, etag, last_modified, stored_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    cache_key,
+                    normalized_url,
+                    response.status_code,
+                    json.dumps(headers),
+                    response.content,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    now,
+                    now + ttl
+                )
+            )
+            self.connection.commit()
+
+    def refresh(self, cache_key, ttl):
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE responses SET expires_at = ? WHERE cache_key = ?",
+                (time.time() + ttl, cache_key)
+            )
+            self.connection.commit()
+
+    def delete(self, cache_key):
+        """Drop an entry"""
+        with self.lock:
+            self.connection.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+            self.connection.commit()
+
+    def purge_stale(self):
+        """Delete entries that expired longer ago than the revalidation window"""
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM responses WHERE expires_at < ?",
+                (time.time() - HTTP_CACHE_MAX_STALE,)
+            )
+            self.connection.commit()
+
+    def build_response(self, entry, request_url):
+        """Rebuild a requests.Response from a stored entry"""
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response._content = entry['body']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.url = request_url
+        response.reason = 'OK'
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        response.cache_key = entry['cache_key']
+        return response
+
+class CachedSession(requests.Session):
+    """requests.Session that serves GETs from an optional HTTPCache and rate-limits network requests"""
+
+    def __init__(self, cache=None, rate_limiter=None):
+        super().__init__()
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+
+    def _send_to_network(self, method, url, **kwargs):
+        """Make a real request, waiting for the host's rate budget first"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url)
+        response = super().request(method, url, **kwargs)
+        response.from_cache = False
+        return response
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        ttl = self.cache.get_ttl(url) if self.cache else 0
+        if method.upper() != 'GET' or ttl <= 0:
+            return self._send_to_network(method, url, params=params, headers=headers, **kwargs)
+
+        normalized_url = normalize_request_url(url, params)
+        cache_key = self.cache.make_key(normalized_url)
+        entry = self.cache.lookup(cache_key)
+
+        # Fresh entry: skip the network entirely
+        if entry and entry['expires_at'] > time.time():
+            self.cache.stats.record('hit', len(entry['body']))
+            return self.cache.build_response(entry, url)
+
+        # Stale entry with validators: ask the server whether it changed
+        request_headers = dict(headers or {})
+        if entry:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._send_to_network(method, url, params=params, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.refresh(cache_key, ttl)
+            self.cache.stats.record('revalidated', len(entry['body']))
+            return self.cache.build_response(entry, url)
+
+        self.cache.stats.record('miss', len(response.content))
+        if response.status_code == 200:
+            self.cache.store(cache_key, normalized_url, response, ttl)
+            response.cache_key = cache_key
+
+        return response
+
+    def evict(self, response):
+        """Forget a cached response the caller found unusable (e.g. a block page), so the next request goes out"""
+        cache_key = getattr(response, 'cache_key', None)
+        if self.cache and cache_key:
+            self.cache.delete(cache_key)
+
+_shared_http_cache = None
+_shared_http_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """Get the process-wide HTTP cache, or None when caching is disabled"""
+    global _shared_http_cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _shared_http_cache_lock:
+        if _shared_http_cache is None:
+            _shared_http_cache = HTTPCache()
+        return _shared_http_cache
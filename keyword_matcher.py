@@ -0,0 +1,193 @@
+"""
+Precompiled keyword rules for relevance filtering and categorization
+"""
+
+import re
+import importlib
+import threading
+from functools import lru_cache
+
+import config
+
+try:
+    import ahocorasick  # Optional C implementation (pip install pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
+def build_trie_pattern(keywords):
+    """Build a regex that matches the longest keyword starting at a position"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True  # End-of-keyword marker
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional: try the longer keywords first, fall back to the one ending here
+        return '(?:' + body + ')?' if '' in node else body
+
+    return render(trie)
+
+class KeywordMatcher:
+    """Finds every keyword of a fixed list that occurs in a text with a single pass"""
+
+    def __init__(self, keywords, backend=None):
+        self.keywords = sorted({keyword.lower() for keyword in keywords if keyword})
+        backend = backend or config.KEYWORD_MATCHER_BACKEND
+
+        if backend == 'aho-corasick' and ahocorasick is None:
+            raise ImportError("KEYWORD_MATCHER_BACKEND is 'aho-corasick' but pyahocorasick is not installed")
+
+        # Aho-Corasick reports every occurrence, overlapping ones included, in one C-level pass
+        self.automaton = None
+        if backend in ('auto', 'aho-corasick') and ahocorasick is not None and self.keywords:
+            self.automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self.automaton.add_word(keyword, keyword)
+            self.automaton.make_automaton()
+        self.backend = 'aho-corasick' if self.automaton is not None else 'regex'
+
+        # Pure-Python fallback: one trie-shaped regex
+        self.pattern = re.compile(build_trie_pattern(self.keywords)) if self.keywords else None
+
+        # Each match is the longest keyword starting at its position; every keyword
+        # contained in it (including shorter ones starting at the same place) is present too
+        self.contained = {
+            keyword: frozenset(other for other in self.keywords if other in keyword)
+            for keyword in self.keywords
+        }
+
+        # After a match the scan normally resumes at its end. That is only unsafe when another
+        # keyword could start inside the match and run past it ('public program' / 'program dates'),
+        # so for those keywords the scan resumes one character after the match start instead
+        self.overlapping = frozenset(
+            keyword for keyword in self.keywords
+            if any(
+                other.startswith(keyword[offset:]) and len(other) > len(keyword) - offset
+                for offset in range(1, len(keyword))
+                for other in self.keywords
+            )
+        )
+
+    def find_all(self, text):
+        """Get the set of keywords found in an already lowercased text"""
+        if self.automaton is not None:
+            return {keyword for _, keyword in self.automaton.iter(text)}
+
+        found = set()
+        if self.pattern is None:
+            return found
+
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            keyword = match.group()
+            found |= self.contained[keyword]
+            match = search(text, match.start() + 1 if keyword in self.overlapping else match.end())
+        return found
+
+class ResultRules:
+    """Relevance and category rules compiled into one matcher that scans each field once"""
+
+    def __init__(self, categories, category_keywords, fallback_rules, irrelevant_keywords):
+        self.categories = categories
+        self.category_keywords = category_keywords
+        self.fallback_rules = [
+            (category, scope, [word.lower() for word in words])
+            for category, scope, words in fallback_rules
+        ]
+        self.irrelevant_keywords = frozenset(keyword.lower() for keyword in irrelevant_keywords)
+
+        # keyword -> [(category, times listed)], so repeated entries weigh the same as before
+        self.keyword_categories = {}
+        for category, keywords in category_keywords.items():
+            counts = {}
+            for keyword in keywords:
+                counts[keyword.lower()] = counts.get(keyword.lower(), 0) + 1
+            for keyword, count in counts.items():
+                self.keyword_categories.setdefault(keyword, []).append((category, count))
+
+        all_keywords = set(self.keyword_categories) | set(self.irrelevant_keywords)
+        for _, _, words in self.fallback_rules:
+            all_keywords.update(words)
+        self.matcher = KeywordMatcher(all_keywords)
+
+        # Relevance filtering and categorization look at the same result back to back
+        self.scan_fields = lru_cache(maxsize=1024)(self._scan_fields)
+
+    def _scan_fields(self, title, description, url):
+        """Get the keywords found in the title, description and URL"""
+        return (
+            self.matcher.find_all(title.lower()),
+            self.matcher.find_all(description.lower()),
+            self.matcher.find_all(url.lower())
+        )
+
+    def is_excluded(self, title, description, url):
+        """Check whether any field contains an irrelevant keyword"""
+        title_found, desc_found, url_found = self.scan_fields(title, description, url)
+        return not (self.irrelevant_keywords.isdisjoint(title_found)
+                    and self.irrelevant_keywords.isdisjoint(desc_found)
+                    and self.irrelevant_keywords.isdisjoint(url_found))
+
+    def score_categories(self, title, description, url):
+        """Score each category: 5 per keyword in the title, else 3 in the description, else 1 in the URL"""
+        title_found, desc_found, url_found = self.scan_fields(title, description, url)
+        category_scores = {category: 0 for category in self.category_keywords}
+
+        for keyword in title_found | desc_found | url_found:
+            keyword_categories = self.keyword_categories.get(keyword)
+            if not keyword_categories:
+                continue
+
+            if keyword in title_found:
+                weight = 5
+            elif keyword in desc_found:
+                weight = 3
+            else:
+                weight = 1
+
+            for category, count in keyword_categories:
+                category_scores[category] += weight * count
+
+        return category_scores
+
+    def fallback_category(self, title, description, url):
+        """Get the first fallback category whose clue words appear, or None"""
+        title_found, desc_found, url_found = self.scan_fields(title, description, url)
+        all_found = title_found | desc_found | url_found
+
+        for category, scope, words in self.fallback_rules:
+            found = url_found if scope == 'url' else all_found
+            if any(word in found for word in words):
+                return category
+        return None
+
+def compile_rules():
+    """Compile the rules from the current configuration"""
+    return ResultRules(
+        config.CATEGORIES,
+        config.CATEGORY_KEYWORDS,
+        config.CATEGORY_FALLBACK_RULES,
+        config.IRRELEVANT_KEYWORDS
+    )
+
+_rules = compile_rules()
+_rules_lock = threading.Lock()
+
+def get_rules():
+    """Get the compiled rules"""
+    return _rules
+
+def reload_rules():
+    """Reload config.py and recompile the rules"""
+    global _rules
+    with _rules_lock:
+        importlib.reload(config)
+        _rules = compile_rules()
+    return _rules
@@ -0,0 +1,242 @@
+"""
+In-process metrics registry (counters and latency histograms) with Prometheus text exposition
+"""
+
+import os
+import re
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_HISTOGRAM_BUCKETS
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """Monotonic count per label set"""
+
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values):
+        with self.lock:
+            return self.values.get(label_values, 0)
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+
+    def render(self):
+        with self.lock:
+            return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                    for labels, value in sorted(self.values.items())]
+
+class Histogram:
+    """Latency distribution per label set, in cumulative buckets like a Prometheus histogram"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=METRICS_HISTOGRAM_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = sorted(buckets)
+        self.values = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.values.setdefault(label_values, [0] * (len(self.buckets) + 2))
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observe the wall time of a with block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def get_count(self, *label_values):
+        with self.lock:
+            series = self.values.get(label_values)
+            return sum(series[:-1]) if series else 0
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for labels, series in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + [float('inf')], series[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, [('le', le)])} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric_class, name, documentation, label_names, **kwargs):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = metric_class(name, documentation, label_names, **kwargs)
+            return self.metrics[name]
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(Counter, name, documentation, label_names)
+
+    def histogram(self, name, documentation, label_names=(), **kwargs):
+        return self._register(Histogram, name, documentation, label_names, **kwargs)
+
+    def reset(self):
+        """Zero every metric (between runs of a long-lived process the totals normally keep going)"""
+        for metric in list(self.metrics.values()):
+            metric.reset()
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, metrics_file):
+        """Dump the metrics to a file; written atomically so a textfile collector never reads half a file"""
+        metrics_dir = os.path.dirname(metrics_file)
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+        temp_file = f"{metrics_file}.tmp"
+        with open(temp_file, 'w') as output:
+            output.write(self.render())
+        os.replace(temp_file, metrics_file)
+
+REGISTRY = MetricsRegistry()
+
+RUNS = REGISTRY.counter(
+    'scraper_runs_total', "Scraper runs by trigger and outcome (ok, skipped, failed)", ['trigger', 'outcome'])
+RUN_SECONDS = REGISTRY.histogram(
+    'scraper_run_seconds', "Scraper run duration", ['trigger'],
+    buckets=[10, 30, 60, 120, 300, 600, 900, 1800, 3600])
+SEARCH_REQUESTS = REGISTRY.counter(
+    'scraper_search_requests_total', "Search engine requests by outcome (ok, cached, HTTP status or error)",
+    ['engine', 'status'])
+SEARCH_REQUEST_SECONDS = REGISTRY.histogram(
+    'scraper_search_request_seconds', "Search engine request latency, including rate-limit waits", ['engine'])
+PARSE_SECONDS = REGISTRY.histogram(
+    'scraper_parse_seconds', "Time to extract raw results from a search response", ['engine'])
+RESULTS_PARSED = REGISTRY.counter(
+    'scraper_results_parsed_total', "Raw results extracted from search responses", ['engine'])
+RESULTS_FILTERED = REGISTRY.counter(
+    'scraper_results_filtered_total', "Results rejected by the relevance check", ['engine'])
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    'scraper_circuit_transitions_total', "Engine circuit breaker state changes", ['engine', 'state'])
+SEARCH_COST = REGISTRY.counter(
+    'scraper_search_cost_dollars_total', "Spend on billed queries to paid search engines", ['engine'])
+RESULTS_DROPPED = REGISTRY.counter(
+    'scraper_results_dropped_total', "Results dropped before upload (duplicate, existing, near_duplicate)", ['reason'])
+TRANSLATION_REQUESTS = REGISTRY.counter(
+    'translator_requests_total', "Translation backend calls by kind (single, batch) and outcome", ['kind', 'status'])
+TRANSLATION_REQUEST_SECONDS = REGISTRY.histogram(
+    'translator_request_seconds', "Translation backend call latency, excluding rate-limit waits", ['kind'])
+ENRICHMENT_PAGES = REGISTRY.counter(
+    'scraper_enrichment_pages_total',
+    "Landing pages fetched for enrichment by outcome (ok, timeout, not_html, HTTP status or error; skipped when "
+    "the backlog was full)", ['status'])
+ENRICHMENT_SECONDS = REGISTRY.histogram(
+    'scraper_enrichment_page_seconds', "Time to fetch and read a landing page, including waits for its site")
+SHEETS_REQUESTS = REGISTRY.counter(
+    'sheets_api_requests_total', "Google Sheets and Drive API calls by operation and HTTP status",
+    ['operation', 'status'])
+SHEETS_REQUEST_SECONDS = REGISTRY.histogram(
+    'sheets_api_request_seconds', "Google Sheets and Drive API call latency", ['operation'])
+
+def get_request_status(error):
+    """Status label for a failed request: the HTTP status when there was a response, else 'error'"""
+    response = getattr(error, 'response', None)
+    return str(response.status_code) if response is not None else 'error'
+
+# Sheets API paths -> operation label; the spreadsheet ID and ranges would make unbounded label values
+SHEETS_OPERATIONS = [
+    (re.compile(r'/values:batchGet'), 'values_batch_get'),
+    (re.compile(r'/values/[^/]+:append'), 'values_append'),
+    (re.compile(r'/values/[^/]+:clear'), 'values_clear'),
+    (re.compile(r'/values/'), 'values'),
+    (re.compile(r':batchUpdate'), 'batch_update'),
+    (re.compile(r'/drive/'), 'drive'),
+    (re.compile(r'/spreadsheets/[^/]+$'), 'metadata')
+]
+
+def get_sheets_operation(method, url):
+    path = url.split('?', 1)[0]
+    operation = next((name for pattern, name in SHEETS_OPERATIONS if pattern.search(path)), 'other')
+    return operation if operation != 'values' else f"values_{method.lower()}"
+
+def record_sheets_response(response, *args, **kwargs):
+    """requests response hook for the gspread session: one sample per Sheets/Drive API call"""
+    operation = get_sheets_operation(response.request.method, response.request.url)
+    SHEETS_REQUESTS.inc(operation, str(response.status_code))
+    SHEETS_REQUEST_SECONDS.observe(response.elapsed.total_seconds(), operation)
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would drown the scraper log
+
+def start_metrics_server(host, port, registry=REGISTRY):
+    """Serve /metrics from a daemon thread; returns the server, or None if the port is unavailable"""
+    logger = logging.getLogger(__name__)
+    handler = type('RegistryRequestHandler', (MetricsRequestHandler,), {'registry': registry})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        logger.error(f"Could not start metrics endpoint on {host}:{port}: {str(e)}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
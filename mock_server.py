@@ -0,0 +1,587 @@
+"""
+Local stand-in for the Bing, DuckDuckGo, Google Custom Search, Google Sheets and translation
+endpoints, with configurable latency, errors, 429s and quota exhaustion for load testing.
+
+Start it and point the scraper at it (every service gets its own port, starting at --port):
+    python mock_server.py --port 8800 --latency-ms 80 --jitter-ms 150 --error-rate 0.01
+    MOCK_SERVER_URL=http://127.0.0.1:8800 GOOGLE_API_KEY=mock GOOGLE_SEARCH_ENGINE_ID=mock python scraper.py
+
+Faults can be changed while it runs:
+    curl -X POST localhost:8800/__mock__/faults -d '{"google_cse": {"daily_quota": 100}}'
+    curl localhost:8800/__mock__/stats
+"""
+
+import re
+import json
+import time
+import zlib
+import base64
+import random
+import socket
+import argparse
+import threading
+import logging
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote, quote
+
+from config import MOCK_SERVICE_PORT_OFFSETS
+
+DEFAULT_FAULTS = {
+    'latency_ms': 0,  # Fixed delay added to every response
+    'jitter_ms': 0,  # Mean of an exponential extra delay, which gives a long tail
+    'error_rate': 0.0,  # Share of requests answered with a 500
+    'rate_limit_rate': 0.0,  # Share of requests answered with a 429
+    'retry_after': 1,  # Seconds advertised in 429 responses
+    'daily_quota': None  # Requests served before every further one gets a quota-exceeded 429
+}
+
+GOOGLE_ERROR_STATUS = {400: 'INVALID_ARGUMENT', 404: 'NOT_FOUND', 429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL'}
+
+ORGANIZATIONS = [
+    ('Stanford', 'stanford.edu'), ('MIT', 'mit.edu'), ('Carnegie Mellon', 'cmu.edu'), ('Princeton', 'princeton.edu'),
+    ('UT Austin', 'utexas.edu'), ('Georgia Tech', 'gatech.edu'), ('UC Berkeley', 'berkeley.edu'),
+    ('Inspirit AI', 'inspiritai.com'), ('AI Camp', 'ai-camp.org'), ('iD Tech', 'idtech.com'),
+    ('County Library', 'library.county.gov'), ('State STEM Council', 'stem.state.gov'), ('Coursera', 'coursera.org')
+]
+PROGRAMS = ['AI4ALL Summer Program', 'AI Scholars', 'Summer Computing Academy', 'Machine Learning Camp',
+            'AI Summer Institute', 'Teen AI Workshop', 'Data Science Fellowship', 'Robotics and AI Academy']
+DETAILS = ['Applications are due March 1.', 'Full scholarships and need-based grants available.',
+           'Free for students from the state.', 'Self-paced online course with certificate.',
+           'Residential program for rising high school seniors.', 'Tuition $2,400; financial aid available.',
+           'Open to grades 9-12.', 'Community program run by the local library.']
+
+def make_results(query, count, start=0):
+    """Deterministic fake results for a query; the same query gives the same results on every engine"""
+    results = []
+    for rank in range(start, start + count):
+        rng = random.Random(zlib.crc32(f"{query.lower()}|{rank}".encode('utf-8')))
+        organization, domain = rng.choice(ORGANIZATIONS)
+        program = rng.choice(PROGRAMS)
+        slug = re.sub(r'[^a-z0-9]+', '-', program.lower()).strip('-')
+        details = ' '.join(rng.sample(DETAILS, 2))
+        results.append({
+            'title': f"{organization} {program}",
+            'url': f"https://www.{domain}/{slug}-{rank}",
+            'description': f"{organization} {program.lower()} for high school students interested in AI. {details}"
+        })
+    return results
+
+def bing_tracking_link(url):
+    encoded = base64.urlsafe_b64encode(url.encode('utf-8')).decode('ascii').rstrip('=')
+    return f"https://www.bing.com/ck/a?!&&p={zlib.crc32(url.encode('utf-8')):x}&ptn=3&ver=2&u=a1{encoded}&ntb=1"
+
+def render_bing(query, count):
+    items = []
+    for index, result in enumerate(make_results(query, count)):
+        # Bing wraps some organic links in its click tracker
+        href = bing_tracking_link(result['url']) if index % 3 == 0 else result['url']
+        items.append(
+            f'<li class="b_algo"><h2><a href="{escape(href)}">{escape(result["title"])}</a></h2>'
+            f'<div class="b_caption"><p>{escape(result["description"])}</p></div></li>'
+        )
+    return (f'<!DOCTYPE html><html><head><title>{escape(query)} - Search</title></head><body>'
+            f'<ol id="b_results">{"".join(items)}</ol></body></html>')
+
+def render_duckduckgo(query, count=10):
+    items = []
+    for result in make_results(query, count):
+        href = f"//duckduckgo.com/l/?uddg={quote(result['url'], safe='')}&rut={zlib.crc32(result['url'].encode('utf-8')):x}"
+        items.append(
+            f'<div class="result results_links web-result"><div class="links_main">'
+            f'<h2 class="result__title"><a class="result__a" href="{escape(href)}">{escape(result["title"])}</a></h2>'
+            f'<a class="result__snippet" href="{escape(href)}">{escape(result["description"])}</a></div></div>'
+        )
+    return f'<!DOCTYPE html><html><body><div id="links" class="results">{"".join(items)}</div></body></html>'
+
+def column_index(letters):
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+def parse_a1_range(range_name):
+    """Split 'Title'!A1:B2 into (title, first row, first column, last row, last column); None means open"""
+    match = re.match(r"^(?:'((?:[^']|'')+)'|([^!]+))(?:!(.+))?$", range_name)
+    title = (match.group(1) or '').replace("''", "'") or match.group(2)
+    cells = match.group(3)
+    if not cells:
+        return title, 0, 0, None, None
+
+    bounds = []
+    for part in cells.split(':'):
+        cell = re.match(r'^([A-Za-z]*)(\d*)$', part)
+        bounds.append((
+            int(cell.group(2)) - 1 if cell.group(2) else None,
+            column_index(cell.group(1)) if cell.group(1) else None
+        ))
+    (first_row, first_column), (last_row, last_column) = bounds[0], bounds[-1]
+    return title, first_row or 0, first_column or 0, last_row, last_column
+
+class MockState:
+    """Faults, statistics and spreadsheet contents shared by every service"""
+
+    def __init__(self, faults=None, seed=None):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.faults = {service: dict(DEFAULT_FAULTS) for service in MOCK_SERVICE_PORT_OFFSETS}
+        for service, overrides in (faults or {}).items():
+            self.update_faults(service, overrides)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {service: {'requests': 0, 'statuses': {}, 'delays_ms': []} for service in MOCK_SERVICE_PORT_OFFSETS}
+            self.quota_used = {service: 0 for service in MOCK_SERVICE_PORT_OFFSETS}
+            self.spreadsheets = {}
+
+    def update_faults(self, service, overrides):
+        """Change the faults of one service, or of every service with 'all'"""
+        services = list(MOCK_SERVICE_PORT_OFFSETS) if service == 'all' else [service]
+        with self.lock:
+            for name in services:
+                unknown = set(overrides) - set(DEFAULT_FAULTS)
+                if unknown:
+                    raise ValueError(f"Unknown fault settings: {', '.join(sorted(unknown))}")
+                self.faults[name].update(overrides)
+
+    def plan_response(self, service):
+        """Decide the injected delay and whether the request fails: returns (delay seconds, status or None, reason)"""
+        with self.lock:
+            faults = self.faults[service]
+            delay_ms = faults['latency_ms']
+            if faults['jitter_ms']:
+                delay_ms += self.rng.expovariate(1 / faults['jitter_ms'])
+
+            self.quota_used[service] += 1
+            if faults['daily_quota'] is not None and self.quota_used[service] > faults['daily_quota']:
+                return delay_ms / 1000, 429, 'quota'
+            if self.rng.random() < faults['rate_limit_rate']:
+                return delay_ms / 1000, 429, 'rate_limit'
+            if self.rng.random() < faults['error_rate']:
+                return delay_ms / 1000, 500, 'error'
+            return delay_ms / 1000, None, None
+
+    def record(self, service, status, delay):
+        with self.lock:
+            stats = self.stats[service]
+            stats['requests'] += 1
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+            stats['delays_ms'].append(delay * 1000)
+
+    def summary(self):
+        """Per-service request counts, status counts and injected-delay percentiles"""
+        with self.lock:
+            summary = {}
+            for service, stats in self.stats.items():
+                delays = sorted(stats['delays_ms'])
+                percentile = lambda share: round(delays[min(len(delays) - 1, int(share * len(delays)))], 1) if delays else None
+                summary[service] = {
+                    'requests': stats['requests'],
+                    'statuses': dict(stats['statuses']),
+                    'delay_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)},
+                    'faults': dict(self.faults[service])
+                }
+            return summary
+
+    def get_spreadsheet(self, spreadsheet_id):
+        """Get a spreadsheet, creating it (with one empty tab) on first use"""
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            spreadsheet = {'title': f"Mock spreadsheet {spreadsheet_id}", 'sheets': []}
+            self.spreadsheets[spreadsheet_id] = spreadsheet
+            self.add_sheet(spreadsheet, {'title': 'Sheet1'})
+        return spreadsheet
+
+    def add_sheet(self, spreadsheet, properties):
+        grid = properties.get('gridProperties', {})
+        sheet = {
+            'sheetId': properties.get('sheetId', len(spreadsheet['sheets']) and max(s['sheetId'] for s in spreadsheet['sheets']) + 1),
+            'title': properties.get('title') or f"Sheet{len(spreadsheet['sheets']) + 1}",
+            'index': len(spreadsheet['sheets']),
+            'rowCount': grid.get('rowCount', 1000),
+            'columnCount': grid.get('columnCount', 26),
+            'rows': []
+        }
+        spreadsheet['sheets'].append(sheet)
+        return sheet
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def sheet_properties(sheet):
+    return {
+        'sheetId': sheet['sheetId'],
+        'title': sheet['title'],
+        'index': sheet['index'],
+        'sheetType': 'GRID',
+        'gridProperties': {'rowCount': max(sheet['rowCount'], len(sheet['rows'])), 'columnCount': sheet['columnCount']}
+    }
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so client connection pools behave as they do in production
+    service = None
+    state = None
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def read_json(self):
+        return json.loads(self.body) if self.body else {}
+
+    def send_body(self, status, body, content_type, headers=None):
+        payload = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json(self, status, data, headers=None):
+        self.send_body(status, json.dumps(data), 'application/json; charset=UTF-8', headers)
+
+    def send_error_response(self, status, reason, message):
+        headers = {'Retry-After': str(self.state.faults[self.service]['retry_after'])} if status == 429 else None
+        if self.service in ('bing', 'duckduckgo'):
+            self.send_body(status, f"<html><body>{escape(message)}</body></html>", 'text/html; charset=utf-8', headers)
+        else:
+            # Google API error shape, so gspread and the scraper see what the real APIs return
+            self.send_json(status, {'error': {
+                'code': status,
+                'message': message,
+                'status': GOOGLE_ERROR_STATUS.get(status, 'UNKNOWN'),
+                'errors': [{'reason': reason, 'message': message}]
+            }}, headers)
+
+    def handle_request(self, method):
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query, keep_blank_values=True)
+        # Read the body even when the response is an injected fault, or it would be parsed as the next request
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+
+        if parts.path.startswith('/__mock__/'):
+            self.handle_admin(method, parts.path)
+            return
+
+        delay, status, reason = self.state.plan_response(self.service)
+        if delay:
+            time.sleep(delay)
+
+        try:
+            if status == 429 and reason == 'quota':
+                raise ApiError(429, "Quota exceeded for quota metric 'Queries' and limit 'Queries per day'")
+            if status == 429:
+                raise ApiError(429, "Rate limit exceeded. Please retry later.")
+            if status == 500:
+                raise ApiError(500, "Internal error encountered.")
+
+            handler = getattr(self, f"handle_{self.service}")
+            status = handler(method, parts.path, params) or 200
+        except ApiError as e:
+            status = e.status
+            self.send_error_response(e.status, reason or 'badRequest', e.message)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            status = 400
+            self.send_error_response(400, 'badRequest', f"Bad request: {str(e)}")
+
+        self.state.record(self.service, status, delay)
+
+    def handle_admin(self, method, path):
+        if path == '/__mock__/stats':
+            self.send_json(200, self.state.summary())
+        elif path == '/__mock__/faults' and method == 'POST':
+            try:
+                for service, overrides in self.read_json().items():
+                    self.state.update_faults(service, overrides)
+            except (ValueError, KeyError) as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            self.send_json(200, self.state.summary())
+        elif path == '/__mock__/reset' and method == 'POST':
+            self.state.reset()
+            self.send_json(200, {'reset': True})
+        elif path == '/__mock__/spreadsheets':
+            with self.state.lock:
+                self.send_json(200, self.state.spreadsheets)
+        else:
+            self.send_json(404, {'error': f"Unknown admin endpoint {path}"})
+
+    def handle_bing(self, method, path, params):
+        query = params.get('q', [''])[0]
+        count = min(50, int(params.get('count', ['10'])[0]))
+        self.send_body(200, render_bing(query, count), 'text/html; charset=utf-8')
+
+    def handle_duckduckgo(self, method, path, params):
+        self.send_body(200, render_duckduckgo(params.get('q', [''])[0]), 'text/html; charset=utf-8')
+
+    def handle_google_cse(self, method, path, params):
+        for required in ('key', 'cx', 'q'):
+            if not params.get(required, [''])[0]:
+                raise ApiError(400, f"Missing required parameter: {required}")
+        query = params['q'][0]
+        count = int(params.get('num', ['10'])[0])
+        start = int(params.get('start', ['1'])[0])
+        if not 1 <= count <= 10:
+            raise ApiError(400, "Invalid Value: num must be between 1 and 10")
+        if start + count - 1 > 100:
+            raise ApiError(400, "Invalid Value: the API returns at most 100 results")
+
+        total_results = 200 + zlib.crc32(query.encode('utf-8')) % 5000
+        count = max(0, min(count, 100 - start + 1, total_results - start + 1))
+        request_info = {'searchTerms': query, 'count': count, 'startIndex': start, 'totalResults': str(total_results)}
+        queries = {'request': [request_info]}
+        if start + count <= min(100, total_results):
+            queries['nextPage'] = [dict(request_info, startIndex=start + count)]
+
+        self.send_json(200, {
+            'kind': 'customsearch#search',
+            'queries': queries,
+            'searchInformation': {'searchTime': 0.1, 'totalResults': str(total_results)},
+            'items': [
+                {'kind': 'customsearch#result', 'title': result['title'], 'link': result['url'],
+                 'displayLink': urlsplit(result['url']).netloc, 'snippet': result['description']}
+                for result in make_results(query, count, start - 1)
+            ]
+        })
+
+    def handle_translate(self, method, path, params):
+        body = self.read_json()
+        texts = body['q'] if isinstance(body['q'], list) else [body['q']]
+        target = body.get('target', 'es')
+        # Line by line, like the real service: batched requests rely on line breaks surviving
+        translations = [
+            {'translatedText': '\n'.join(f"[{target}] {line}" if line.strip() else line for line in text.split('\n'))}
+            for text in texts
+        ]
+        self.send_json(200, {'data': {'translations': translations}})
+
+    def handle_sheets(self, method, path, params):
+        if path.startswith('/drive/v3/files') and method == 'POST':
+            body = self.read_json()
+            spreadsheet_id = f"mock-{len(self.state.spreadsheets) + 1}"
+            with self.state.lock:
+                self.state.get_spreadsheet(spreadsheet_id)['title'] = body.get('name', spreadsheet_id)
+            self.send_json(200, {'id': spreadsheet_id, 'name': body.get('name', ''), 'mimeType': body.get('mimeType', '')})
+            return
+
+        match = re.match(r'^/v4/spreadsheets/([^/:]+)(.*)$', path)
+        if not match:
+            raise ApiError(404, f"Unknown Sheets endpoint {path}")
+        spreadsheet_id, rest = match.group(1), match.group(2)
+
+        with self.state.lock:
+            spreadsheet = self.state.get_spreadsheet(spreadsheet_id)
+            if rest == '' and method == 'GET':
+                response = {
+                    'spreadsheetId': spreadsheet_id,
+                    'properties': {'title': spreadsheet['title'], 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+                    'sheets': [{'properties': sheet_properties(sheet)} for sheet in spreadsheet['sheets']]
+                }
+            elif rest == ':batchUpdate' and method == 'POST':
+                response = {'spreadsheetId': spreadsheet_id,
+                            'replies': [self.apply_sheet_request(spreadsheet, request) for request in self.read_json()['requests']]}
+            elif rest == '/values:batchGet':
+                response = {'spreadsheetId': spreadsheet_id,
+                            'valueRanges': [self.read_range(spreadsheet, range_name, params) for range_name in params.get('ranges', [])]}
+            elif rest.startswith('/values/') and rest.endswith(':append') and method == 'POST':
+                range_name = unquote(rest[len('/values/'):-len(':append')])
+                sheet = self.find_sheet(spreadsheet, parse_a1_range(range_name)[0])
+                values = self.read_json().get('values', [])
+                sheet['rows'].extend([str(value) for value in row] for row in values)
+                response = {'spreadsheetId': spreadsheet_id, 'updates': {
+                    'updatedRows': len(values), 'updatedCells': sum(len(row) for row in values)
+                }}
+            elif rest.startswith('/values/') and method == 'GET':
+                response = self.read_range(spreadsheet, unquote(rest[len('/values/'):]), params)
+            else:
+                raise ApiError(404, f"Unsupported Sheets call {method} {path}")
+        self.send_json(200, response)
+
+    def find_sheet(self, spreadsheet, title=None, sheet_id=None):
+        for sheet in spreadsheet['sheets']:
+            if (title is not None and sheet['title'] == title) or (sheet_id is not None and sheet['sheetId'] == sheet_id):
+                return sheet
+        if sheet_id is not None:
+            raise ApiError(400, f"Invalid requests[0]: No grid with id: {sheet_id}")
+        raise ApiError(400, f"Unable to parse range: {title}")
+
+    def read_range(self, spreadsheet, range_name, params):
+        title, first_row, first_column, last_row, last_column = parse_a1_range(range_name)
+        sheet = self.find_sheet(spreadsheet, title)
+        rows = sheet['rows'][first_row:None if last_row is None else last_row + 1]
+        values = [row[first_column:None if last_column is None else last_column + 1] for row in rows]
+        while values and not any(values[-1]):
+            values.pop()
+
+        major_dimension = params.get('majorDimension', ['ROWS'])[0]
+        if major_dimension == 'COLUMNS' and values:
+            width = max(len(row) for row in values)
+            values = [[row[column] if column < len(row) else '' for row in values] for column in range(width)]
+
+        value_range = {'range': range_name, 'majorDimension': major_dimension}
+        if values:
+            value_range['values'] = values
+        return value_range
+
+    def apply_sheet_request(self, spreadsheet, request):
+        if 'addSheet' in request:
+            properties = request['addSheet'].get('properties', {})
+            if any(sheet['title'] == properties.get('title') for sheet in spreadsheet['sheets']):
+                raise ApiError(400, f"A sheet with the name \"{properties.get('title')}\" already exists.")
+            return {'addSheet': {'properties': sheet_properties(self.state.add_sheet(spreadsheet, properties))}}
+        if 'appendCells' in request:
+            append = request['appendCells']
+            sheet = self.find_sheet(spreadsheet, sheet_id=append['sheetId'])
+            for row in append.get('rows', []):
+                sheet['rows'].append([
+                    str(next(iter(cell.get('userEnteredValue', {'stringValue': ''}).values())))
+                    for cell in row.get('values', [])
+                ])
+            return {}
+        if 'updateCells' in request:
+            update = request['updateCells']
+            start = update.get('start', {})
+            sheet = self.find_sheet(spreadsheet, sheet_id=start.get('sheetId'))
+            first_row, first_column = start.get('rowIndex', 0), start.get('columnIndex', 0)
+            for row_offset, row in enumerate(update.get('rows', [])):
+                while len(sheet['rows']) <= first_row + row_offset:
+                    sheet['rows'].append([])
+                cells = sheet['rows'][first_row + row_offset]
+                for column_offset, cell in enumerate(row.get('values', [])):
+                    column = first_column + column_offset
+                    if column >= sheet['columnCount']:
+                        raise ApiError(400, f"Invalid requests[0].updateCells: Column {column} is outside the grid")
+                    cells.extend([''] * (column + 1 - len(cells)))
+                    cells[column] = str(next(iter(cell.get('userEnteredValue', {'stringValue': ''}).values())))
+            return {}
+        if 'appendDimension' in request:
+            append = request['appendDimension']
+            sheet = self.find_sheet(spreadsheet, sheet_id=append['sheetId'])
+            sheet['columnCount' if append.get('dimension') == 'COLUMNS' else 'rowCount'] += append.get('length', 0)
+            return {}
+        if 'deleteDimension' in request:
+            dimension_range = request['deleteDimension']['range']
+            sheet = self.find_sheet(spreadsheet, sheet_id=dimension_range['sheetId'])
+            if dimension_range.get('dimension', 'ROWS') == 'ROWS':
+                del sheet['rows'][dimension_range.get('startIndex', 0):dimension_range.get('endIndex')]
+            return {}
+        return {}
+
+class MockServer:
+    """One threaded HTTP server per service, on consecutive ports starting at base_port"""
+
+    def __init__(self, host='127.0.0.1', base_port=8800, faults=None, seed=None, verbose=False):
+        self.host = host
+        self.base_port = base_port or find_free_base_port(host)
+        self.state = MockState(faults, seed)
+        self.servers = []
+        self.threads = []
+        self.verbose = verbose
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def url(self):
+        """Value for MOCK_SERVER_URL"""
+        return f"http://{self.host}:{self.base_port}"
+
+    def start(self):
+        for service, offset in MOCK_SERVICE_PORT_OFFSETS.items():
+            handler = type(f"{service.title()}Handler", (MockRequestHandler,),
+                           {'service': service, 'state': self.state, 'verbose': self.verbose})
+            server = ThreadingHTTPServer((self.host, self.base_port + offset), handler)
+            server.daemon_threads = True
+            thread = threading.Thread(target=server.serve_forever, name=f"mock-{service}", daemon=True)
+            thread.start()
+            self.servers.append(server)
+            self.threads.append(thread)
+        self.logger.info(f"Mock server listening on {self.url} (ports {self.base_port}-{self.base_port + len(self.servers) - 1})")
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+def find_free_base_port(host='127.0.0.1', attempts=50):
+    """Find a base port with enough free consecutive ports for every service"""
+    rng = random.Random()
+    for _ in range(attempts):
+        base_port = rng.randint(20000, 60000)
+        sockets = []
+        try:
+            for offset in MOCK_SERVICE_PORT_OFFSETS.values():
+                probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sockets.append(probe)
+                probe.bind((host, base_port + offset))
+            return base_port
+        except OSError:
+            continue
+        finally:
+            for probe in sockets:
+                probe.close()
+    raise OSError("No free port range found for the mock server")
+
+def parse_fault_option(option):
+    """Parse SERVICE.SETTING=VALUE (service 'all' for every service)"""
+    name, value = option.split('=', 1)
+    service, setting = name.split('.', 1)
+    return service, {setting: None if value.lower() == 'none' else float(value)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the search, Sheets and translation APIs")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800, help="Base port; services use the next ports too")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Fixed delay per response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Mean of an exponential extra delay (tail latency)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests that get a 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of requests that get a 429")
+    parser.add_argument('--cse-quota', type=int, help="Google Custom Search requests before quota errors")
+    parser.add_argument('--fault', action='append', default=[], metavar='SERVICE.SETTING=VALUE',
+                        help="Per-service fault, e.g. bing.error_rate=0.2 (repeatable)")
+    parser.add_argument('--seed', type=int, help="Seed for reproducible fault injection")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    faults = {'all': {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'rate_limit_rate': args.rate_limit_rate
+    }}
+    if args.cse_quota is not None:
+        faults['google_cse'] = {'daily_quota': args.cse_quota}
+    for option in args.fault:
+        service, overrides = parse_fault_option(option)
+        faults.setdefault(service, {}).update(overrides)
+
+    server = MockServer(args.host, args.port, faults, args.seed, args.verbose).start()
+    print(f"Set MOCK_SERVER_URL={server.url} to point the scraper at this server. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        print(json.dumps(server.state.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Near-duplicate detection over result titles and descriptions (MinHash with LSH banding)
+"""
+
+import os
+import re
+import time
+import sqlite3
+import zlib
+import hashlib
+import threading
+import logging
+import numpy as np
+
+from config import (
+    NEAR_DUPLICATE_INDEX_FILE,
+    NEAR_DUPLICATE_THRESHOLD,
+    NEAR_DUPLICATE_BANDS,
+    NEAR_DUPLICATE_ROWS_PER_BAND,
+    NEAR_DUPLICATE_MIN_FEATURES
+)
+from url_canonicalizer import canonical_key
+from metrics import RESULTS_DROPPED
+
+NUM_PERMUTATIONS = NEAR_DUPLICATE_BANDS * NEAR_DUPLICATE_ROWS_PER_BAND
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures are persisted, so the hash functions must be the same in every process.
+# a, b < 2^32 and 32-bit feature hashes keep a * h + b below 2^64
+_permutation_seed = np.random.RandomState(1)
+PERMUTATION_A = _permutation_seed.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _permutation_seed.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+def get_features(text):
+    """Get the distinct words and word pairs of a text"""
+    words = WORD_PATTERN.findall(text.lower())
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+def minhash(text, min_features=NEAR_DUPLICATE_MIN_FEATURES):
+    """Get the MinHash signature of a text, or None when it has too few features to be meaningful"""
+    features = get_features(text)
+    if len(features) < min_features:
+        return None
+
+    # CRC32 is enough as the base hash: the permutations below do the mixing
+    hashes = np.fromiter(
+        (zlib.crc32(feature.encode('utf-8')) for feature in features),
+        dtype=np.uint64,
+        count=len(features)
+    )
+    # One row per hash function, one column per feature; the signature is each row's minimum
+    permuted = (np.outer(PERMUTATION_A, hashes) + PERMUTATION_B[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+def get_result_signature(result):
+    """Get the signature of a result's title and description"""
+    return minhash(f"{result.get('title', '')} {result.get('description', '')}")
+
+def similarity(first, second):
+    """Estimate the Jaccard similarity of two texts from their signatures"""
+    return float(np.count_nonzero(first == second)) / NUM_PERMUTATIONS
+
+def get_band_keys(signature):
+    """Hash each band of the signature; texts sharing any band key are candidate duplicates"""
+    bands = signature.reshape(NEAR_DUPLICATE_BANDS, NEAR_DUPLICATE_ROWS_PER_BAND)
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest(), 'big', signed=True)
+        for band, rows in enumerate(bands)
+    ]
+
+class NearDuplicateIndex:
+    """SQLite index of uploaded result signatures; lookups read only the rows sharing an LSH band"""
+
+    def __init__(self, index_file=NEAR_DUPLICATE_INDEX_FILE, threshold=NEAR_DUPLICATE_THRESHOLD):
+        self.index_file = index_file
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        index_dir = os.path.dirname(index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(index_file, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                url_key TEXT PRIMARY KEY,
+                signature BLOB NOT NULL
+            ) WITHOUT ROWID
+        """)
+        # Clustered by band key, so a lookup is one index range per band
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS bands (
+                band_key INTEGER NOT NULL,
+                url_key TEXT NOT NULL,
+                PRIMARY KEY (band_key, url_key)
+            ) WITHOUT ROWID
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        self.connection.commit()
+
+        placeholders = ', '.join('?' * NEAR_DUPLICATE_BANDS)
+        self.candidate_query = (
+            "SELECT url_key, signature FROM signatures WHERE url_key IN "
+            f"(SELECT url_key FROM bands WHERE band_key IN ({placeholders}))"
+        )
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def find(self, signature, band_keys=None):
+        """Get the URL key of the most similar indexed result at or above the threshold, or None"""
+        band_keys = band_keys or get_band_keys(signature)
+        with self.lock:
+            candidates = self.connection.execute(self.candidate_query, band_keys).fetchall()
+
+        best_key, best_similarity = None, self.threshold
+        for url_key, stored in candidates:
+            candidate_similarity = similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+            if candidate_similarity >= best_similarity:
+                best_key, best_similarity = url_key, candidate_similarity
+        return best_key
+
+    def filter_results(self, results):
+        """Drop results that are near-duplicates of an indexed result or of an earlier result in the list"""
+        return list(self.iter_filter(results))
+
+    def iter_filter(self, results):
+        """Yield the results that are not near-duplicates of an indexed result or of an earlier yielded one"""
+        stream_bands = {}  # band key -> [(signature, url)] for results kept so far
+        dropped = 0
+
+        for result in results:
+            signature = get_result_signature(result)
+            if signature is None:
+                yield result
+                continue
+
+            band_keys = get_band_keys(signature)
+            match = next(
+                (url for band_key in band_keys for candidate, url in stream_bands.get(band_key, [])
+                 if similarity(signature, candidate) >= self.threshold),
+                None
+            ) or self.find(signature, band_keys)
+
+            if match:
+                dropped += 1
+                RESULTS_DROPPED.inc('near_duplicate')
+                self.logger.debug(f"Near-duplicate dropped: {result.get('url', '')} matches {match}")
+                continue
+
+            for band_key in band_keys:
+                stream_bands.setdefault(band_key, []).append((signature, result.get('url', '')))
+            yield result
+
+        if dropped:
+            self.logger.info(f"Dropped {dropped} near-duplicate results")
+
+    def _insert(self, results):
+        signature_rows = []
+        band_rows = []
+        for result in results:
+            url = result.get('url', '')
+            signature = get_result_signature(result)
+            if not url or signature is None:
+                continue
+            url_key = canonical_key(url)
+            signature_rows.append((url_key, signature.tobytes()))
+            band_rows.extend((band_key, url_key) for band_key in get_band_keys(signature))
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO signatures (url_key, signature) VALUES (?, ?)", signature_rows
+        )
+        # Inserting in key order appends to the B-tree instead of splitting pages all over it
+        band_rows.sort()
+        self.connection.executemany("INSERT OR IGNORE INTO bands (band_key, url_key) VALUES (?, ?)", band_rows)
+
+    def add_many(self, results):
+        """Index uploaded results"""
+        with self.lock:
+            self._insert(results)
+            self.connection.commit()
+
+    def replace_all(self, results):
+        """Replace the index contents with the given results and mark it as reconciled"""
+        with self.lock:
+            self.connection.execute("DELETE FROM signatures")
+            self.connection.execute("DELETE FROM bands")
+            self._insert(results)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES ('last_reconciled_at', ?)",
+                (str(time.time()),)
+            )
+            self.connection.commit()
+
+    def clear(self):
+        """Remove every result from the index"""
+        self.replace_all([])
+
+    def last_reconciled_at(self):
+        """Get the timestamp of the last reconciliation with the sheet, or None if it never happened"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM metadata WHERE name = 'last_reconciled_at'"
+            ).fetchone()
+        return float(row[0]) if row else None
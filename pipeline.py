@@ -0,0 +1,236 @@
+"""
+Streaming scrape pipeline: search (scheduled across engines) -> dedupe -> enrich (optional) -> upload (English,
+then Spanish on a translation thread), joined by bounded queues so rows reach the sheet while searches are still running
+"""
+
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from config import ASYNC_MODE, MAX_CONCURRENT_REQUESTS, PIPELINE_QUEUE_SIZE, PIPELINE_BATCH_SIZE, UPLOAD_FLUSH_SECONDS
+from search_engines import EngineScheduler
+from metrics import ENRICHMENT_PAGES
+
+_END = object()  # Closes a stage queue
+IDLE = object()  # Yielded by iter_queue when nothing arrived for idle_seconds
+ENRICH_POLL_SECONDS = 0.1  # How often the enrich stage passes on finished pages while no results arrive
+
+def iter_queue(inbound, idle_seconds=None):
+    """Yield items from a stage queue until it is closed, and IDLE whenever it stays empty for idle_seconds"""
+    while True:
+        try:
+            item = inbound.get(timeout=idle_seconds)
+        except queue.Empty:
+            yield IDLE
+            continue
+        if item is _END:
+            # Leave the marker in place so a later drain (or another reader) stops too
+            inbound.put(_END)
+            return
+        yield item
+
+class ScrapePipeline:
+    """Runs one scrape as concurrent stages; memory is bounded by the queue sizes, not by the keyword list"""
+
+    def __init__(self, scraper, existing_urls, near_duplicate_index=None, search_workers=None,
+                 queue_size=PIPELINE_QUEUE_SIZE, batch_size=PIPELINE_BATCH_SIZE, flush_seconds=UPLOAD_FLUSH_SECONDS,
+                 enricher=None):
+        self.scraper = scraper
+        self.sheets_manager = scraper.sheets_manager
+        self.existing_urls = existing_urls
+        self.near_duplicate_index = near_duplicate_index
+        self.enricher = enricher  # PageEnricher, closed when the run ends; None skips the enrich stage
+        if search_workers is None and not ASYNC_MODE:
+            # Engines search side by side, each one keyword at a time
+            self.max_searches, self.max_searches_per_engine = None, 1
+        else:
+            self.max_searches, self.max_searches_per_engine = search_workers or MAX_CONCURRENT_REQUESTS, None
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.logger = logging.getLogger(__name__)
+
+        self.uploaded = 0
+        self.failed = 0  # Results the English tab rejected
+        self.spanish_failed = 0  # Results uploaded in English only
+        self.errors = []
+        self.first_upload_seconds = None
+        self.started_at = None
+
+    @property
+    def ok(self):
+        """Whether every stage finished and every batch was uploaded"""
+        return not self.errors and not self.failed and not self.spanish_failed
+
+    def _run_search(self, engine, keyword, max_results):
+        results = self.scraper._run_search(engine.label, engine.search, keyword, max_results)
+        self.logger.info(f"{engine.label} search completed for '{keyword}'")
+        return results
+
+    def _record_search_failure(self, engine, keyword, error):
+        self.errors.append(f"{engine.label} '{keyword}': {str(error)}")
+
+    def _emit_results(self, outbound, results):
+        for result in results:
+            outbound.put(result)
+
+    def _emit_checkpoints(self, keywords, outbound):
+        """Pass on the results of searches an interrupted run already finished; returns their (engine, keyword) pairs"""
+        journal = self.scraper.active_journal
+        restored = set()
+        if journal is None:
+            return restored
+        for engine in self.scraper.engines:
+            for keyword in keywords:
+                checkpointed = journal.get(keyword, engine.label)
+                if checkpointed is not None:
+                    restored.add((engine.name, keyword))
+                    self._emit_results(outbound, checkpointed)
+        if restored:
+            self.logger.info(f"Restored {len(restored)} searches from checkpoints")
+        return restored
+
+    def _dedupe(self, results):
+        """Drop results already seen this run, already in the sheet, or near-duplicates of either"""
+        unique_results = self.scraper.iter_unique_results(results, self.existing_urls)
+        if self.near_duplicate_index is not None:
+            unique_results = self.near_duplicate_index.iter_filter(unique_results)
+        return unique_results
+
+    def _collect_enriched(self, tasks, timeout=0):
+        """Take finished tasks (and ones past their deadline, unenriched) out of tasks; yields their results"""
+        if timeout:
+            wait([task.future for task in tasks], timeout=timeout, return_when=FIRST_COMPLETED)
+        now = time.monotonic()
+        for task in list(tasks):
+            if task.future.done():
+                tasks.remove(task)
+                try:
+                    yield task.future.result()
+                except Exception as e:
+                    self.logger.warning(f"Enrichment failed for {task.result.get('url', '')}: {str(e)}")
+                    yield task.result
+            elif self.enricher.is_overdue(task, now):
+                tasks.remove(task)
+                yield task.result
+
+    def _enrich(self, results):
+        """Pass results on as their pages are read. Never makes dedupe wait: a result arriving while the backlog
+        is full goes on without the extra fields, as does one whose page runs past its deadline"""
+        tasks = []
+        try:
+            for result in results:
+                yield from self._collect_enriched(tasks)
+                if result is IDLE:
+                    continue
+                if len(tasks) < self.enricher.backlog:
+                    tasks.append(self.enricher.submit(result))
+                else:
+                    ENRICHMENT_PAGES.inc('skipped')
+                    yield result
+            while tasks:
+                yield from self._collect_enriched(tasks, timeout=ENRICH_POLL_SECONDS)
+        finally:
+            self.enricher.close()
+
+    def _record_spanish_failure(self, batch):
+        journal = self.scraper.active_journal
+        if journal is not None:
+            journal.record_spanish_pending(batch)
+
+    def _retry_spanish_pending(self):
+        """Write the Spanish rows an interrupted run left out; their English rows are already in the sheet"""
+        journal = self.scraper.active_journal
+        pending = journal.get_spanish_pending() if journal is not None else []
+        if not pending:
+            return
+        self.logger.info(f"Retrying {len(pending)} results missing from the Spanish worksheet")
+        if self.sheets_manager.upload_spanish_batch(pending):
+            journal.clear_spanish_pending(pending)
+        else:
+            self.spanish_failed += len(pending)
+
+    def _upload(self, results):
+        """Hand results to the batch uploader, flushing partial batches that have waited too long"""
+        uploader = self.sheets_manager.start_batch_upload(self.batch_size, self.flush_seconds,
+                                                          on_spanish_failed=self._record_spanish_failure)
+        try:
+            for result in results:
+                if result is IDLE:
+                    uploader.flush_if_due()
+                else:
+                    uploader.add(result)
+        finally:
+            uploader.close()
+            self.uploaded = uploader.uploaded
+            self.failed = uploader.failed
+            self.spanish_failed += uploader.spanish_failed
+            if uploader.first_upload_at is not None:
+                self.first_upload_seconds = uploader.first_upload_at - self.started_at
+
+    def _run_stage(self, name, stage, inbound, outbound=None, idle_seconds=None):
+        """Feed a queue through a stage; a stage with an outbound queue is a generator whose items go downstream.
+        Always closes the outbound queue"""
+        try:
+            items = stage(iter_queue(inbound, idle_seconds))
+            if outbound is not None:
+                for item in items:
+                    outbound.put(item)
+        except Exception as e:
+            self.errors.append(f"{name}: {str(e)}")
+            self.logger.error(f"Pipeline {name} stage failed: {str(e)}")
+            # Keep consuming so upstream stages never block on a full queue
+            for _ in iter_queue(inbound):
+                pass
+        finally:
+            if outbound is not None:
+                outbound.put(_END)
+
+    def run(self, keywords, max_results_per_engine):
+        """Run every (keyword, engine) search through the pipeline; returns the number of results uploaded"""
+        self.started_at = time.monotonic()
+        # Before the upload stage starts, so the Spanish tab still has one writer at a time
+        self._retry_spanish_pending()
+
+        results = queue.Queue(maxsize=self.queue_size)
+        unique_results = queue.Queue(maxsize=self.queue_size)
+        upload_results = unique_results
+
+        stages = [
+            threading.Thread(target=self._run_stage, args=('dedupe', self._dedupe, results, unique_results),
+                             name='pipeline-dedupe', daemon=True)
+        ]
+        if self.enricher is not None:
+            upload_results = queue.Queue(maxsize=self.queue_size)
+            stages.append(threading.Thread(target=self._run_stage,
+                                           args=('enrich', self._enrich, unique_results, upload_results,
+                                                 ENRICH_POLL_SECONDS),
+                                           name='pipeline-enrich', daemon=True))
+        stages.append(threading.Thread(target=self._run_stage, args=('upload', self._upload, upload_results, None,
+                                                                     max(0.05, min(1.0, self.flush_seconds))),
+                                       name='pipeline-upload', daemon=True))
+        for thread in stages:
+            thread.start()
+
+        try:
+            restored = self._emit_checkpoints(keywords, results)
+            scheduler = EngineScheduler(self.scraper.engines, self.max_searches, self.max_searches_per_engine)
+            scheduler.run(keywords, max_results_per_engine, self._run_search,
+                          lambda engine_results: self._emit_results(results, engine_results),
+                          skip=lambda engine, keyword: (engine.name, keyword) in restored,
+                          handle_failure=self._record_search_failure)
+        except Exception as e:
+            self.errors.append(f"search: {str(e)}")
+            self.logger.error(f"Pipeline search stage failed: {str(e)}")
+        finally:
+            results.put(_END)
+            for thread in stages:
+                thread.join()
+
+        elapsed = time.monotonic() - self.started_at
+        first_upload = f", first rows after {self.first_upload_seconds:.1f}s" if self.first_upload_seconds is not None else ""
+        self.logger.info(f"Pipeline uploaded {self.uploaded} results in {elapsed:.1f}s{first_upload}"
+                         + (f" ({self.failed} failed to upload)" if self.failed else ""))
+        return self.uploaded
@@ -0,0 +1,186 @@
+"""
+Persistent ledger of billed Google Custom Search queries, with daily budgeting by keyword yield
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import GOOGLE_QUOTA_LEDGER_FILE, GOOGLE_DAILY_QUOTA, GOOGLE_QUOTA_TIMEZONE, GOOGLE_YIELD_WINDOW_DAYS
+
+try:
+    QUOTA_TIMEZONE = ZoneInfo(GOOGLE_QUOTA_TIMEZONE)
+except ZoneInfoNotFoundError:
+    # No tz database (e.g. Windows without the tzdata package): Pacific Standard Time is close enough
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+# Outcomes that don't count against the quota: served from the HTTP cache, or refused for quota
+UNBILLED_STATUSES = ('cached', '429', 'quota_exceeded')
+
+def get_quota_day(timestamp=None):
+    """The quota day a timestamp falls on; Google resets the daily quota at midnight Pacific Time"""
+    moment = datetime.fromtimestamp(time.time() if timestamp is None else timestamp, QUOTA_TIMEZONE)
+    return moment.strftime('%Y-%m-%d')
+
+def get_next_reset(timestamp=None):
+    """When the current quota day ends"""
+    moment = datetime.fromtimestamp(time.time() if timestamp is None else timestamp, QUOTA_TIMEZONE)
+    return datetime.combine(moment.date() + timedelta(days=1), datetime.min.time(), QUOTA_TIMEZONE)
+
+def is_quota_error(response):
+    """Whether an error response means the daily quota is spent (Google answers 429, or 403 on older keys)"""
+    if response is None or response.status_code not in (403, 429):
+        return False
+    try:
+        error = response.json().get('error', {})
+    except ValueError:
+        return response.status_code == 429
+    reasons = [detail.get('reason', '') for detail in error.get('errors', [])]
+    text = ' '.join([error.get('status', ''), error.get('message', '')] + reasons).lower()
+    return response.status_code == 429 or 'quota' in text or 'limitexceeded' in text
+
+class QuotaLedger:
+    """SQLite ledger of every Custom Search call; shared by all processes on this host"""
+
+    def __init__(self, ledger_file=GOOGLE_QUOTA_LEDGER_FILE, daily_quota=GOOGLE_DAILY_QUOTA):
+        self.ledger_file = ledger_file
+        self.daily_quota = daily_quota
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        ledger_dir = os.path.dirname(ledger_file)
+        if ledger_dir:
+            os.makedirs(ledger_dir, exist_ok=True)
+
+        # Autocommit mode so BEGIN IMMEDIATE can make check-and-reserve atomic across processes
+        self.connection = sqlite3.connect(ledger_file, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS calls (
+                call_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                called_at REAL NOT NULL,
+                quota_day TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                results INTEGER,
+                new_results INTEGER
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS calls_by_day ON calls (quota_day, status)")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS exhausted_days (
+                quota_day TEXT PRIMARY KEY,
+                marked_at REAL NOT NULL
+            )
+        """)
+
+    def _count_billed(self, quota_day):
+        placeholders = ', '.join('?' * len(UNBILLED_STATUSES))
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM calls WHERE quota_day = ? AND status NOT IN ({placeholders})",
+            (quota_day,) + UNBILLED_STATUSES
+        ).fetchone()[0]
+
+    def _is_exhausted(self, quota_day):
+        return self.connection.execute(
+            "SELECT 1 FROM exhausted_days WHERE quota_day = ?", (quota_day,)
+        ).fetchone() is not None
+
+    def get_usage(self, quota_day=None):
+        """Get (billed calls, remaining calls) for a quota day (today by default)"""
+        quota_day = quota_day or get_quota_day()
+        with self.lock:
+            used = self._count_billed(quota_day)
+            exhausted = self._is_exhausted(quota_day)
+        return used, 0 if exhausted else max(0, self.daily_quota - used)
+
+    def remaining(self):
+        """Calls left in today's budget"""
+        return self.get_usage()[1]
+
+    def reserve(self, keyword, start):
+        """Claim one call from today's budget; returns a call ID, or None when the budget is spent"""
+        now = time.time()
+        quota_day = get_quota_day(now)
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self._is_exhausted(quota_day) or self._count_billed(quota_day) >= self.daily_quota:
+                    self.connection.execute("ROLLBACK")
+                    return None
+                call_id = self.connection.execute(
+                    "INSERT INTO calls (called_at, quota_day, keyword, start, status) VALUES (?, ?, ?, ?, 'pending')",
+                    (now, quota_day, keyword, start)
+                ).lastrowid
+                self.connection.execute("COMMIT")
+                return call_id
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def complete(self, call_id, status, results=None, new_results=None):
+        """Record the outcome of a reserved call ('ok', 'cached', an HTTP status or 'error')"""
+        with self.lock:
+            self.connection.execute(
+                "UPDATE calls SET status = ?, results = ?, new_results = ? WHERE call_id = ?",
+                (status, results, new_results, call_id)
+            )
+
+    def mark_exhausted(self):
+        """Google says today's quota is spent, whatever the ledger counted (other keys, other hosts)"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO exhausted_days (quota_day, marked_at) VALUES (?, ?)",
+                (get_quota_day(), time.time())
+            )
+        self.logger.warning(f"Google Custom Search quota exhausted until {get_next_reset():%Y-%m-%d %H:%M %Z}")
+
+    def get_keyword_yields(self, days=GOOGLE_YIELD_WINDOW_DAYS):
+        """Get {keyword: (billed calls, new results per call)} over the last days"""
+        since = time.time() - days * 86400
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT keyword, COUNT(*), SUM(new_results) FROM calls "
+                "WHERE called_at >= ? AND status = 'ok' AND new_results IS NOT NULL GROUP BY keyword",
+                (since,)
+            ).fetchall()
+        return {keyword: (calls, (new_results or 0) / calls) for keyword, calls, new_results in rows}
+
+    def get_daily_usage(self, days=7):
+        """Get [(quota day, billed calls)] for the last days, most recent first"""
+        placeholders = ', '.join('?' * len(UNBILLED_STATUSES))
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT quota_day, COUNT(*) FROM calls WHERE status NOT IN ({placeholders}) "
+                "GROUP BY quota_day ORDER BY quota_day DESC LIMIT ?",
+                UNBILLED_STATUSES + (days,)
+            ).fetchall()
+
+    def plan(self, keywords, pages_per_keyword):
+        """Split today's remaining budget into {keyword: pages}, highest-yield keywords first; 0 pages means skip"""
+        remaining = self.remaining()
+        yields = self.get_keyword_yields()
+        # Keywords with no history go first so their yield gets measured
+        ranked = sorted(
+            dict.fromkeys(keywords),
+            key=lambda keyword: (keyword in yields, -yields.get(keyword, (0, 0))[1])
+        )
+
+        # Keywords that have been finding new URLs get their first page, then their deeper pages, in rank
+        # order; keywords that found nothing new lately only get what is left, one page each
+        productive = [keyword for keyword in ranked if keyword not in yields or yields[keyword][1] > 0]
+        exhausted = [keyword for keyword in ranked if keyword in yields and yields[keyword][1] == 0]
+        allocation_order = [keyword for _ in range(pages_per_keyword) for keyword in productive] + exhausted
+        plan = {keyword: 0 for keyword in ranked}
+        for keyword in allocation_order[:remaining]:
+            plan[keyword] += 1
+
+        skipped = [keyword for keyword, pages in plan.items() if pages == 0]
+        if skipped:
+            self.logger.info(f"Google budget covers {len(plan) - len(skipped)} of {len(plan)} keywords today; "
+                             f"skipping {len(skipped)} lowest-yield keywords")
+        return plan
@@ -0,0 +1,89 @@
+"""
+Per-host token-bucket rate limiter for outgoing requests
+"""
+
+import threading
+import time
+import logging
+from urllib.parse import urlparse
+
+from config import RATE_LIMITS, DEFAULT_RATE_LIMIT, RATE_LIMIT_HOST_ALIASES
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)  # Tokens added per second
+        self.burst = max(1.0, float(burst))  # Bucket capacity
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            # Tokens may go negative: each waiting caller reserves the next free slot,
+            # so waiters are spaced out without holding the lock while they sleep
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available and return the time spent waiting"""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+class HostRateLimiter:
+    def __init__(self, limits=None, default_limit=None, host_aliases=None):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.default_limit = DEFAULT_RATE_LIMIT if default_limit is None else default_limit
+        self.host_aliases = RATE_LIMIT_HOST_ALIASES if host_aliases is None else host_aliases
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _get_limit_key(self, host):
+        """Find the most specific configured host suffix for a host"""
+        host = host.lower()
+        host = self.host_aliases.get(host, host).split(':')[0]
+        matches = [key for key in self.limits if host == key or host.endswith('.' + key)]
+        if matches:
+            return max(matches, key=len)
+        return host
+
+    def _get_bucket(self, url_or_host):
+        """Get (or lazily create) the bucket that governs a URL or host"""
+        host = urlparse(url_or_host).netloc if '://' in url_or_host else url_or_host
+        key = self._get_limit_key(host)
+
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                limit = self.limits.get(key, self.default_limit)
+                bucket = TokenBucket(limit['rate'], limit['burst'])
+                self.buckets[key] = bucket
+            return key, bucket
+
+    def acquire(self, url_or_host):
+        """Wait for the host's budget; requests to other hosts are never delayed"""
+        key, bucket = self._get_bucket(url_or_host)
+        wait_time = bucket.acquire()
+        if wait_time > 0:
+            self.logger.debug(f"Rate limiter waited {wait_time:.2f}s for {key}")
+        return wait_time
+
+_shared_rate_limiter = None
+_shared_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter shared by the scraper, Sheets and translation clients"""
+    global _shared_rate_limiter
+    with _shared_rate_limiter_lock:
+        if _shared_rate_limiter is None:
+            _shared_rate_limiter = HostRateLimiter()
+        return _shared_rate_limiter
@@ -0,0 +1,148 @@
+"""
+Checkpoint journal that lets an interrupted scraper run resume where it stopped
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+from config import RUN_JOURNAL_FILE, RUN_RESUME_WINDOW_HOURS
+
+class RunJournal:
+    """SQLite journal of the (keyword, engine) searches completed by the current run"""
+
+    def __init__(self, journal_file=RUN_JOURNAL_FILE, resume_window_hours=RUN_RESUME_WINDOW_HOURS):
+        self.journal_file = journal_file
+        self.resume_window = resume_window_hours * 3600
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.run_id = None
+        self.completed = {}
+
+        journal_dir = os.path.dirname(journal_file)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(journal_file, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS searches (
+                run_id INTEGER NOT NULL,
+                keyword TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                results TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, keyword, engine)
+            )
+        """)
+        # Results on the English tab whose Spanish rows failed to upload; --resume writes them
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS spanish_pending (
+                run_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                result TEXT NOT NULL,
+                failed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, url)
+            )
+        """)
+        self.connection.commit()
+
+    def start(self, resume=False):
+        """Start a new run, or with resume pick up the latest unfinished run inside the window"""
+        now = time.time()
+        with self.lock:
+            # Old runs are never resumed, so their checkpoints are only dead weight
+            expired = [row[0] for row in self.connection.execute(
+                "SELECT run_id FROM runs WHERE started_at < ?", (now - self.resume_window,)
+            )]
+            self.connection.executemany("DELETE FROM searches WHERE run_id = ?", [(run_id,) for run_id in expired])
+            self.connection.executemany("DELETE FROM spanish_pending WHERE run_id = ?", [(run_id,) for run_id in expired])
+            self.connection.executemany("DELETE FROM runs WHERE run_id = ?", [(run_id,) for run_id in expired])
+
+            row = None
+            if resume:
+                row = self.connection.execute(
+                    "SELECT run_id FROM runs WHERE finished_at IS NULL ORDER BY started_at DESC LIMIT 1"
+                ).fetchone()
+
+            if row:
+                self.run_id = row[0]
+                self.completed = {
+                    (keyword, engine): json.loads(results)
+                    for keyword, engine, results in self.connection.execute(
+                        "SELECT keyword, engine, results FROM searches WHERE run_id = ?", (self.run_id,)
+                    )
+                }
+            else:
+                self.run_id = self.connection.execute(
+                    "INSERT INTO runs (started_at) VALUES (?)", (now,)
+                ).lastrowid
+                self.completed = {}
+            self.connection.commit()
+
+        if row:
+            self.logger.info(f"Resuming run {self.run_id}: {len(self.completed)} searches already completed")
+        elif resume:
+            self.logger.info("No unfinished run to resume; starting a new run")
+        return self.run_id
+
+    def get(self, keyword, engine):
+        """Get the checkpointed results of a search in the current run, or None"""
+        return self.completed.get((keyword, engine))
+
+    def record(self, keyword, engine, results):
+        """Checkpoint the results of a completed search"""
+        with self.lock:
+            self.completed[(keyword, engine)] = results
+            self.connection.execute(
+                "INSERT OR REPLACE INTO searches (run_id, keyword, engine, results, completed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, keyword, engine, json.dumps(results), time.time())
+            )
+            self.connection.commit()
+
+    def record_spanish_pending(self, results):
+        """Remember results whose Spanish rows failed to upload after their English rows went in"""
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO spanish_pending (run_id, url, result, failed_at) VALUES (?, ?, ?, ?)",
+                [(self.run_id, result.get('url', ''), json.dumps(result), now) for result in results]
+            )
+            self.connection.commit()
+
+    def get_spanish_pending(self):
+        """Get the current run's results still missing from the Spanish tab, oldest first"""
+        with self.lock:
+            return [
+                json.loads(result) for (result,) in self.connection.execute(
+                    "SELECT result FROM spanish_pending WHERE run_id = ? ORDER BY failed_at", (self.run_id,)
+                )
+            ]
+
+    def clear_spanish_pending(self, results):
+        """Forget pending Spanish rows once they are uploaded"""
+        with self.lock:
+            self.connection.executemany(
+                "DELETE FROM spanish_pending WHERE run_id = ? AND url = ?",
+                [(self.run_id, result.get('url', '')) for result in results]
+            )
+            self.connection.commit()
+
+    def finish(self):
+        """Mark the current run as finished so it is never resumed, and drop its checkpoints"""
+        with self.lock:
+            self.connection.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+            self.connection.execute("DELETE FROM searches WHERE run_id = ?", (self.run_id,))
+            self.connection.execute("DELETE FROM spanish_pending WHERE run_id = ?", (self.run_id,))
+            self.connection.commit()
+            self.completed = {}
@@ -0,0 +1,153 @@
+"""
+Cross-process single-flight coordination for scraper runs
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import logging
+
+from config import RUN_LOCK_FILE, RUN_LEASE_SECONDS, RUN_SKIP_IF_FINISHED_WITHIN_MINUTES
+
+class RunLease:
+    """SQLite-backed lease: one holder at a time, renewed while held, skipped if a run finished recently"""
+
+    def __init__(self, name='scraper', lock_file=RUN_LOCK_FILE, lease_seconds=RUN_LEASE_SECONDS,
+                 skip_within_minutes=RUN_SKIP_IF_FINISHED_WITHIN_MINUTES):
+        self.name = name
+        self.lock_file = lock_file
+        self.lease_seconds = lease_seconds
+        self.skip_within_minutes = skip_within_minutes
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.logger = logging.getLogger(__name__)
+        self.stop_renewing = threading.Event()
+        self.renew_thread = None
+
+        lock_dir = os.path.dirname(lock_file)
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+        connection = self._connect()
+        try:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT,
+                    trigger TEXT,
+                    expires_at REAL NOT NULL DEFAULT 0,
+                    last_finished_at REAL
+                )
+            """)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _connect(self):
+        # Autocommit mode so BEGIN IMMEDIATE takes the database write lock explicitly
+        return sqlite3.connect(self.lock_file, timeout=30, isolation_level=None)
+
+    def acquire(self, trigger, force=False):
+        """Try to take the lease; returns (acquired, reason). force ignores the recent-run policy, not a live holder"""
+        now = time.time()
+        connection = self._connect()
+        try:
+            # Serializes competing processes: only one can be between BEGIN IMMEDIATE and COMMIT
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT owner, trigger, expires_at, last_finished_at FROM leases WHERE name = ?",
+                (self.name,)
+            ).fetchone()
+            owner, holder_trigger, expires_at, last_finished_at = row if row else (None, None, 0, None)
+
+            if owner and expires_at > now:
+                connection.execute("ROLLBACK")
+                return False, f"a {holder_trigger} run is already in progress ({owner})"
+
+            if owner:
+                self.logger.warning(f"Taking over expired lease from {owner} ({holder_trigger} run)")
+
+            skip_window = self.skip_within_minutes * 60
+            if not force and last_finished_at and now - last_finished_at < skip_window:
+                connection.execute("ROLLBACK")
+                minutes_ago = (now - last_finished_at) / 60
+                return False, f"the last run finished {minutes_ago:.0f} minutes ago"
+
+            connection.execute(
+                "INSERT INTO leases (name, owner, trigger, expires_at, last_finished_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, trigger = excluded.trigger, "
+                "expires_at = excluded.expires_at",
+                (self.name, self.owner, trigger, now + self.lease_seconds, last_finished_at)
+            )
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+        self.stop_renewing.clear()
+        self.renew_thread = threading.Thread(target=self._keep_renewing, name='run-lease-renewer', daemon=True)
+        self.renew_thread.start()
+        return True, None
+
+    def _keep_renewing(self):
+        """Extend the lease periodically so a long run never looks abandoned"""
+        while not self.stop_renewing.wait(self.lease_seconds / 3):
+            if not self.renew():
+                self.logger.error("Lost the run lease; another process may start a concurrent run")
+                return
+
+    def renew(self):
+        """Extend the lease if this process still holds it"""
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                (time.time() + self.lease_seconds, self.name, self.owner)
+            )
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            self.logger.error(f"Error renewing run lease: {str(e)}")
+            return False
+        finally:
+            connection.close()
+
+    def release(self, completed=True):
+        """Give the lease up; a completed run starts the skip window, a failed one lets the next trigger retry"""
+        self.stop_renewing.set()
+        if self.renew_thread:
+            self.renew_thread.join()
+            self.renew_thread = None
+
+        connection = self._connect()
+        try:
+            if completed:
+                connection.execute(
+                    "UPDATE leases SET owner = NULL, expires_at = 0, last_finished_at = ? WHERE name = ? AND owner = ?",
+                    (time.time(), self.name, self.owner)
+                )
+            else:
+                connection.execute(
+                    "UPDATE leases SET owner = NULL, expires_at = 0 WHERE name = ? AND owner = ?",
+                    (self.name, self.owner)
+                )
+        finally:
+            connection.close()
+
+def run_single_flight(trigger, run, force=False, lease=None):
+    """Call run() under the run lease (the shared one unless another is given); returns its result, or None when
+    the run was skipped"""
+    logger = logging.getLogger(__name__)
+    lease = lease or RunLease()
+    acquired, reason = lease.acquire(trigger, force=force)
+    if not acquired:
+        logger.info(f"Skipping {trigger} scraper run: {reason}")
+        return None
+
+    completed = False
+    try:
+        result = run()
+        completed = True
+        return result
+    finally:
+        lease.release(completed=completed)
@@ -4,10 +4,15 @@ Scheduler for running the web scraper periodically
 
 import schedule
 import time
+import queue
+import argparse
+import threading
 import logging
 from datetime import datetime
-from config import SCHEDULE_TIME, SCHEDULE_INTERVAL_HOURS
+from config import SCHEDULE_TIME, SCHEDULE_INTERVAL_HOURS, METRICS_HOST, METRICS_PORT, METRICS_FILE
 from scraper import WebScraper
+from run_lock import run_single_flight
+from metrics import REGISTRY, RUNS, RUN_SECONDS, start_metrics_server
 
 def setup_logging():
     """Setup logging for the scheduler"""
@@ -21,27 +26,90 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
-def run_scraper_job():
-    """Job function to run the scraper"""
-    logger = logging.getLogger(__name__)
-    logger.info("Starting scheduled scraper job...")
+def run_scraper(scraper):
+    """Run the scraper, raising if the run failed so the lease doesn't start the skip window"""
+    results_count = scraper.run_scraper()
+    if not scraper.last_run_ok:
+        raise RuntimeError("scraper run did not complete")
+    return results_count
+
+class ScraperWorker:
+    """Runs scraper jobs on a dedicated thread, reusing one WebScraper (and its sessions and caches) across runs"""
     
-    try:
-        scraper = WebScraper()
-        results_count = scraper.run_scraper()
-        logger.info(f"Scheduled scraping completed. Found {results_count} new results.")
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.scraper = None
+        self.thread = threading.Thread(target=self._run, name='scraper-worker', daemon=True)
+        self.logger = logging.getLogger(__name__)
+        self.run_durations = []
+        self.queue_delays = []
+    
+    def start(self):
+        """Start the worker thread"""
+        self.thread.start()
+    
+    def stop(self):
+        """Let queued jobs finish, then stop the worker thread"""
+        self.jobs.put(None)
+        self.thread.join()
+    
+    def submit(self, trigger):
+        """Queue a scraper run; returns immediately so the scheduling loop is never blocked"""
+        self.jobs.put((trigger, time.monotonic()))
+        self.logger.info(f"Queued scraper run ({trigger}), {self.jobs.qsize()} job(s) waiting")
+    
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            
+            trigger, queued_at = job
+            queue_delay = time.monotonic() - queued_at
+            self._run_job(trigger, queue_delay)
+    
+    def _run_job(self, trigger, queue_delay):
+        """Run one scraper job and record its timings"""
+        self.logger.info(f"Starting {trigger} scraper job (waited {queue_delay:.1f}s in queue)...")
+        started_at = time.monotonic()
+        outcome = 'failed'
         
-    except Exception as e:
-        logger.error(f"Error in scheduled scraper job: {str(e)}")
+        try:
+            # Built once and kept warm: connection pools, Sheets handles, caches
+            if self.scraper is None:
+                self.scraper = WebScraper()
+            results_count = run_single_flight(trigger, lambda: run_scraper(self.scraper))
+            if results_count is not None:
+                outcome = 'ok'
+                self.logger.info(f"Scheduled scraping completed. Found {results_count} new results.")
+            else:
+                outcome = 'skipped'
+            
+        except Exception as e:
+            self.logger.error(f"Error in scheduled scraper job: {str(e)}")
+        
+        duration = time.monotonic() - started_at
+        RUNS.inc(trigger, outcome)
+        if outcome != 'skipped':
+            RUN_SECONDS.observe(duration, trigger)
+        self.run_durations.append(duration)
+        self.queue_delays.append(queue_delay)
+        self.logger.info(
+            f"Run {len(self.run_durations)} ({trigger}) took {duration:.1f}s after {queue_delay:.1f}s in queue; "
+            f"average {sum(self.run_durations) / len(self.run_durations):.1f}s, "
+            f"slowest {max(self.run_durations):.1f}s, longest queue delay {max(self.queue_delays):.1f}s"
+        )
 
-def run_manual_scraper():
-    """Run scraper manually"""
+def run_manual_scraper(force=False):
+    """Run scraper manually; force runs even if a run finished recently (never alongside a live one)"""
     logger = logging.getLogger(__name__)
     logger.info("Starting manual scraper run...")
     
     try:
-        scraper = WebScraper()
-        results_count = scraper.run_scraper()
+        results_count = run_single_flight('manual', lambda: run_scraper(WebScraper()), force=force)
+        if results_count is None:
+            print("Skipped: another run is in progress or one finished recently (see log).")
+            return
         print(f"Manual scraping completed. Found {results_count} new results.")
         logger.info(f"Manual scraping completed. Found {results_count} new results.")
         
@@ -49,16 +117,26 @@ def run_manual_scraper():
         error_msg = f"Error in manual scraper run: {str(e)}"
         print(error_msg)
         logger.error(error_msg)
+    
+    REGISTRY.write(METRICS_FILE)
+    logger.info(f"Metrics written to {METRICS_FILE}")
 
 def start_scheduler():
     """Start the scheduler"""
     logger = setup_logging()
     
+    worker = ScraperWorker()
+    worker.start()
+    
+    # Totals accumulate for the life of the daemon, as Prometheus counters expect
+    if METRICS_PORT:
+        start_metrics_server(METRICS_HOST, METRICS_PORT)
+    
     # Schedule daily run at specified time
-    schedule.every().day.at(SCHEDULE_TIME).do(run_scraper_job)
+    schedule.every().day.at(SCHEDULE_TIME).do(worker.submit, 'daily')
     
     # Also schedule every N hours as backup
-    schedule.every(SCHEDULE_INTERVAL_HOURS).hours.do(run_scraper_job)
+    schedule.every(SCHEDULE_INTERVAL_HOURS).hours.do(worker.submit, 'interval')
     
     logger.info(f"Scheduler started. Will run daily at {SCHEDULE_TIME} and every {SCHEDULE_INTERVAL_HOURS} hours.")
     logger.info("Press Ctrl+C to stop the scheduler.")
@@ -70,10 +148,20 @@ def start_scheduler():
             
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user.")
+        schedule.clear()
         print("Scheduler stopped.")
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="AI Summer Camp Web Scraper Scheduler")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Start the scheduler directly without the interactive menu")
+    args = parser.parse_args()
+    
+    if args.daemon:
+        start_scheduler()
+        return
+    
     print("AI Summer Camp Web Scraper Scheduler")
     print("=" * 40)
     print("1. Start scheduler (runs automatically)")
@@ -3,7 +3,8 @@ Main web scraper for AI Summer Camp applications
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import argparse
 import time
 import logging
 from datetime import datetime
@@ -11,46 +12,89 @@ from urllib.parse import urljoin, urlparse
 import re
 
 from config import (
-    SEARCH_ENGINES, 
     SEARCH_KEYWORDS, 
-    MAX_RESULTS_PER_KEYWORD, 
-    DELAY_BETWEEN_REQUESTS,
     MAX_RETRIES,
-    CATEGORIES,
-    CATEGORY_KEYWORDS
+    MAX_CONCURRENT_REQUESTS,
+    BLOCKED_STATUS_CODES,
+    BLOCK_PAGE_MARKERS,
+    BING_SEARCH_URL,
+    DUCKDUCKGO_SEARCH_URL,
+    METRICS_FILE,
+    ENRICHMENT_ENABLED
 )
 from sheets_manager import GoogleSheetsManager
 from google_api import GoogleCustomSearch
+from rate_limiter import get_rate_limiter
+from http_cache import CachedSession, get_http_cache
+from keyword_matcher import get_rules
+from serp_parser import parse_serp
+from run_journal import RunJournal
+from run_lock import run_single_flight
+from pipeline import ScrapePipeline
+from search_engines import build_engines, get_results_per_engine
+from enrichment import PageEnricher
+from engine_health import EngineUnavailable, get_engine_health
+from url_canonicalizer import clean_url, canonical_key
+from metrics import (
+    REGISTRY,
+    SEARCH_REQUESTS,
+    SEARCH_REQUEST_SECONDS,
+    PARSE_SECONDS,
+    RESULTS_PARSED,
+    RESULTS_FILTERED,
+    RESULTS_DROPPED,
+    get_request_status
+)
+
+def setup_logging(log_file='scraper.log'):
+    """Setup logging once per process; later calls leave the existing handlers alone"""
+    if logging.getLogger().handlers:
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
 
 class WebScraper:
     def __init__(self):
+        # Setup logging before the components below configure a default handler
+        setup_logging()
+        self.logger = logging.getLogger(__name__)
+        
         self.sheets_manager = GoogleSheetsManager()
-        self.session = requests.Session()
+        self.rate_limiter = get_rate_limiter()
+        self.engine_health = get_engine_health()
+        self.http_cache = get_http_cache()
+        self.session = CachedSession(cache=self.http_cache, rate_limiter=self.rate_limiter)
         self.google_api = GoogleCustomSearch()
-        
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('scraper.log'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging.getLogger(__name__)
+        self.journal = RunJournal()
+        self.active_journal = None  # Set while run_scraper is checkpointing
+        self.known_urls = None  # URLs already in the sheet, set while run_scraper is running
+        self.last_run_ok = False
+        self.engines = build_engines(self)  # Enabled SEARCH_ENGINES, in configuration order
         
         # Setup session headers
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        
+        # Size the connection pool so concurrent searches can share keep-alive connections
+        adapter = HTTPAdapter(pool_maxsize=max(10, MAX_CONCURRENT_REQUESTS))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def search_google(self, keyword, max_results=10):
         """Search Google using Custom Search API"""
         try:
-            api_results = self.google_api.search(keyword, max_results)
+            api_results = self.google_api.search(keyword, max_results, known_urls=self.known_urls)
             # Add categorization to Google API results
             categorized_results = []
             for result in api_results:
+                result['url'] = clean_url(result.get('url', ''))
                 category = self.categorize_result(result.get('title', ''), result.get('description', ''), result.get('url', ''))
                 result['category'] = category
                 categorized_results.append(result)
@@ -61,59 +105,94 @@ class WebScraper:
             self.logger.error(f"Google API search failed for '{keyword}': {str(e)}")
             return []
     
+    def _get_search_page(self, engine, search_url):
+        """Fetch a result page, retrying transient errors with backoff while the engine's circuit allows it"""
+        breaker = self.engine_health.get(engine)
+        attempts = max(1, MAX_RETRIES)
+        for attempt in range(attempts):
+            if not breaker.allow_request():
+                raise EngineUnavailable(f"{engine} circuit is open, retrying in {breaker.seconds_until_retry():.0f}s")
+            try:
+                with SEARCH_REQUEST_SECONDS.time(engine):
+                    response = self.session.get(search_url, timeout=10)
+                if response.status_code in BLOCKED_STATUS_CODES:
+                    SEARCH_REQUESTS.inc(engine, str(response.status_code))
+                    retry_after = response.headers.get('Retry-After', '')
+                    breaker.record_failure(blocked=True, retry_after=int(retry_after) if retry_after.isdigit() else None)
+                    raise EngineUnavailable(f"{engine} is blocking requests (HTTP {response.status_code})")
+                response.raise_for_status()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                SEARCH_REQUESTS.inc(engine, get_request_status(e))
+                status_code = getattr(e.response, 'status_code', None)
+                if status_code is not None and status_code < 500:
+                    raise  # Not transient and not the engine's health (e.g. 404)
+                breaker.record_failure()
+                if attempt == attempts - 1:
+                    raise
+                delay = breaker.get_backoff(attempt)
+                self.logger.warning(f"{engine} request failed ({str(e)}), retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            SEARCH_REQUESTS.inc(engine, 'cached' if getattr(response, 'from_cache', False) else 'ok')
+            return response
+    
+    def _fetch_serp(self, engine, search_url, max_results):
+        """Fetch and parse a result page; a page with no results that looks like a captcha opens the circuit"""
+        response = self._get_search_page(engine, search_url)
+        
+        with PARSE_SECONDS.time(engine):
+            raw_results = parse_serp(engine, response.content, max_results)
+        RESULTS_PARSED.inc(engine, amount=len(raw_results))
+        
+        breaker = self.engine_health.get(engine)
+        if not raw_results:
+            page_text = response.content.lower()
+            if any(marker.encode('utf-8') in page_text for marker in BLOCK_PAGE_MARKERS.get(engine, [])):
+                # Don't let the cache serve the block page again on later runs
+                self.session.evict(response)
+                breaker.record_failure(blocked=True)
+                raise EngineUnavailable(f"{engine} served a captcha/block page")
+        breaker.record_success()
+        return raw_results
+    
+    def _build_results(self, keyword, raw_results, source):
+        """Filter parsed SERP entries for relevance and turn them into categorized results"""
+        results = []
+        for raw_result in raw_results:
+            title = raw_result['title']
+            # Unwrap click-tracking redirects and drop tracking parameters before anything looks at the URL
+            url = clean_url(raw_result['url'])
+            description = raw_result['description']
+            
+            self.logger.debug(f"{source} result: {title[:50]}... - {url}")
+            
+            # Filter out dictionary/Wikipedia results
+            if self._is_relevant_result(title, description, url):
+                category = self.categorize_result(title, description, url)
+                results.append({
+                    'keyword': keyword,
+                    'title': title,
+                    'url': url,
+                    'description': description,
+                    'source': source,
+                    'category': category
+                })
+                self.logger.debug(f"{source} result added: {title[:50]}...")
+            else:
+                RESULTS_FILTERED.inc(source.lower())
+                self.logger.debug(f"{source} result filtered out: {title[:50]}...")
+        
+        return results
+    
     def search_bing(self, keyword, max_results=10):
         """Search Bing and extract results"""
         results = []
         try:
-            search_url = f"https://www.bing.com/search?q={keyword.replace(' ', '+')}&count={max_results}"
-            response = self.session.get(search_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find search results
-            search_results = soup.find_all('li', class_='b_algo')
-            self.logger.debug(f"Bing found {len(search_results)} raw results for '{keyword}'")
-            
-            for result in search_results[:max_results]:
-                try:
-                    # Extract title and URL
-                    title_element = result.find('h2')
-                    if not title_element:
-                        continue
-                    
-                    link_element = title_element.find('a')
-                    if not link_element:
-                        continue
-                    
-                    title = title_element.get_text().strip()
-                    url = link_element.get('href', '')
-                    
-                    # Extract description
-                    desc_element = result.find('p')
-                    description = desc_element.get_text().strip() if desc_element else ""
-                    
-                    self.logger.debug(f"Bing result: {title[:50]}... - {url}")
-                    
-                    # Filter out dictionary/Wikipedia results
-                    if self._is_relevant_result(title, description, url):
-                        category = self.categorize_result(title, description, url)
-                        results.append({
-                            'keyword': keyword,
-                            'title': title,
-                            'url': url,
-                            'description': description,
-                            'source': 'Bing',
-                            'category': category
-                        })
-                        self.logger.debug(f"Bing result added: {title[:50]}...")
-                    else:
-                        self.logger.debug(f"Bing result filtered out: {title[:50]}...")
-                        
-                except Exception as e:
-                    self.logger.debug(f"Error extracting Bing result: {str(e)}")
-                    continue
+            search_url = f"{BING_SEARCH_URL}?q={keyword.replace(' ', '+')}&count={max_results}"
+            raw_results = self._fetch_serp('bing', search_url, max_results)
+            self.logger.debug(f"Bing found {len(raw_results)} raw results for '{keyword}'")
             
+            results = self._build_results(keyword, raw_results, 'Bing')
             self.logger.info(f"Found {len(results)} relevant results from Bing for '{keyword}'")
             
         except Exception as e:
@@ -125,45 +204,10 @@ class WebScraper:
         """Search DuckDuckGo and extract results"""
         results = []
         try:
-            search_url = f"https://duckduckgo.com/html/?q={keyword.replace(' ', '+')}"
-            response = self.session.get(search_url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find search results
-            search_results = soup.find_all('div', class_='result')
-            
-            for result in search_results[:max_results]:
-                try:
-                    # Extract title and URL
-                    title_element = result.find('a', class_='result__a')
-                    if not title_element:
-                        continue
-                    
-                    title = title_element.get_text().strip()
-                    url = title_element.get('href', '')
-                    
-                    # Extract description
-                    desc_element = result.find('a', class_='result__snippet')
-                    description = desc_element.get_text().strip() if desc_element else ""
-                    
-                    # Filter out dictionary/Wikipedia results
-                    if self._is_relevant_result(title, description, url):
-                        category = self.categorize_result(title, description, url)
-                        results.append({
-                            'keyword': keyword,
-                            'title': title,
-                            'url': url,
-                            'description': description,
-                            'source': 'DuckDuckGo',
-                            'category': category
-                        })
-                        
-                except Exception as e:
-                    self.logger.debug(f"Error extracting DuckDuckGo result: {str(e)}")
-                    continue
+            search_url = f"{DUCKDUCKGO_SEARCH_URL}?q={keyword.replace(' ', '+')}"
+            raw_results = self._fetch_serp('duckduckgo', search_url, max_results)
             
+            results = self._build_results(keyword, raw_results, 'DuckDuckGo')
             self.logger.info(f"Found {len(results)} results from DuckDuckGo for '{keyword}'")
             
         except Exception as e:
@@ -171,39 +215,27 @@ class WebScraper:
         
         return results
     
-    def scrape_all_engines(self, keyword, max_results_per_engine=10):
-        """Scrape results from all search engines"""
-        all_results = []
-        
-        # Search Google (with fallback)
-        try:
-            google_results = self.search_google(keyword, max_results_per_engine)
-            all_results.extend(google_results)
-            self.logger.info(f"Google search completed for '{keyword}'")
-        except Exception as e:
-            self.logger.warning(f"Google search failed for '{keyword}': {str(e)}")
+    def _run_search(self, engine_name, search_function, keyword, max_results):
+        """Run one engine search, reusing its checkpoint when resuming and checkpointing new results"""
+        journal = self.active_journal
+        if journal is not None:
+            checkpointed = journal.get(keyword, engine_name)
+            if checkpointed is not None:
+                self.logger.info(f"{engine_name} search for '{keyword}' restored from checkpoint")
+                return checkpointed
         
-        time.sleep(DELAY_BETWEEN_REQUESTS)
-        
-        # Search Bing
-        try:
-            bing_results = self.search_bing(keyword, max_results_per_engine)
-            all_results.extend(bing_results)
-            self.logger.info(f"Bing search completed for '{keyword}'")
-        except Exception as e:
-            self.logger.warning(f"Bing search failed for '{keyword}': {str(e)}")
-        
-        time.sleep(DELAY_BETWEEN_REQUESTS)
+        # A tripped engine costs nothing until its cooldown ends
+        breaker = self.engine_health.get(engine_name.lower())
+        if breaker.is_open():
+            self.logger.info(f"Skipping {engine_name} for '{keyword}': circuit open for another {breaker.seconds_until_retry():.0f}s")
+            return []
         
-        # Search DuckDuckGo
-        try:
-            duckduckgo_results = self.search_duckduckgo(keyword, max_results_per_engine)
-            all_results.extend(duckduckgo_results)
-            self.logger.info(f"DuckDuckGo search completed for '{keyword}'")
-        except Exception as e:
-            self.logger.warning(f"DuckDuckGo search failed for '{keyword}': {str(e)}")
+        results = search_function(keyword, max_results)
         
-        return all_results
+        # Engines return [] on errors as well, so empty searches are left to be retried on resume
+        if journal is not None and results:
+            journal.record(keyword, engine_name, results)
+        return results
     
     def _is_relevant_result(self, title, description, url):
         """Check if a search result is relevant to AI summer camps"""
@@ -211,179 +243,135 @@ class WebScraper:
         if not title or not url or not url.startswith('http'):
             return False
         
-        # Convert to lowercase for easier matching
-        title_lower = title.lower()
-        desc_lower = description.lower()
-        url_lower = url.lower()
-        
-        # Keywords that indicate this is NOT a summer camp program
-        irrelevant_keywords = [
-            'wikipedia.org',
-            'dictionary.com',
-            'merriam-webster',
-            'urbandictionary',
-            'definition',
-            'meaning of',
-            'what is',
-            'encyclopedia',
-            'wiki',
-            'dictionary',
-            'thesaurus',
-            'synonym',
-            'antonym'
-        ]
-        
-        # Check if result contains irrelevant keywords
-        for keyword in irrelevant_keywords:
-            if (keyword in title_lower or 
-                keyword in desc_lower or 
-                keyword in url_lower):
-                return False
-        
-        # Keywords that indicate this IS a summer camp program
-        relevant_keywords = [
-            'summer camp',
-            'summer program',
-            'summer institute',
-            'summer academy',
-            'summer school',
-            'camp registration',
-            'apply now',
-            'application',
-            'enrollment',
-            'register',
-            'program dates',
-            'tuition',
-            'cost',
-            'fee',
-            'deadline',
-            'admission',
-            'accepting applications'
-        ]
-        
-        # Check if result contains relevant keywords
-        for keyword in relevant_keywords:
-            if (keyword in title_lower or 
-                keyword in desc_lower):
-                return True
-        
-        # If no relevant keywords found, still include if it has AI-related terms
-        ai_keywords = ['ai', 'artificial intelligence', 'machine learning', 'deep learning', 'neural network']
-        for keyword in ai_keywords:
-            if (keyword in title_lower or 
-                keyword in desc_lower):
-                return True
-        
-        # Be more lenient - if it's from a search about AI summer camps, include it unless it's clearly irrelevant
-        # This will catch more results that might be relevant but don't have exact keyword matches
-        return True
+        # Only dictionary/encyclopedia-style keywords exclude a result; anything else is
+        # kept because it came from a search about AI summer camps
+        return not get_rules().is_excluded(title, description, url)
 
     def categorize_result(self, title, description, url):
         """Categorize a search result based on title, description, and URL"""
-        # Combine all text for analysis
-        text_to_analyze = f"{title} {description} {url}".lower()
+        rules = get_rules()
         
-        # Score each category based on keyword matches
-        category_scores = {}
-        
-        for category_key, keywords in CATEGORY_KEYWORDS.items():
-            score = 0
-            for keyword in keywords:
-                if keyword.lower() in text_to_analyze:
-                    # Weight title matches more heavily
-                    if keyword.lower() in title.lower():
-                        score += 5  # Increased weight for title matches
-                    elif keyword.lower() in description.lower():
-                        score += 3  # Increased weight for description matches
-                    elif keyword.lower() in url.lower():
-                        score += 1
-            
-            category_scores[category_key] = score
+        # Score each category based on keyword matches (title > description > URL)
+        category_scores = rules.score_categories(title, description, url)
         
         # Find the category with the highest score
         if category_scores:
             best_category = max(category_scores, key=category_scores.get)
             # Use the best category if it has any score, otherwise try fallback logic
             if category_scores[best_category] > 0:
-                return CATEGORIES[best_category]
+                return rules.categories[best_category]
         
-        # If no category has any score, use fallback logic
-        # Try to infer from URL domain or other clues
-        url_lower = url.lower()
-        if any(word in url_lower for word in ['state', 'community', 'public']):
-            return CATEGORIES['STATE_LOCAL_OPPORTUNITY']
-        elif any(word in url_lower for word in ['online', 'course', 'platform']):
-            return CATEGORIES['SELF_GUIDED_COURSES']
-        elif any(word in url_lower for word in ['scholarship', 'grant', 'fund']):
-            return CATEGORIES['TECHNOLOGY_SCHOLARSHIP']
-        elif any(word in text_to_analyze for word in ['university', 'college', 'institute']):
-            return CATEGORIES['SECONDARY_SCHOOL_FELLOWSHIP']
-        else:
-            # If we can't determine anything, use "Other"
-            return CATEGORIES['OTHER']
+        # If no category has any score, infer from URL domain or other clues
+        fallback_category = rules.fallback_category(title, description, url)
+        if fallback_category:
+            return rules.categories[fallback_category]
+        
+        # If we can't determine anything, use "Other"
+        return rules.categories['OTHER']
 
     def remove_duplicates(self, results, existing_urls):
-        """Remove duplicate results based on URL"""
-        unique_results = []
-        seen_urls = set()
+        """Remove duplicate results based on the canonical URL key"""
+        return list(self.iter_unique_results(results, existing_urls))
+    
+    def iter_unique_results(self, results, existing_urls):
+        """Yield each result whose canonical URL key hasn't been seen yet and isn't already in the sheet"""
+        seen_keys = set()
         
         for result in results:
             url = result.get('url', '')
-            if url and url not in seen_urls and url not in existing_urls:
-                unique_results.append(result)
-                seen_urls.add(url)
-        
-        return unique_results
+            if not url:
+                continue
+            key = canonical_key(url)
+            if key in seen_keys:
+                RESULTS_DROPPED.inc('duplicate')
+            elif url in existing_urls:
+                RESULTS_DROPPED.inc('existing')
+            else:
+                seen_keys.add(key)
+                yield result
     
-    def run_scraper(self):
-        """Main scraping function"""
+    def run_scraper(self, resume=False):
+        """Main scraping function; resume skips the searches an interrupted run already completed"""
         try:
             self.logger.info("Starting web scraper...")
+            self.last_run_ok = False
+            self.journal.start(resume)
+            self.active_journal = self.journal
+            if self.http_cache:
+                self.http_cache.stats.reset()
             
             # Get existing URLs to avoid duplicates
             existing_urls = self.sheets_manager.get_existing_urls()
             self.logger.info(f"Found {len(existing_urls)} existing URLs")
+            self.known_urls = existing_urls
             
-            all_results = []
+            results_per_engine = get_results_per_engine(len(self.engines))
             
-            # Search for each keyword
-            for keyword in SEARCH_KEYWORDS:
-                self.logger.info(f"Searching for: {keyword}")
-                
-                results = self.scrape_all_engines(keyword, MAX_RESULTS_PER_KEYWORD // 3)  # Back to 3 engines
-                all_results.extend(results)
-                
-                time.sleep(DELAY_BETWEEN_REQUESTS)
+            # Same program syndicated under different URLs (aggregators, mirrors)
+            near_duplicate_index = self.sheets_manager.get_near_duplicate_index()
             
-            # Remove duplicates
-            unique_results = self.remove_duplicates(all_results, existing_urls)
-            self.logger.info(f"Found {len(unique_results)} unique new results")
+            # Results stream through dedupe (and page enrichment) and translation to the sheet in batches while
+            # searches continue; each engine plans its own share of the keywords (Google and paid engines by today's budget)
+            enricher = PageEnricher() if ENRICHMENT_ENABLED else None
+            pipeline = ScrapePipeline(self, existing_urls, near_duplicate_index, enricher=enricher)
+            uploaded_count = pipeline.run(SEARCH_KEYWORDS, results_per_engine)
             
-            # Upload to Google Sheets
-            if unique_results:
-                success = self.sheets_manager.upload_data(unique_results)
-                if success:
-                    self.logger.info("Successfully uploaded data to Google Sheets")
-                else:
-                    self.logger.error("Failed to upload data to Google Sheets")
+            if not pipeline.ok:
+                # Keep the checkpoints so --resume only has to redo the rows that didn't make it
+                self.logger.error("Failed to upload some data to Google Sheets")
+                return uploaded_count
+            if uploaded_count:
+                self.logger.info(f"Successfully uploaded {uploaded_count} new results to Google Sheets")
             else:
                 self.logger.info("No new results to upload")
             
-            return len(unique_results)
+            self.journal.finish()
+            self.last_run_ok = True
+            return uploaded_count
             
         except Exception as e:
             self.logger.error(f"Error in main scraper: {str(e)}")
             return 0
         
         finally:
-            # Clean up
-            pass # No Selenium cleanup needed
+            self.active_journal = None
+            self.known_urls = None
+            if self.http_cache:
+                self.logger.info(f"HTTP cache: {self.http_cache.stats.summary()}")
 
 def main():
     """Main function to run the scraper"""
-    scraper = WebScraper()
-    results_count = scraper.run_scraper()
-    print(f"Scraping completed. Found {results_count} new results.")
+    parser = argparse.ArgumentParser(description="AI Summer Camp Web Scraper")
+    parser.add_argument('--sync-url-index', action='store_true',
+                        help="Rebuild the local URL index from the Google Sheet before scraping")
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume the last unfinished run, skipping the searches it already completed")
+    parser.add_argument('--force', action='store_true',
+                        help="Run even if another run finished recently (never alongside one in progress)")
+    args = parser.parse_args()
+    
+    def run():
+        scraper = WebScraper()
+        if args.sync_url_index:
+            scraper.sheets_manager.sync_url_index()
+        results_count = scraper.run_scraper(resume=args.resume)
+        if not scraper.last_run_ok:
+            # Released without starting the skip window, so the next trigger retries
+            raise RuntimeError("scraper run did not complete")
+        return results_count
+    
+    # Same lease as scheduled runs, so a manual run never overlaps one
+    try:
+        results_count = run_single_flight('manual', run, force=args.force)
+        if results_count is None:
+            print("Skipped: another run is in progress or one finished recently (use --force to run anyway).")
+        else:
+            print(f"Scraping completed. Found {results_count} new results.")
+    except Exception as e:
+        print(f"Scraping failed: {str(e)}")
+    
+    REGISTRY.write(METRICS_FILE)
+    print(f"Metrics written to {METRICS_FILE}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
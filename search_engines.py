@@ -0,0 +1,262 @@
+"""
+Search engine registry: every engine behind one interface, built from config.SEARCH_ENGINES, and a scheduler
+that runs (keyword, engine) searches within each engine's concurrency, rate and daily budget
+"""
+
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlencode
+
+from config import (
+    SEARCH_ENGINES,
+    MAX_RESULTS_PER_KEYWORD,
+    SERPAPI_API_KEY,
+    SERPAPI_SEARCH_URL,
+    STARTPAGE_SEARCH_URL,
+    ENGINE_QUOTA_LEDGER_FILE
+)
+from quota_ledger import QuotaLedger
+from engine_health import CLOSED
+from metrics import SEARCH_COST, RESULTS_PARSED, get_request_status
+
+PROBE_POLL_SECONDS = 0.5  # How often the scheduler checks on an engine whose circuit is open or probing
+
+class SearchEngine:
+    """One search backend; subclasses implement search(keyword, max_results) and return categorized results"""
+
+    def __init__(self, scraper, name, settings):
+        self.scraper = scraper
+        self.name = name
+        self.label = settings.get('label', name.title())  # Source column value; label.lower() names the circuit
+        self.max_concurrency = max(1, settings.get('max_concurrency', 1))
+        self.rate = settings.get('rate')  # Searches per second; None leaves pacing to the host rate limiter
+        self.cost_per_query = settings.get('cost_per_query', 0)
+        self.expected_yield = settings.get('expected_yield', 1)
+        daily_quota = settings.get('daily_quota')
+        self.ledger = None if daily_quota is None else QuotaLedger(ENGINE_QUOTA_LEDGER_FILE.format(engine=name), daily_quota)
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def is_paid(self):
+        return self.cost_per_query > 0
+
+    @property
+    def breaker(self):
+        return self.scraper.engine_health.get(self.label.lower())
+
+    def is_available(self):
+        """Whether the engine's circuit lets searches through right now"""
+        return not self.breaker.is_open()
+
+    def is_recovering(self):
+        """Whether the circuit has tripped and not yet closed again (searches then go one at a time, as probes)"""
+        return self.breaker.state != CLOSED
+
+    def seconds_until_available(self):
+        """How long until the circuit lets a search through (PROBE_POLL_SECONDS while a probe is out)"""
+        return self.breaker.seconds_until_retry() or PROBE_POLL_SECONDS
+
+    def plan(self, keywords, max_results):
+        """Get the keywords to search this run; an engine with a daily quota only takes what today's budget covers"""
+        planned = list(keywords)
+        if self.ledger is not None:
+            planned = planned[:self.ledger.remaining()]
+            if len(planned) < len(keywords):
+                self.logger.info(f"{self.label} budget covers {len(planned)} of {len(keywords)} keywords today")
+        if planned and self.is_paid:
+            self.logger.info(f"{self.label}: up to {len(planned)} paid queries (${len(planned) * self.cost_per_query:.2f})")
+        return planned
+
+    def search(self, keyword, max_results=10):
+        raise NotImplementedError
+
+class ScraperEngine(SearchEngine):
+    """An engine whose search is a WebScraper method (search_<name> unless another function is given)"""
+
+    def __init__(self, scraper, name, settings, search_function=None):
+        super().__init__(scraper, name, settings)
+        self.search_function = search_function or getattr(scraper, f"search_{name}")
+
+    def search(self, keyword, max_results=10):
+        return self.search_function(keyword, max_results)
+
+class GoogleEngine(ScraperEngine):
+    """Google Custom Search; the quota ledger decides which keywords get today's queries"""
+
+    def plan(self, keywords, max_results):
+        page_budget = self.scraper.google_api.plan_budget(keywords, max_results)
+        return [keyword for keyword in keywords if page_budget.get(keyword)]
+
+class SerpApiEngine(SearchEngine):
+    """Google results through SerpAPI (paid per search); needs SERPAPI_API_KEY"""
+
+    def search(self, keyword, max_results=10):
+        call_id = self.ledger.reserve(keyword, 1) if self.ledger is not None else None
+        if self.ledger is not None and call_id is None:
+            self.logger.info(f"Skipping {self.label} for '{keyword}': today's budget is spent")
+            return []
+
+        params = {'engine': 'google', 'q': keyword, 'num': max_results, 'api_key': SERPAPI_API_KEY}
+        try:
+            response = self.scraper._get_search_page(self.name, f"{SERPAPI_SEARCH_URL}?{urlencode(params)}")
+            organic_results = response.json().get('organic_results', [])
+        except Exception as e:
+            if call_id is not None:
+                self.ledger.complete(call_id, get_request_status(e))
+            self.logger.error(f"Error searching {self.label}: {str(e)}")
+            return []
+
+        cached = getattr(response, 'from_cache', False)
+        if not cached:
+            SEARCH_COST.inc(self.name, amount=self.cost_per_query)
+        raw_results = [
+            {'title': item.get('title', ''), 'url': item.get('link', ''), 'description': item.get('snippet', '')}
+            for item in organic_results[:max_results]
+        ]
+        RESULTS_PARSED.inc(self.name, amount=len(raw_results))
+        if call_id is not None:
+            self.ledger.complete(call_id, 'cached' if cached else 'ok', len(raw_results))
+
+        results = self.scraper._build_results(keyword, raw_results, self.label)
+        self.logger.info(f"Found {len(results)} relevant results from {self.label} for '{keyword}'")
+        return results
+
+class StartpageEngine(SearchEngine):
+    """Google results through Startpage's HTML interface"""
+
+    def search(self, keyword, max_results=10):
+        results = []
+        try:
+            search_url = f"{STARTPAGE_SEARCH_URL}?{urlencode({'query': keyword})}"
+            raw_results = self.scraper._fetch_serp(self.name, search_url, max_results)
+            results = self.scraper._build_results(keyword, raw_results, self.label)
+            self.logger.info(f"Found {len(results)} relevant results from {self.label} for '{keyword}'")
+        except Exception as e:
+            self.logger.error(f"Error searching {self.label}: {str(e)}")
+        return results
+
+# Engine classes by SEARCH_ENGINES key (or by an entry's 'type'); register_engine adds more
+ENGINE_TYPES = {
+    'google': GoogleEngine,
+    'bing': ScraperEngine,
+    'duckduckgo': ScraperEngine,
+    'serpapi': SerpApiEngine,
+    'startpage': StartpageEngine
+}
+
+def register_engine(engine_type, engine_class):
+    """Make a SearchEngine subclass available to SEARCH_ENGINES entries named (or typed) engine_type"""
+    ENGINE_TYPES[engine_type] = engine_class
+
+def _iter_enabled_engines(settings=None):
+    """Yield (name, settings, engine class) for each enabled engine of SEARCH_ENGINES, in configuration order"""
+    for name, engine_settings in (SEARCH_ENGINES if settings is None else settings).items():
+        if not engine_settings.get('enabled', True):
+            continue
+        engine_class = ENGINE_TYPES.get(engine_settings.get('type', name))
+        if engine_class is None:
+            logging.getLogger(__name__).warning(f"Unknown search engine '{name}' in SEARCH_ENGINES, skipping it")
+            continue
+        yield name, engine_settings, engine_class
+
+def build_engines(scraper, settings=None):
+    """Build the enabled engines of SEARCH_ENGINES, in configuration order"""
+    return [engine_class(scraper, name, engine_settings)
+            for name, engine_settings, engine_class in _iter_enabled_engines(settings)]
+
+def get_results_per_engine(engine_count=None):
+    """Each engine's share of MAX_RESULTS_PER_KEYWORD (engine_count defaults to the enabled engines)"""
+    if engine_count is None:
+        engine_count = len(list(_iter_enabled_engines()))
+    return max(1, MAX_RESULTS_PER_KEYWORD // max(1, engine_count))
+
+class EngineScheduler:
+    """Runs (keyword, engine) searches side by side: each engine within its own concurrency and rate, all of them
+    within max_in_flight, with free and then higher-yield engines served first when slots are scarce"""
+
+    def __init__(self, engines, max_in_flight=None, max_per_engine=None, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock  # Paces the engines' rates; injectable for tests
+        self.sleep = sleep
+        self.engines = sorted(engines, key=lambda engine: (engine.is_paid, -engine.expected_yield))
+        self.max_per_engine = max_per_engine
+        self.max_in_flight = max_in_flight or sum(self._get_concurrency(engine) for engine in self.engines) or 1
+        self.logger = logging.getLogger(__name__)
+
+    def _get_concurrency(self, engine):
+        return min(engine.max_concurrency, self.max_per_engine or engine.max_concurrency)
+
+    def _hold_probe(self, engine, pending, running):
+        """Skip the searches of an engine whose circuit is open, keeping one as the half-open probe only while
+        other engines still have work; the run never waits out a cooldown on its own"""
+        engine_queue = pending[engine.name]
+        others_busy = bool(running) or any(
+            pending[other.name] and other.is_available() for other in self.engines if other is not engine
+        )
+        keep = 1 if others_busy else 0
+        if len(engine_queue) > keep:
+            skipped = len(engine_queue) - keep
+            self.logger.info(f"Skipping {skipped} {engine.label} searches: circuit open"
+                             + (", keeping one as the probe" if keep else ""))
+            for _ in range(skipped):
+                engine_queue.pop()
+
+    def run(self, keywords, max_results, run_search, handle_results, skip=None, handle_failure=None):
+        """Search the keywords on every engine. run_search(engine, keyword, max_results) runs on a worker thread;
+        handle_results(results) runs on this thread as each search finishes, and handle_failure(engine, keyword,
+        error) as one raises. skip(engine, keyword) leaves a search out"""
+        pending = {
+            engine.name: deque(engine.plan(
+                [keyword for keyword in keywords if skip is None or not skip(engine, keyword)], max_results
+            ))
+            for engine in self.engines
+        }
+        in_flight = {engine.name: 0 for engine in self.engines}
+        next_slot = {engine.name: 0.0 for engine in self.engines}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='search') as executor:
+            while True:
+                now = self.clock()
+                wake_at = None
+                for engine in self.engines:
+                    engine_queue = pending[engine.name]
+                    if engine_queue and not engine.is_available():
+                        self._hold_probe(engine, pending, running)
+                        if engine_queue:
+                            retry_at = now + engine.seconds_until_available()
+                            wake_at = retry_at if wake_at is None else min(wake_at, retry_at)
+                        continue
+                    # A recovering engine gets one search at a time, so the probe decides before the rest go out
+                    concurrency = 1 if engine.is_recovering() else self._get_concurrency(engine)
+                    while (engine_queue and in_flight[engine.name] < concurrency
+                           and len(running) < self.max_in_flight):
+                        if next_slot[engine.name] > now:
+                            wake_at = next_slot[engine.name] if wake_at is None else min(wake_at, next_slot[engine.name])
+                            break
+                        keyword = engine_queue.popleft()
+                        if engine.rate:
+                            next_slot[engine.name] = max(now, next_slot[engine.name]) + 1 / engine.rate
+                        in_flight[engine.name] += 1
+                        running[executor.submit(run_search, engine, keyword, max_results)] = (engine, keyword)
+
+                if not running:
+                    if wake_at is None:
+                        break
+                    self.sleep(max(0.0, wake_at - now))
+                    continue
+
+                timeout = None if wake_at is None else max(0.0, wake_at - now)
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    engine, keyword = running.pop(future)
+                    in_flight[engine.name] -= 1
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        self.logger.warning(f"{engine.label} search failed for '{keyword}': {str(e)}")
+                        if handle_failure is not None:
+                            handle_failure(engine, keyword, e)
+                        continue
+                    handle_results(results)
@@ -0,0 +1,164 @@
+"""
+Fast search-engine result page (SERP) parsing shared by the HTML search engines
+"""
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import SERP_PARSER_BACKEND
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser  # Optional (pip install selectolax)
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.html  # Optional (pip install lxml)
+    from lxml.etree import ParserError
+except ImportError:
+    lxml = None
+
+# Where each field lives in a result, as (tag, class) pairs; class None matches any element of that tag.
+# 'link' is looked up inside the title element; None means the title element is the link itself.
+SERP_SELECTORS = {
+    'bing': {
+        'result': ('li', 'b_algo'),
+        'title': ('h2', None),
+        'link': ('a', None),
+        'description': ('p', None)
+    },
+    'duckduckgo': {
+        'result': ('div', 'result'),
+        'title': ('a', 'result__a'),
+        'link': None,
+        'description': ('a', 'result__snippet')
+    },
+    'startpage': {
+        'result': ('div', 'w-gl__result'),
+        'title': ('a', 'w-gl__result-title'),
+        'link': None,
+        'description': ('p', 'w-gl__description')
+    }
+}
+
+BACKEND_PREFERENCE = ['selectolax', 'lxml', 'bs4']
+
+def get_available_backends():
+    """Get the parser backends installed in this environment, fastest first"""
+    available = {
+        'selectolax': HTMLParser is not None,
+        'lxml': lxml is not None,
+        'bs4': True
+    }
+    return [backend for backend in BACKEND_PREFERENCE if available[backend]]
+
+def choose_backend(backend=None):
+    """Resolve the configured backend ('auto' picks the fastest installed one)"""
+    backend = backend or SERP_PARSER_BACKEND
+    available = get_available_backends()
+    if backend == 'auto':
+        return available[0]
+    if backend not in available:
+        raise ImportError(f"SERP parser backend '{backend}' is not installed")
+    return backend
+
+def _css(selector):
+    """Convert a (tag, class) pair to a CSS selector"""
+    tag, class_name = selector
+    return f"{tag}.{class_name}" if class_name else tag
+
+def _xpath(selector):
+    """Convert a (tag, class) pair to a descendant XPath expression"""
+    tag, class_name = selector
+    if not class_name:
+        return f".//{tag}"
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+def _parse_with_selectolax(content, selectors, max_results):
+    tree = HTMLParser(content)
+    parsed = []
+    for result in tree.css(_css(selectors['result']))[:max_results]:
+        title_element = result.css_first(_css(selectors['title']))
+        if title_element is None:
+            continue
+        link_element = title_element.css_first(_css(selectors['link'])) if selectors['link'] else title_element
+        if link_element is None:
+            continue
+        desc_element = result.css_first(_css(selectors['description']))
+        parsed.append({
+            'title': title_element.text().strip(),
+            'url': link_element.attributes.get('href') or '',
+            'description': desc_element.text().strip() if desc_element is not None else ""
+        })
+    return parsed
+
+def _parse_with_lxml(content, selectors, max_results):
+    try:
+        tree = lxml.html.fromstring(content)
+    except ParserError:
+        # An empty or whitespace-only body, which the other backends parse to no results
+        return []
+    parsed = []
+    for result in tree.xpath(_xpath(selectors['result']))[:max_results]:
+        title_elements = result.xpath(_xpath(selectors['title']))
+        if not title_elements:
+            continue
+        title_element = title_elements[0]
+        if selectors['link']:
+            link_elements = title_element.xpath(_xpath(selectors['link']))
+            if not link_elements:
+                continue
+            link_element = link_elements[0]
+        else:
+            link_element = title_element
+        desc_elements = result.xpath(_xpath(selectors['description']))
+        parsed.append({
+            'title': title_element.text_content().strip(),
+            'url': link_element.get('href', ''),
+            'description': desc_elements[0].text_content().strip() if desc_elements else ""
+        })
+    return parsed
+
+def _find(element, selector):
+    tag, class_name = selector
+    return element.find(tag, class_=class_name) if class_name else element.find(tag)
+
+def _has_class(class_name):
+    """Match a class token; while parsing, the strainer sees the raw unsplit attribute"""
+    def matches(value):
+        if not value:
+            return False
+        tokens = value.split() if isinstance(value, str) else value
+        return class_name in tokens
+    return matches
+
+def _parse_with_bs4(content, selectors, max_results):
+    tag, class_name = selectors['result']
+    # Only build the result subtrees instead of the whole page
+    strainer = SoupStrainer(tag, class_=_has_class(class_name))
+    soup = BeautifulSoup(content, 'lxml' if lxml is not None else 'html.parser', parse_only=strainer)
+    parsed = []
+    for result in soup.find_all(tag, class_=class_name)[:max_results]:
+        title_element = _find(result, selectors['title'])
+        if not title_element:
+            continue
+        link_element = _find(title_element, selectors['link']) if selectors['link'] else title_element
+        if not link_element:
+            continue
+        desc_element = _find(result, selectors['description'])
+        parsed.append({
+            'title': title_element.get_text().strip(),
+            'url': link_element.get('href', ''),
+            'description': desc_element.get_text().strip() if desc_element else ""
+        })
+    return parsed
+
+PARSERS = {
+    'selectolax': _parse_with_selectolax,
+    'lxml': _parse_with_lxml,
+    'bs4': _parse_with_bs4
+}
+
+def parse_serp(engine, content, max_results=10, backend=None):
+    """Extract up to max_results raw results ({title, url, description}) from a SERP page"""
+    selectors = SERP_SELECTORS[engine]
+    return PARSERS[choose_backend(backend)](content, selectors, max_results)
@@ -3,22 +3,143 @@ Google Sheets Manager for uploading scraped data
 """
 
 import gspread
+import requests
+from gspread.utils import absolute_range_name
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import Request
 import pandas as pd
-from datetime import datetime
+import time
 import logging
-from config import GOOGLE_SHEET_ID, CREDENTIALS_FILE, SHEET_NAME, SPANISH_SHEET_NAME, COLUMNS
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    GOOGLE_SHEET_ID,
+    CREDENTIALS_FILE,
+    SHEET_NAME,
+    SPANISH_SHEET_NAME,
+    COLUMNS,
+    ENRICHMENT_ENABLED,
+    ENRICHMENT_COLUMNS,
+    NEAR_DUPLICATE_ENABLED,
+    SHEETS_API_URL,
+    PIPELINE_BATCH_SIZE,
+    UPLOAD_FLUSH_SECONDS
+)
 from translator import TranslationService
+from rate_limiter import get_rate_limiter
+from url_index import UrlIndex
+from near_duplicates import NearDuplicateIndex
+from metrics import record_sheets_response
+
+SHEETS_API_HOST = 'sheets.googleapis.com'
+
+class EndpointRewriteSession(requests.Session):
+    """Session for gspread that sends Sheets and Drive API calls to another base URL (e.g. the mock server)"""
+    
+    def __init__(self, base_url):
+        super().__init__()
+        self.prefixes = {
+            'https://sheets.googleapis.com': base_url,
+            'https://www.googleapis.com/drive': base_url + '/drive'
+        }
+    
+    def request(self, method, url, *args, **kwargs):
+        for prefix, replacement in self.prefixes.items():
+            if url.startswith(prefix):
+                url = replacement + url[len(prefix):]
+                break
+        return super().request(method, url, *args, **kwargs)
+
+class BatchUploader:
+    """Uploads results in micro-batches flushed by size or age: English rows right away, Spanish rows
+    from a translation thread that trails the English tab by at most one batch"""
+    
+    def __init__(self, sheets_manager, batch_size=PIPELINE_BATCH_SIZE, flush_seconds=UPLOAD_FLUSH_SECONDS,
+                 on_spanish_failed=None):
+        self.sheets_manager = sheets_manager
+        self.on_spanish_failed = on_spanish_failed  # Called with each batch the Spanish tab rejected
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.buffered_since = None
+        self.spanish_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spanish-upload')
+        self.pending_spanish = None  # (batch, future) being translated and written
+        self.uploaded = 0
+        self.failed = 0  # Results the English tab rejected
+        self.spanish_failed = 0  # Results on the English tab but missing from the Spanish one
+        self.first_upload_at = None
+        self.logger = logging.getLogger(__name__)
+    
+    def add(self, result):
+        """Buffer a result, flushing when the batch is full or its oldest result has waited flush_seconds"""
+        if not self.buffer:
+            self.buffered_since = time.monotonic()
+        self.buffer.append(result)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+    
+    def flush_if_due(self):
+        """Flush a partial batch once it is flush_seconds old; call this while no results are arriving"""
+        if self.buffer and time.monotonic() - self.buffered_since >= self.flush_seconds:
+            self.flush()
+    
+    def _wait_for_spanish(self):
+        if self.pending_spanish is None:
+            return
+        batch, future = self.pending_spanish
+        self.pending_spanish = None
+        if not future.result():
+            self.spanish_failed += len(batch)
+            if self.on_spanish_failed is not None:
+                self.on_spanish_failed(batch)
+    
+    def flush(self):
+        """Write the buffered results to the English tab and hand them to the Spanish thread"""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        
+        # The previous batch's Spanish rows go in before this batch's English rows, so the Spanish tab
+        # never trails by more than one batch and the two tabs never write at the same time
+        self._wait_for_spanish()
+        if not self.sheets_manager.upload_english_batch(batch):
+            # Neither tab has them and they are not indexed, so --resume searches them up again
+            self.failed += len(batch)
+            return
+        
+        # Indexed from here on, so --resume would dedupe them away; a batch the Spanish tab rejects is
+        # handed to on_spanish_failed (the run journal) instead, and --resume writes only its Spanish rows
+        self.uploaded += len(batch)
+        if self.first_upload_at is None:
+            self.first_upload_at = time.monotonic()
+        self.pending_spanish = (batch, self.spanish_executor.submit(self.sheets_manager.upload_spanish_batch, batch))
+    
+    def close(self):
+        """Flush what is left and wait for the last Spanish batch"""
+        try:
+            self.flush()
+            self._wait_for_spanish()
+        finally:
+            self.spanish_executor.shutdown(wait=True)
+        if self.spanish_failed:
+            self.logger.error(f"{self.spanish_failed} uploaded results are missing from the Spanish worksheet")
 
 class GoogleSheetsManager:
     def __init__(self):
         self.sheet_id = GOOGLE_SHEET_ID
         self.credentials_file = CREDENTIALS_FILE
         self.sheet_name = SHEET_NAME
-        self.columns = COLUMNS
+        self.columns = COLUMNS + ENRICHMENT_COLUMNS if ENRICHMENT_ENABLED else COLUMNS
         self.client = None
+        self.credentials = None
         self.sheet = None
+        self.worksheets = {}  # Worksheet handles by title, reused for the life of this manager
+        self.headed_worksheets = set()  # Titles of worksheets known to have their header row
         self.translator = TranslationService()
+        self.rate_limiter = get_rate_limiter()
+        self.url_index = UrlIndex()
+        self.near_duplicates = NearDuplicateIndex() if NEAR_DUPLICATE_ENABLED else None
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
@@ -26,6 +147,13 @@ class GoogleSheetsManager:
         
     def authenticate(self):
         """Authenticate with Google Sheets API"""
+        if SHEETS_API_URL:
+            # Stand-in endpoint: no credentials needed
+            self.client = gspread.Client(auth=None, session=EndpointRewriteSession(SHEETS_API_URL))
+            self.client.session.hooks['response'].append(record_sheets_response)
+            self.logger.info(f"Using Sheets API endpoint {SHEETS_API_URL}")
+            return True
+        
         try:
             # Define the scope
             scope = [
@@ -40,7 +168,9 @@ class GoogleSheetsManager:
             )
             
             # Create client
+            self.credentials = credentials
             self.client = gspread.authorize(credentials)
+            self.client.session.hooks['response'].append(record_sheets_response)
             self.logger.info("Successfully authenticated with Google Sheets API")
             return True
             
@@ -48,19 +178,76 @@ class GoogleSheetsManager:
             self.logger.error(f"Authentication failed: {str(e)}")
             return False
     
+    def _throttle(self):
+        """Wait for the Sheets API rate budget before making a request"""
+        self.rate_limiter.acquire(SHEETS_API_HOST)
+    
+    def invalidate_handles(self):
+        """Forget the cached spreadsheet and worksheet handles so they're looked up again"""
+        self.sheet = None
+        self.worksheets = {}
+        self.headed_worksheets = set()
+    
+    def _get_stale_handle_reason(self, error):
+        """Describe why an API error means our cached client or handles are stale, or None"""
+        if isinstance(error, gspread.exceptions.WorksheetNotFound):
+            return "worksheet not found"
+        if isinstance(error, gspread.exceptions.APIError):
+            status_code = error.response.status_code
+            message = str(error)
+            if status_code == 401:
+                return "credentials expired"
+            if status_code == 404:
+                return "spreadsheet not found"
+            if status_code == 400 and ('Unable to parse range' in message or 'No grid with id' in message):
+                return "worksheet deleted or renamed"
+        return None
+    
+    def _run_with_fresh_handles(self, operation):
+        """Run a Sheets operation; if the cached handles turn out to be stale, refresh them and retry once"""
+        try:
+            return operation()
+        except (gspread.exceptions.WorksheetNotFound, gspread.exceptions.APIError) as e:
+            reason = self._get_stale_handle_reason(e)
+            if not reason:
+                raise
+            
+            self.logger.warning(f"Refreshing cached Sheets handles ({reason}) and retrying")
+            if reason == "credentials expired":
+                self.client = None
+            self.invalidate_handles()
+            if not self.get_or_create_sheet():
+                raise
+            return operation()
+    
     def get_or_create_sheet(self):
         """Get existing sheet or create new one"""
         try:
+            # Refresh an expired token up front; re-authenticate if that doesn't work
+            if self.client and self.credentials and self.credentials.expired:
+                try:
+                    self.credentials.refresh(Request())
+                except Exception as e:
+                    self.logger.warning(f"Credential refresh failed, re-authenticating: {str(e)}")
+                    self.client = None
+                    self.invalidate_handles()
+            
             if not self.client:
                 if not self.authenticate():
                     return False
             
+            # Reuse the spreadsheet opened earlier
+            if self.sheet is not None:
+                return True
+            
             # Try to open existing sheet
             try:
+                self._throttle()
                 self.sheet = self.client.open_by_key(self.sheet_id)
                 self.logger.info(f"Opened existing sheet: {self.sheet.title}")
             except:
                 # Create new sheet if it doesn't exist
+                self._throttle()
                 self.sheet = self.client.create(self.sheet_name)
                 self.logger.info(f"Created new sheet: {self.sheet.title}")
             
@@ -72,12 +259,17 @@ class GoogleSheetsManager:
     
     def get_or_create_worksheet(self, worksheet_name, headers):
         """Get existing worksheet or create new one"""
+        if worksheet_name in self.worksheets:
+            return self.worksheets[worksheet_name]
+        
         try:
             # Get or create worksheet
             try:
+                self._throttle()
                 worksheet = self.sheet.worksheet(worksheet_name)
                 self.logger.info(f"Opened existing worksheet: {worksheet_name}")
             except:
+                self._throttle()
                 worksheet = self.sheet.add_worksheet(
                     title=worksheet_name, 
                     rows=1000, 
@@ -85,73 +277,160 @@ class GoogleSheetsManager:
                 )
                 self.logger.info(f"Created new worksheet: {worksheet_name}")
             
-            # Set up headers if worksheet is empty
-            if not worksheet.get_all_values():
+            # Set up headers if worksheet is empty (a single-cell read, not the whole sheet)
+            self._throttle()
+            if not worksheet.acell('A1').value:
+                self._throttle()
                 worksheet.append_row(headers)
                 self.logger.info(f"Added headers to worksheet: {worksheet_name}")
             
+            self.worksheets[worksheet_name] = worksheet
             return worksheet
             
         except Exception as e:
             self.logger.error(f"Error getting/creating worksheet {worksheet_name}: {str(e)}")
             return None
     
+    def build_rows(self, data):
+        """Build sheet rows (in column order) from result dicts"""
+        keys = [column.lower() for column in self.columns]
+        return [[item.get(key, '') for key in keys] for item in data]
+    
+    def _get_upload_worksheet(self, worksheet_name, headers):
+        """Get a worksheet with at most one metadata read (which refreshes every tab), creating it if missing"""
+        if worksheet_name not in self.worksheets:
+            self._throttle()
+            self.worksheets.update({worksheet.title: worksheet for worksheet in self.sheet.worksheets()})
+        
+        worksheet = self.worksheets.get(worksheet_name)
+        if worksheet is None:
+            self._throttle()
+            worksheet = self.sheet.add_worksheet(
+                title=worksheet_name, 
+                rows=1000, 
+                cols=len(headers)
+            )
+            self.logger.info(f"Created new worksheet: {worksheet_name}")
+            self.worksheets[worksheet_name] = worksheet
+        
+        return worksheet
+    
+    def _get_upload_worksheets(self, spanish_headers):
+        """Get the English and Spanish worksheets, creating missing tabs"""
+        return [
+            self._get_upload_worksheet(self.sheet_name, self.columns),
+            self._get_upload_worksheet(SPANISH_SHEET_NAME, spanish_headers)
+        ]
+    
+    def _get_header_rows(self, worksheets):
+        """Read the header row of each worksheet in one request ([] for a tab without one)"""
+        self._throttle()
+        response = self.sheet.values_batch_get(
+            [absolute_range_name(worksheet.title, '1:1') for worksheet in worksheets]
+        )
+        value_ranges = response.get('valueRanges', [])
+        return [
+            value_ranges[index].get('values', [[]])[0] if index < len(value_ranges) else []
+            for index in range(len(worksheets))
+        ]
+    
+    def _add_header_columns_requests(self, worksheet, header, headers):
+        """Build the requests that extend an existing header row with the columns it lacks (e.g. once enrichment
+        is enabled); none for a tab without a header, which gets the whole row prepended instead"""
+        if not header or len(header) >= len(headers):
+            return []
+        requests = []
+        if worksheet.col_count < len(headers):
+            requests.append({
+                'appendDimension': {
+                    'sheetId': worksheet.id,
+                    'dimension': 'COLUMNS',
+                    'length': len(headers) - worksheet.col_count
+                }
+            })
+        requests.append({
+            'updateCells': {
+                'start': {'sheetId': worksheet.id, 'rowIndex': 0, 'columnIndex': len(header)},
+                'rows': [{'values': [{'userEnteredValue': {'stringValue': value}} for value in headers[len(header):]]}],
+                'fields': 'userEnteredValue'
+            }
+        })
+        self.logger.info(f"Adding columns {', '.join(headers[len(header):])} to worksheet: {worksheet.title}")
+        return requests
+    
+    def _append_cells_request(self, worksheet, rows):
+        """Build an appendCells request that adds rows after the last row with data"""
+        return {
+            'appendCells': {
+                'sheetId': worksheet.id,
+                'rows': [
+                    {'values': [{'userEnteredValue': {'stringValue': str(value)}} for value in row]}
+                    for row in rows
+                ],
+                'fields': 'userEnteredValue'
+            }
+        }
+    
+    def _write_rows(self, english_rows, spanish_rows, spanish_headers):
+        """Append rows to both worksheets (adding headers to empty tabs) in one batchUpdate call"""
+        english_worksheet, spanish_worksheet = self._get_upload_worksheets(spanish_headers)
+        
+        # Reading row 1 by tab name also detects tabs that were renamed or deleted since they were cached
+        english_header, spanish_header = self._get_header_rows([english_worksheet, spanish_worksheet])
+        
+        if not english_header:
+            english_rows = [self.columns] + english_rows
+            self.logger.info(f"Adding headers to worksheet: {self.sheet_name}")
+        if not spanish_header:
+            spanish_rows = [spanish_headers] + spanish_rows
+            self.logger.info(f"Adding headers to worksheet: {SPANISH_SHEET_NAME}")
+        
+        requests = (self._add_header_columns_requests(english_worksheet, english_header, self.columns)
+                    + self._add_header_columns_requests(spanish_worksheet, spanish_header, spanish_headers))
+        if english_rows:
+            requests.append(self._append_cells_request(english_worksheet, english_rows))
+        if spanish_rows:
+            requests.append(self._append_cells_request(spanish_worksheet, spanish_rows))
+        
+        if requests:
+            self._throttle()
+            self.sheet.batch_update({'requests': requests})
+    
     def upload_data(self, data):
         """Upload scraped data to Google Sheets in both English and Spanish"""
         try:
             if not self.get_or_create_sheet():
                 return False
             
-            # Get or create English worksheet
-            english_worksheet = self.get_or_create_worksheet(self.sheet_name, self.columns)
-            if not english_worksheet:
-                return False
+            # Translate data for Spanish worksheet
+            self.logger.info("Translating data to Spanish...")
+            translated_data = self.translator.translate_data(data)
             
-            # Get or create Spanish worksheet
-            spanish_headers = self.translator.get_spanish_headers()
-            spanish_worksheet = self.get_or_create_worksheet(SPANISH_SHEET_NAME, spanish_headers)
-            if not spanish_worksheet:
+            return self.upload_batch(data, translated_data)
+                
+        except Exception as e:
+            self.logger.error(f"Error uploading data: {str(e)}")
+            return False
+    
+    def upload_batch(self, data, translated_data):
+        """Append results and their Spanish translations to both worksheets, then index the uploaded URLs"""
+        try:
+            if not self.get_or_create_sheet():
                 return False
             
-            # Prepare English data
-            english_rows = []
-            current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            for item in data:
-                row = [
-                    item.get('title', ''),
-                    item.get('url', ''),
-                    item.get('category', ''),
-                    item.get('description', ''),
-                    item.get('source', '')
-                ]
-                english_rows.append(row)
-            
-            # Upload English data
-            if english_rows:
-                english_worksheet.append_rows(english_rows)
-                self.logger.info(f"Successfully uploaded {len(english_rows)} rows to English worksheet")
+            spanish_headers = self.translator.get_spanish_headers(self.columns)
             
-            # Translate data for Spanish worksheet
-            self.logger.info("Translating data to Spanish...")
-            translated_data = self.translator.translate_data(data)
+            # Prepare English and Spanish data
+            english_rows = self.build_rows(data)
+            spanish_rows = self.build_rows(translated_data)
             
-            # Prepare Spanish data
-            spanish_rows = []
-            for item in translated_data:
-                row = [
-                    item.get('title', ''),
-                    item.get('url', ''),
-                    item.get('category', ''),
-                    item.get('description', ''),
-                    item.get('source', '')
-                ]
-                spanish_rows.append(row)
-            
-            # Upload Spanish data
-            if spanish_rows:
-                spanish_worksheet.append_rows(spanish_rows)
-                self.logger.info(f"Successfully uploaded {len(spanish_rows)} rows to Spanish worksheet")
+            # Both tabs are written by a single batchUpdate call
+            self._run_with_fresh_handles(lambda: self._write_rows(english_rows, spanish_rows, spanish_headers))
+            if data:
+                self.logger.info(f"Successfully uploaded {len(data)} rows to English and Spanish worksheets")
+                self.url_index.add_many([item.get('url', '') for item in data])
+                if self.near_duplicates is not None:
+                    self.near_duplicates.add_many(data)
             
             return True
                 
@@ -159,40 +438,151 @@ class GoogleSheetsManager:
             self.logger.error(f"Error uploading data: {str(e)}")
             return False
     
+    def _append_rows(self, worksheet_name, headers, rows):
+        """Append rows to one worksheet, adding (or extending) the header row the first time the tab is written"""
+        worksheet = self._get_upload_worksheet(worksheet_name, headers)
+        
+        # A deleted or renamed tab makes appendCells fail, which refreshes the handles and this set
+        requests = []
+        if worksheet_name not in self.headed_worksheets:
+            header = self._get_header_rows([worksheet])[0]
+            if not header:
+                rows = [headers] + rows
+                self.logger.info(f"Adding headers to worksheet: {worksheet_name}")
+            requests = self._add_header_columns_requests(worksheet, header, headers)
+        
+        self._throttle()
+        self.sheet.batch_update({'requests': requests + [self._append_cells_request(worksheet, rows)]})
+        self.headed_worksheets.add(worksheet_name)
+    
+    def upload_english_batch(self, data):
+        """Append results to the English worksheet and index their URLs; the Spanish tab is written separately
+        (a failed Spanish write is the caller's to record, since these URLs are already indexed)"""
+        try:
+            if not self.get_or_create_sheet():
+                return False
+            
+            english_rows = self.build_rows(data)
+            self._run_with_fresh_handles(lambda: self._append_rows(self.sheet_name, self.columns, english_rows))
+            self.logger.info(f"Uploaded {len(data)} rows to the English worksheet")
+            
+            self.url_index.add_many([item.get('url', '') for item in data])
+            if self.near_duplicates is not None:
+                self.near_duplicates.add_many(data)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error uploading English rows: {str(e)}")
+            return False
+    
+    def upload_spanish_batch(self, data):
+        """Translate results and append them to the Spanish worksheet"""
+        try:
+            if not self.get_or_create_sheet():
+                return False
+            
+            spanish_headers = self.translator.get_spanish_headers(self.columns)
+            spanish_rows = self.build_rows(self.translator.translate_data(data))
+            self._run_with_fresh_handles(lambda: self._append_rows(SPANISH_SHEET_NAME, spanish_headers, spanish_rows))
+            self.logger.info(f"Uploaded {len(data)} rows to the Spanish worksheet")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error uploading Spanish rows: {str(e)}")
+            return False
+    
+    def start_batch_upload(self, batch_size=PIPELINE_BATCH_SIZE, flush_seconds=UPLOAD_FLUSH_SECONDS,
+                           on_spanish_failed=None):
+        """Get an uploader that takes results one at a time and writes them in micro-batches"""
+        return BatchUploader(self, batch_size, flush_seconds, on_spanish_failed)
+    
     def get_existing_urls(self):
-        """Get existing URLs to avoid duplicates from both worksheets"""
+        """Get the index of URLs already uploaded, to avoid duplicates"""
+        # The local index is kept up to date by upload_data; the sheet is only read
+        # the first time (to seed the index) or when sync_url_index() is called
+        if self.url_index.last_reconciled_at() is None:
+            self.logger.info("URL index has never been synced, seeding it from the sheet")
+            self.sync_url_index()
+        
+        return self.url_index
+    
+    def get_near_duplicate_index(self):
+        """Get the fingerprint index of uploaded results, or None when near-duplicate detection is disabled"""
+        if self.near_duplicates is None:
+            return None
+        if self.near_duplicates.last_reconciled_at() is None:
+            self.logger.info("Near-duplicate index has never been synced, seeding it from the sheet")
+            self.sync_url_index()
+        
+        return self.near_duplicates
+    
+    def _read_rows(self, worksheet_name, headers):
+        """Read every data row of a worksheet as dicts keyed like scraped results (skipping the header)"""
+        worksheet = self.get_or_create_worksheet(worksheet_name, headers)
+        if not worksheet:
+            return []
+        self._throttle()
+        keys = [column.lower() for column in self.columns]
+        return [dict(zip(keys, row)) for row in worksheet.get_all_values()[1:]]
+    
+    def _read_urls(self, worksheet_name, headers):
+        """Read the URL column of a worksheet (skipping the header)"""
+        worksheet = self.get_or_create_worksheet(worksheet_name, headers)
+        if not worksheet:
+            return []
+        self._throttle()
+        return [url for url in worksheet.col_values(self.columns.index('URL') + 1)[1:] if url]
+    
+    def sync_url_index(self):
+        """Rebuild the local URL index (and near-duplicate fingerprints) from both worksheets"""
         try:
             if not self.get_or_create_sheet():
-                return set()
+                return False
             
             urls = set()
             
-            # Get URLs from English worksheet
+            # Get URLs from English worksheet; its titles and descriptions seed the near-duplicate index
             try:
-                english_worksheet = self.get_or_create_worksheet(self.sheet_name, self.columns)
-                if english_worksheet:
-                    all_values = english_worksheet.get_all_values()
-                    if len(all_values) > 1:  # More than just headers
-                        urls.update([row[2] for row in all_values[1:] if len(row) > 2 and row[2]])
+                if self.near_duplicates is not None:
+                    english_rows = self._run_with_fresh_handles(lambda: self._read_rows(self.sheet_name, self.columns))
+                    urls.update(row['url'] for row in english_rows if row.get('url'))
+                else:
+                    urls.update(self._run_with_fresh_handles(lambda: self._read_urls(self.sheet_name, self.columns)))
             except Exception as e:
                 self.logger.warning(f"Error getting URLs from English worksheet: {str(e)}")
+                return False
             
             # Get URLs from Spanish worksheet
             try:
-                spanish_headers = self.translator.get_spanish_headers()
-                spanish_worksheet = self.get_or_create_worksheet(SPANISH_SHEET_NAME, spanish_headers)
-                if spanish_worksheet:
-                    all_values = spanish_worksheet.get_all_values()
-                    if len(all_values) > 1:  # More than just headers
-                        urls.update([row[2] for row in all_values[1:] if len(row) > 2 and row[2]])
+                spanish_headers = self.translator.get_spanish_headers(self.columns)
+                urls.update(self._run_with_fresh_handles(lambda: self._read_urls(SPANISH_SHEET_NAME, spanish_headers)))
             except Exception as e:
                 self.logger.warning(f"Error getting URLs from Spanish worksheet: {str(e)}")
+                return False
             
-            return urls
+            self.url_index.replace_all(urls)
+            self.logger.info(f"Synced URL index with sheet: {len(urls)} URLs")
+            if self.near_duplicates is not None:
+                self.near_duplicates.replace_all(english_rows)
+                self.logger.info(f"Synced near-duplicate index with sheet: {len(self.near_duplicates)} fingerprints")
+            return True
             
         except Exception as e:
-            self.logger.error(f"Error getting existing URLs: {str(e)}")
-            return set()
+            self.logger.error(f"Error syncing URL index: {str(e)}")
+            return False
+    
+    def _clear_worksheet(self, worksheet_name, headers):
+        """Delete every row below the header; returns True if anything was cleared"""
+        worksheet = self.get_or_create_worksheet(worksheet_name, headers)
+        if not worksheet:
+            return False
+        self._throttle()
+        all_values = worksheet.get_all_values()
+        if len(all_values) > 1:
+            self._throttle()
+            worksheet.delete_rows(2, len(all_values))
+            return True
+        return False
     
     def clear_sheet(self):
         """Clear all data from both worksheets (keep headers)"""
@@ -204,31 +594,28 @@ class GoogleSheetsManager:
             
             # Clear English worksheet
             try:
-                english_worksheet = self.get_or_create_worksheet(self.sheet_name, self.columns)
-                if english_worksheet:
-                    all_values = english_worksheet.get_all_values()
-                    if len(all_values) > 1:
-                        english_worksheet.delete_rows(2, len(all_values))
-                        self.logger.info("Cleared all data from English worksheet")
+                if self._run_with_fresh_handles(lambda: self._clear_worksheet(self.sheet_name, self.columns)):
+                    self.logger.info("Cleared all data from English worksheet")
             except Exception as e:
                 self.logger.error(f"Error clearing English worksheet: {str(e)}")
                 success = False
             
             # Clear Spanish worksheet
             try:
-                spanish_headers = self.translator.get_spanish_headers()
-                spanish_worksheet = self.get_or_create_worksheet(SPANISH_SHEET_NAME, spanish_headers)
-                if spanish_worksheet:
-                    all_values = spanish_worksheet.get_all_values()
-                    if len(all_values) > 1:
-                        spanish_worksheet.delete_rows(2, len(all_values))
-                        self.logger.info("Cleared all data from Spanish worksheet")
+                spanish_headers = self.translator.get_spanish_headers(self.columns)
+                if self._run_with_fresh_handles(lambda: self._clear_worksheet(SPANISH_SHEET_NAME, spanish_headers)):
+                    self.logger.info("Cleared all data from Spanish worksheet")
             except Exception as e:
                 self.logger.error(f"Error clearing Spanish worksheet: {str(e)}")
                 success = False
             
+            if success:
+                self.url_index.clear()
+                if self.near_duplicates is not None:
+                    self.near_duplicates.clear()
+            
             return success
             
         except Exception as e:
             self.logger.error(f"Error clearing sheets: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
@@ -0,0 +1,62 @@
+"""
+Test script for the per-engine circuit breaker
+"""
+
+import time
+
+from engine_health import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+def test_opens_after_consecutive_failures():
+    """Failures below the threshold keep the circuit closed; a success resets the count"""
+    breaker = CircuitBreaker('test', failure_threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+
+def test_blocked_opens_immediately():
+    """A captcha or 403/429 opens the circuit on the first occurrence, for at least Retry-After"""
+    breaker = CircuitBreaker('test', failure_threshold=3, cooldown=1)
+    breaker.record_failure(blocked=True, retry_after=120)
+    assert breaker.state == OPEN
+    assert breaker.seconds_until_retry() > 100
+
+def test_half_open_probe():
+    """After the cooldown one probe goes out; it closes the circuit, or reopens it for twice as long"""
+    breaker = CircuitBreaker('test', failure_threshold=1, cooldown=0.05, max_cooldown=1)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # Only one probe at a time
+
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.cooldown == 0.1
+    time.sleep(0.11)
+
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.cooldown == 0.05
+
+def test_backoff_is_capped_and_jittered():
+    """Backoff grows exponentially but never past the cap"""
+    breaker = CircuitBreaker('test')
+    delays = [breaker.get_backoff(10) for _ in range(100)]
+    assert all(0 <= delay <= 20 for delay in delays)
+    assert len(set(delays)) > 1
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_blocked_opens_immediately()
+    test_half_open_probe()
+    test_backoff_is_capped_and_jittered()
+    print("Circuit breaker tests passed")
@@ -0,0 +1,105 @@
+"""
+Test script for landing-page enrichment
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from enrichment import PageEnricher, extract_fields, html_to_text
+from pipeline import ScrapePipeline
+from test_pipeline import FakeSheetsManager, build_scraper, make_engine
+
+CAMP_PAGE = b"""<html><head><style>.fee { color: red }</style><script>var deadline = "May 1";</script></head>
+<body><h1>AI Summer Camp</h1><p>Open to students in grades 9&ndash;12.</p>
+<p>Tuition: $1,200 for the two-week session, $2,400 for the full summer.</p>
+<p>Application deadline: March 15, 2026</p></body></html>"""
+
+class PageHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+        if self.path == '/camp':
+            self.wfile.write(CAMP_PAGE)
+        elif self.path == '/big':
+            # The fields sit past the byte cap
+            self.wfile.write(b'<p>' + b'x' * 100000 + b'</p><p>Tuition: $500</p>')
+        elif self.path == '/slow':
+            self.wfile.write(b'<p>Grades 6-8.</p>')
+            self.wfile.flush()
+            for _ in range(20):
+                time.sleep(0.1)
+                self.wfile.write(b'<p>Tuition: $300</p>')
+                self.wfile.flush()
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_extract_fields():
+    """Deadline, tuition and grades come out normalized; scripts and styles are ignored"""
+    assert extract_fields(html_to_text(CAMP_PAGE.decode())) == {
+        'deadline': '2026-03-15', 'tuition': '$1,200-$2,400', 'grades': '9-12'
+    }
+    assert extract_fields("Applications are due by 4/1/26. Free of charge for high school students.") == {
+        'deadline': '2026-04-01', 'tuition': 'Free', 'grades': '9-12'
+    }
+    assert extract_fields("Campers ages 12 to 15. Priority deadline Feb 30.") == {
+        'deadline': '', 'tuition': '', 'grades': 'Ages 12-15'
+    }
+
+def test_byte_and_time_caps():
+    """Only the first max_bytes are read, and a page that trickles in is cut off at its deadline"""
+    server, base_url = start_server()
+    try:
+        enricher = PageEnricher(max_bytes=16 * 1024, page_deadline=0.5)
+        assert enricher.enrich({'url': f"{base_url}/camp"})['deadline'] == '2026-03-15'
+        assert enricher.enrich({'url': f"{base_url}/big"})['tuition'] == ''
+
+        started_at = time.monotonic()
+        slow = enricher.enrich({'url': f"{base_url}/slow", 'title': 'Slow camp'})
+        assert time.monotonic() - started_at < 1.5
+        # What arrived before the deadline is still used
+        assert slow['grades'] == '6-8' and slow['title'] == 'Slow camp'
+        enricher.close()
+    finally:
+        server.shutdown()
+
+class SlowEnricher(PageEnricher):
+    """Takes page_seconds per page without touching the network"""
+
+    def __init__(self, page_seconds, **kwargs):
+        super().__init__(**kwargs)
+        self.page_seconds = page_seconds
+
+    def enrich(self, result):
+        time.sleep(self.page_seconds)
+        return dict(result, deadline='2026-03-15')
+
+def test_enrichment_does_not_slow_the_scrape():
+    """Every result is uploaded once, and enrichment that can't keep up leaves results unenriched instead of waiting"""
+    sheets_manager = FakeSheetsManager()
+    scraper = build_scraper(sheets_manager, [make_engine('Bing')])
+    enricher = SlowEnricher(0.2, max_concurrency=2, backlog=4)
+    pipeline = ScrapePipeline(scraper, set(), search_workers=2, batch_size=10, enricher=enricher)
+
+    started_at = time.monotonic()
+    assert pipeline.run(['ai camp', 'robotics camp', 'coding camp'], 10) == 30
+    # Enriching all 30 at two at a time would take 3s
+    assert time.monotonic() - started_at < 2
+    uploaded = [item for batch in sheets_manager.english_batches for item in batch]
+    assert len({item['url'] for item in uploaded}) == 30
+    enriched = [item for item in uploaded if item.get('deadline')]
+    assert 4 <= len(enriched) < 30
+
+if __name__ == "__main__":
+    test_extract_fields()
+    test_byte_and_time_caps()
+    test_enrichment_does_not_slow_the_scrape()
+    print("Enrichment tests passed")
@@ -0,0 +1,106 @@
+"""
+Test script for Google Custom Search pagination
+"""
+
+import os
+import tempfile
+import threading
+import requests
+
+from google_api import GoogleCustomSearch
+from quota_ledger import QuotaLedger
+
+class FakeCustomSearchSession:
+    """Answers Custom Search requests with numbered results and records the requested pages"""
+
+    def __init__(self, total_results):
+        self.total_results = total_results
+        self.starts = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, **kwargs):
+        start = params.get('start', 1)
+        with self.lock:
+            self.starts.append(start)
+        items = [
+            {'title': f"Camp {rank}", 'link': f"https://camp{rank}.org/", 'snippet': 'AI summer camp'}
+            for rank in range(start, min(start + params['num'], self.total_results + 1))
+        ]
+        response = requests.Response()
+        response.status_code = 200
+        response.json = lambda: {'searchInformation': {'totalResults': str(self.total_results)}, 'items': items}
+        return response
+
+def build_search(total_results, daily_quota=100):
+    google_api = GoogleCustomSearch.__new__(GoogleCustomSearch)
+    google_api.api_key = 'test'
+    google_api.search_engine_id = 'test'
+    google_api.base_url = 'https://www.googleapis.com/customsearch/v1'
+    google_api.session = FakeCustomSearchSession(total_results)
+    google_api.ledger = QuotaLedger(os.path.join(tempfile.mkdtemp(), 'google_quota.sqlite'), daily_quota)
+    google_api.page_budget = None
+    return google_api
+
+def test_pagination():
+    """Pages start at 1, 11, 21, ... and the last page only asks for what is left"""
+    google_api = build_search(1000)
+    results = google_api.search('ai summer camp', 35)
+    assert [result['title'] for result in results] == [f"Camp {rank}" for rank in range(1, 36)]
+    assert sorted(google_api.session.starts) == [1, 11, 21, 31]
+
+def test_stops_at_total_results():
+    """No page is requested past the query's totalResults"""
+    google_api = build_search(14)
+    assert len(google_api.search('ai summer camp', 50)) == 14
+    assert sorted(google_api.session.starts) == [1, 11]
+
+def test_stops_on_known_urls():
+    """A first page of already-known URLs costs one query and nothing more"""
+    google_api = build_search(1000)
+    known_urls = {f"https://camp{rank}.org/" for rank in range(1, 11)}
+    assert len(google_api.search('ai summer camp', 100, known_urls=known_urls)) == 10
+    assert google_api.session.starts == [1]
+
+def test_early_stop_keeps_paid_pages():
+    """Stopping on a page of known URLs still records and keeps the rest of its wave, and sends no further wave"""
+    google_api = build_search(1000)
+    known_urls = {f"https://camp{rank}.org/" for rank in range(11, 21)}
+    results = google_api.search('ai summer camp', 100, known_urls=known_urls)
+
+    assert sorted(google_api.session.starts) == [1, 11, 21, 31]
+    assert len(results) == 40
+    statuses = google_api.ledger.connection.execute("SELECT status FROM calls").fetchall()
+    assert len(statuses) == 4 and ('pending',) not in statuses
+
+def test_daily_budget():
+    """Calls are recorded in the ledger, and Google is skipped once the day's budget is spent"""
+    google_api = build_search(1000, daily_quota=3)
+    assert len(google_api.search('ai summer camp', 50)) == 30
+    assert google_api.ledger.get_usage() == (3, 0)
+    assert google_api.search('robotics camp', 10) == []
+    assert len(google_api.session.starts) == 3
+
+def test_budget_planning():
+    """Keywords without history are tried first, then the budget goes to the highest-yield keywords"""
+    google_api = build_search(1000, daily_quota=100)
+    known_urls = {f"https://camp{rank}.org/" for rank in range(1, 11)}
+    google_api.search('well known camps', 10, known_urls=known_urls)
+    google_api.search('fresh camps', 10)
+
+    google_api.ledger.daily_quota = 2 + 3  # Two calls spent, three left
+    plan = google_api.ledger.plan(['well known camps', 'fresh camps', 'new keyword'], 2)
+    assert plan == {'new keyword': 2, 'fresh camps': 1, 'well known camps': 0}
+
+    # Keywords the plan left out are skipped without a request
+    google_api.page_budget = plan
+    assert google_api.search('well known camps', 10) == []
+    assert len(google_api.session.starts) == 2
+
+if __name__ == "__main__":
+    test_pagination()
+    test_stops_at_total_results()
+    test_stops_on_known_urls()
+    test_early_stop_keeps_paid_pages()
+    test_daily_budget()
+    test_budget_planning()
+    print("Google Custom Search pagination tests passed")
@@ -0,0 +1,123 @@
+"""
+Test script for the on-disk HTTP cache
+"""
+
+import os
+import logging
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_cache import HTTPCache, CachedSession
+from engine_health import EngineHealthTracker, EngineUnavailable
+from scraper import WebScraper
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves /page with an ETag (answering 304 when it still matches) and /captcha as a block page"""
+
+    version = 'v1'
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        PageHandler.requests_seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/page') and self.headers.get('If-None-Match') == PageHandler.version:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html>captcha</html>' if self.path.startswith('/captcha') else f"page {PageHandler.version}".encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', PageHandler.version)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server():
+    PageHandler.version = 'v1'
+    PageHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def build_session():
+    cache = HTTPCache(os.path.join(tempfile.mkdtemp(), 'http_cache.sqlite'), ttls={'127.0.0.1': 3600})
+    return CachedSession(cache=cache)
+
+def expire_all(cache):
+    with cache.lock:
+        cache.connection.execute("UPDATE responses SET expires_at = 0")
+        cache.connection.commit()
+
+def test_fresh_hits_skip_the_network():
+    """A fresh entry is served from disk and marked from_cache; uncached hosts always go out"""
+    server, base_url = start_server()
+    try:
+        session = build_session()
+        first = session.get(f"{base_url}/page?q=camp")
+        second = session.get(f"{base_url}/page", params={'q': 'camp'})
+        assert not first.from_cache and second.from_cache
+        assert second.text == 'page v1' and len(PageHandler.requests_seen) == 1
+
+        session.cache.ttls = {}
+        assert not session.get(f"{base_url}/page?q=camp").from_cache
+        assert len(PageHandler.requests_seen) == 2
+    finally:
+        server.shutdown()
+
+def test_expired_entries_are_revalidated():
+    """Past its TTL an entry is revalidated with its ETag: a 304 keeps the body, a 200 replaces it"""
+    server, base_url = start_server()
+    try:
+        session = build_session()
+        session.get(f"{base_url}/page")
+
+        expire_all(session.cache)
+        revalidated = session.get(f"{base_url}/page")
+        assert PageHandler.requests_seen[-1] == ('/page', 'v1')
+        assert revalidated.from_cache and revalidated.text == 'page v1'
+        assert session.cache.stats.revalidated == 1
+
+        PageHandler.version = 'v2'
+        expire_all(session.cache)
+        changed = session.get(f"{base_url}/page")
+        assert not changed.from_cache and changed.text == 'page v2'
+        assert session.get(f"{base_url}/page").text == 'page v2'
+        assert len(PageHandler.requests_seen) == 3
+    finally:
+        server.shutdown()
+
+def test_block_page_is_evicted():
+    """A captcha page opens the engine's circuit and is dropped from the cache, so no later run replays it"""
+    server, base_url = start_server()
+    try:
+        scraper = WebScraper.__new__(WebScraper)
+        scraper.logger = logging.getLogger(__name__)
+        scraper.session = build_session()
+        scraper.engine_health = EngineHealthTracker()
+        try:
+            scraper._fetch_serp('bing', f"{base_url}/captcha?q=camp", 10)
+            assert False, "the block page should have raised"
+        except EngineUnavailable:
+            pass
+        assert scraper.engine_health.get('bing').is_open()
+        assert scraper.session.cache.connection.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+        scraper.engine_health = EngineHealthTracker()
+        try:
+            scraper._fetch_serp('bing', f"{base_url}/captcha?q=camp", 10)
+        except EngineUnavailable:
+            pass
+        assert len(PageHandler.requests_seen) == 2
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    test_fresh_hits_skip_the_network()
+    test_expired_entries_are_revalidated()
+    test_block_page_is_evicted()
+    print("HTTP cache tests passed")
@@ -0,0 +1,45 @@
+"""
+Test script for the precompiled keyword rules
+"""
+
+from keyword_matcher import KeywordMatcher, ahocorasick
+from scraper import WebScraper
+from config import CATEGORIES
+
+def get_backends():
+    """Backends available in this environment"""
+    return ['regex', 'aho-corasick'] if ahocorasick is not None else ['regex']
+
+def test_keyword_matcher():
+    """Every keyword that occurs as a substring is found, overlapping ones included"""
+    keywords = ['public program', 'program dates', 'program', 'fund', 'funding', 'mit', 'ai']
+    
+    for backend in get_backends():
+        matcher = KeywordMatcher(keywords, backend=backend)
+        text = 'submit for our public program dates and funding'
+        expected = {keyword for keyword in keywords if keyword in text}
+        found = matcher.find_all(text)
+        assert found == expected
+        assert matcher.find_all('') == set()
+
+def test_categorization_rules():
+    """Relevance filtering and categorization keep the original rules and weights"""
+    scraper = WebScraper.__new__(WebScraper)  # Rules only; no network clients needed
+    
+    assert not scraper._is_relevant_result('AI - Wikipedia', 'Artificial intelligence', 'https://en.wikipedia.org/wiki/AI')
+    assert not scraper._is_relevant_result('AI camp', 'no url', '/relative/link')
+    assert scraper._is_relevant_result('AI Summer Camp', 'Apply now', 'https://example.com/camp')
+    
+    # Title match (5) beats a description match (3)
+    assert scraper.categorize_result(
+        'Stanford AI Fellowship', 'Full scholarship available', 'https://example.com'
+    ) == CATEGORIES['SECONDARY_SCHOOL_FELLOWSHIP']
+    
+    # URL-only fallbacks
+    assert scraper.categorize_result('AI Camp', 'Summer fun', 'https://community.example.org') == CATEGORIES['STATE_LOCAL_OPPORTUNITY']
+    assert scraper.categorize_result('AI Camp', 'Summer fun', 'https://example.org') == CATEGORIES['OTHER']
+
+if __name__ == "__main__":
+    test_keyword_matcher()
+    test_categorization_rules()
+    print("Keyword matcher tests passed")
@@ -0,0 +1,58 @@
+"""
+Test script for the metrics registry and its Prometheus text output
+"""
+
+from metrics import MetricsRegistry, RESULTS_DROPPED, get_sheets_operation
+from scraper import WebScraper
+
+def test_render():
+    """Counters render one line per label set; histograms render cumulative buckets, sum and count"""
+    registry = MetricsRegistry()
+    requests_total = registry.counter('test_requests_total', "Requests", ['engine', 'status'])
+    request_seconds = registry.histogram('test_request_seconds', "Latency", ['engine'], buckets=[0.1, 1])
+
+    requests_total.inc('bing', 'ok')
+    requests_total.inc('bing', 'ok')
+    requests_total.inc('bing', '429')
+    for value in (0.05, 0.5, 5):
+        request_seconds.observe(value, 'bing')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE test_requests_total counter' in lines
+    assert 'test_requests_total{engine="bing",status="ok"} 2' in lines
+    assert 'test_requests_total{engine="bing",status="429"} 1' in lines
+    assert 'test_request_seconds_bucket{engine="bing",le="0.1"} 1' in lines
+    assert 'test_request_seconds_bucket{engine="bing",le="1"} 2' in lines
+    assert 'test_request_seconds_bucket{engine="bing",le="+Inf"} 3' in lines
+    assert 'test_request_seconds_count{engine="bing"} 3' in lines
+    assert 'test_request_seconds_sum{engine="bing"} 5.55' in lines
+
+def test_sheets_operations():
+    """Sheets API URLs map to a small set of operation labels"""
+    base = 'https://sheets.googleapis.com/v4/spreadsheets/abc'
+    assert get_sheets_operation('GET', base) == 'metadata'
+    assert get_sheets_operation('GET', f"{base}/values/'Sheet1'!B1:B?majorDimension=COLUMNS") == 'values_get'
+    assert get_sheets_operation('POST', f"{base}/values/'Sheet1':append") == 'values_append'
+    assert get_sheets_operation('GET', f"{base}/values:batchGet?ranges=A1") == 'values_batch_get'
+    assert get_sheets_operation('POST', f"{base}:batchUpdate") == 'batch_update'
+
+def test_dropped_results_counted():
+    """remove_duplicates counts what it drops and why"""
+    scraper = WebScraper.__new__(WebScraper)
+    duplicates = RESULTS_DROPPED.get('duplicate')
+    existing = RESULTS_DROPPED.get('existing')
+    results = [
+        {'url': 'https://example.com/camp'},
+        {'url': 'https://www.example.com/camp/'},
+        {'url': 'https://other.org/program'}
+    ]
+
+    scraper.remove_duplicates(results, {'https://other.org/program'})
+    assert RESULTS_DROPPED.get('duplicate') == duplicates + 1
+    assert RESULTS_DROPPED.get('existing') == existing + 1
+
+if __name__ == "__main__":
+    test_render()
+    test_sheets_operations()
+    test_dropped_results_counted()
+    print("Metrics tests passed")
@@ -0,0 +1,45 @@
+"""
+Test script for near-duplicate result detection
+"""
+
+import os
+import tempfile
+
+from near_duplicates import NearDuplicateIndex, minhash, similarity
+
+PROGRAM = {
+    'title': 'Stanford AI4ALL Summer Program',
+    'url': 'https://ai4all.stanford.edu/',
+    'description': 'Free AI camp for high school students. Apply by March 1 for the 3-week residential program at Stanford University.'
+}
+
+def test_minhash():
+    """Reworded copies stay above the similarity threshold; unrelated programs don't"""
+    reworded = 'Stanford AI4ALL Summer Program | Free AI camp for high school students. Apply by March 1st for the 3-week residential program at Stanford University'
+    unrelated = 'MIT Beaver Works Summer Institute: a rigorous four-week STEM program for rising seniors with online courses and team projects.'
+    original = minhash(f"{PROGRAM['title']} {PROGRAM['description']}")
+    
+    assert similarity(original, minhash(reworded)) >= 0.7
+    assert similarity(original, minhash(unrelated)) < 0.3
+    assert minhash('AI camp') is None  # Too short to compare
+
+def test_filter_results():
+    """Near-duplicates are dropped against both history and earlier results in the batch"""
+    index = NearDuplicateIndex(os.path.join(tempfile.mkdtemp(), 'near_duplicates.sqlite'))
+    index.add_many([PROGRAM])
+    
+    syndicated = dict(PROGRAM, url='https://camps-aggregator.com/listing/123', title='Stanford AI4ALL Summer Program - Camps Aggregator')
+    new_program = {
+        'title': 'UT Austin Summer Computing Academy',
+        'url': 'https://cs.utexas.edu/summer',
+        'description': 'Week-long day camps in programming, robotics and machine learning for middle and high school students.'
+    }
+    mirror = dict(new_program, url='https://mirror.example.org/utexas-summer')
+    
+    kept = index.filter_results([syndicated, new_program, mirror])
+    assert [result['url'] for result in kept] == ['https://cs.utexas.edu/summer']
+
+if __name__ == "__main__":
+    test_minhash()
+    test_filter_results()
+    print("Near-duplicate tests passed")
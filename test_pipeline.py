@@ -0,0 +1,221 @@
+"""
+Test script for the streaming scrape pipeline
+"""
+
+import os
+import time
+import logging
+import tempfile
+import threading
+
+from scraper import WebScraper
+from engine_health import EngineHealthTracker
+from pipeline import ScrapePipeline
+from sheets_manager import BatchUploader
+from search_engines import ScraperEngine
+from run_journal import RunJournal
+from config import SEARCH_KEYWORDS
+
+class FakeSheetsManager:
+    """Records the English and Spanish batches in write order; rejects the English batches in fail_batches
+    and the Spanish write attempts in fail_spanish_batches"""
+
+    def __init__(self, fail_batches=(), translate_seconds=0, fail_spanish_batches=()):
+        self.fail_batches = set(fail_batches)
+        self.fail_spanish_batches = set(fail_spanish_batches)
+        self.spanish_attempts = 0
+        self.translate_seconds = translate_seconds
+        self.english_batches = []
+        self.spanish_batches = []
+        self.writes = []
+        self.first_upload = threading.Event()
+        self.lock = threading.Lock()
+
+    def get_existing_urls(self):
+        return {item['url'] for batch in self.english_batches for item in batch}
+
+    def get_near_duplicate_index(self):
+        return None
+
+    def start_batch_upload(self, batch_size, flush_seconds, on_spanish_failed=None):
+        return BatchUploader(self, batch_size, flush_seconds, on_spanish_failed)
+
+    def upload_english_batch(self, data):
+        with self.lock:
+            self.writes.append('en')
+            self.english_batches.append(data)
+            self.first_upload.set()
+            return len(self.english_batches) - 1 not in self.fail_batches
+
+    def upload_spanish_batch(self, data):
+        time.sleep(self.translate_seconds)
+        with self.lock:
+            self.spanish_attempts += 1
+            if self.spanish_attempts - 1 in self.fail_spanish_batches:
+                return False
+            self.writes.append('es')
+            self.spanish_batches.append([dict(item, title=f"ES {item['title']}") for item in data])
+            return True
+
+def build_scraper(sheets_manager, engines):
+    scraper = WebScraper.__new__(WebScraper)
+    scraper.logger = logging.getLogger(__name__)
+    scraper.active_journal = None
+    scraper.engine_health = EngineHealthTracker()
+    scraper.sheets_manager = sheets_manager
+    scraper.engines = [
+        ScraperEngine(scraper, name.lower(), {'label': name, 'max_concurrency': 2}, search) for name, search in engines
+    ]
+    return scraper
+
+def make_engine(name, overlap=0, delay=0):
+    def search(keyword, max_results):
+        time.sleep(delay)
+        return [
+            {'title': f"{keyword} camp {rank}", 'url': f"https://{keyword.replace(' ', '-')}-{rank}.org/", 'source': name}
+            for rank in range(overlap, overlap + max_results)
+        ]
+    return name, search
+
+def test_streams_unique_results_in_batches():
+    """Results from every search reach the sheet once each, in batches, with their translations"""
+    sheets_manager = FakeSheetsManager()
+    scraper = build_scraper(sheets_manager, [make_engine('Bing'), make_engine('DuckDuckGo', overlap=5)])
+    pipeline = ScrapePipeline(scraper, {'https://ai-camp-0.org/'}, search_workers=4, queue_size=3, batch_size=4)
+
+    uploaded = pipeline.run(['ai camp', 'robotics camp'], 10)
+    urls = [item['url'] for batch in sheets_manager.english_batches for item in batch]
+    # 15 distinct URLs per keyword across both engines, one already in the sheet
+    assert uploaded == 29 and pipeline.ok
+    assert len(urls) == len(set(urls)) == 29
+    assert all(len(batch) <= 4 for batch in sheets_manager.english_batches)
+    assert [item['title'] for batch in sheets_manager.spanish_batches for item in batch] == [
+        f"ES {item['title']}" for batch in sheets_manager.english_batches for item in batch
+    ]
+
+def test_spanish_trails_by_one_batch():
+    """Slow translation holds the English tab back rather than letting the Spanish tab fall further behind"""
+    sheets_manager = FakeSheetsManager(translate_seconds=0.02)
+    scraper = build_scraper(sheets_manager, [make_engine('Bing')])
+    pipeline = ScrapePipeline(scraper, set(), search_workers=2, batch_size=3)
+
+    assert pipeline.run(['ai camp', 'robotics camp', 'coding camp'], 10) == 30
+    english_written = spanish_written = 0
+    for write in sheets_manager.writes:
+        english_written += write == 'en'
+        spanish_written += write == 'es'
+        assert english_written - spanish_written <= 1
+    assert english_written == spanish_written == 10
+
+def test_partial_batches_flush_on_time():
+    """While the searches are slow, a partial batch goes out once it is flush_seconds old"""
+    sheets_manager = FakeSheetsManager()
+    _, bing = make_engine('Bing', delay=0.1)
+    uploaded_before_last_search = []
+
+    def search(keyword, max_results):
+        if keyword == 'coding camp':
+            # The last search only finishes once an earlier search's rows are in the sheet
+            uploaded_before_last_search.append(sheets_manager.first_upload.wait(timeout=5))
+        return bing(keyword, max_results)
+
+    scraper = build_scraper(sheets_manager, [('Bing', search)])
+    pipeline = ScrapePipeline(scraper, set(), batch_size=100, flush_seconds=0.05)
+
+    assert pipeline.run(['ai camp', 'robotics camp', 'coding camp'], 5) == 15
+    assert uploaded_before_last_search == [True]
+    assert [len(batch) for batch in sheets_manager.english_batches] == [5, 5, 5]
+
+def test_failures_do_not_stall():
+    """A rejected batch or a failing search is reported, and the rest of the run still goes through"""
+    def broken(keyword, max_results):
+        raise RuntimeError('engine down')
+
+    sheets_manager = FakeSheetsManager(fail_batches={0})
+    scraper = build_scraper(sheets_manager, [make_engine('Bing'), ('Broken', broken)])
+    pipeline = ScrapePipeline(scraper, set(), search_workers=2, queue_size=1, batch_size=5)
+
+    assert pipeline.run(['ai camp', 'robotics camp'], 10) == 15
+    assert pipeline.failed == 5 and not pipeline.ok
+    assert len(pipeline.errors) == 2
+
+    # A failing search alone is enough to keep the journal for --resume
+    sheets_manager = FakeSheetsManager()
+    scraper = build_scraper(sheets_manager, [make_engine('Bing'), ('Broken', broken)])
+    pipeline = ScrapePipeline(scraper, set(), search_workers=2, batch_size=5)
+    assert pipeline.run(['ai camp'], 10) == 10
+    assert pipeline.failed == 0 and pipeline.errors == ["Broken 'ai camp': engine down"] and not pipeline.ok
+
+def test_spanish_failures_are_resumed():
+    """A batch the Spanish tab rejects is kept in the journal, and --resume writes only its Spanish rows"""
+    journal_file = os.path.join(tempfile.mkdtemp(), 'run_journal.sqlite')
+    sheets_manager = FakeSheetsManager(fail_spanish_batches={0})
+    scraper = build_scraper(sheets_manager, [make_engine('Bing')])
+    scraper.active_journal = RunJournal(journal_file)
+    scraper.active_journal.start()
+
+    pipeline = ScrapePipeline(scraper, set(), search_workers=1, batch_size=5)
+    assert pipeline.run(['ai camp'], 10) == 10
+    assert pipeline.spanish_failed == 5 and not pipeline.ok
+    failed_urls = [item['url'] for item in sheets_manager.english_batches[0]]
+    assert [item['url'] for item in scraper.active_journal.get_spanish_pending()] == failed_urls
+
+    scraper.active_journal = RunJournal(journal_file)
+    scraper.active_journal.start(resume=True)
+    uploaded_urls = {item['url'] for batch in sheets_manager.english_batches for item in batch}
+    resumed = ScrapePipeline(scraper, uploaded_urls, search_workers=1, batch_size=5)
+    assert resumed.run(['ai camp'], 10) == 0 and resumed.ok
+    assert [item['url'] for item in sheets_manager.spanish_batches[-1]] == failed_urls
+    assert len(sheets_manager.english_batches) == 2
+    assert scraper.active_journal.get_spanish_pending() == []
+
+def test_resume_skips_checkpointed_searches():
+    """--resume replays the interrupted run's finished searches instead of repeating them, and a clean run
+    clears the journal"""
+    journal_file = os.path.join(tempfile.mkdtemp(), 'run_journal.sqlite')
+    searches = []
+    failed = []
+    _, bing = make_engine('Bing')
+    _, flaky = make_engine('Flaky', overlap=100)
+
+    def search_bing(keyword, max_results):
+        searches.append(('Bing', keyword))
+        return bing(keyword, max_results)
+
+    def search_flaky(keyword, max_results):
+        searches.append(('Flaky', keyword))
+        if keyword == SEARCH_KEYWORDS[0] and not failed:
+            failed.append(keyword)
+            raise RuntimeError('engine down')
+        return flaky(keyword, max_results)
+
+    sheets_manager = FakeSheetsManager()
+    scraper = build_scraper(sheets_manager, [('Bing', search_bing), ('Flaky', search_flaky)])
+    scraper.journal = RunJournal(journal_file)
+    scraper.http_cache = None
+
+    scraper.run_scraper()
+    # Every search but the failed one is checkpointed
+    assert not scraper.last_run_ok
+    assert len(scraper.journal.completed) == len(searches) - 1
+    uploaded = len(sheets_manager.get_existing_urls())
+
+    del searches[:]
+    resumed_uploads = scraper.run_scraper(resume=True)
+    assert scraper.last_run_ok
+    assert searches == [('Flaky', SEARCH_KEYWORDS[0])]
+    assert resumed_uploads > 0 and len(sheets_manager.get_existing_urls()) == uploaded + resumed_uploads
+
+    journal = RunJournal(journal_file)
+    assert journal.connection.execute("SELECT COUNT(*) FROM searches").fetchone()[0] == 0
+    journal.start(resume=True)
+    assert journal.completed == {}
+
+if __name__ == "__main__":
+    test_streams_unique_results_in_batches()
+    test_spanish_trails_by_one_batch()
+    test_partial_batches_flush_on_time()
+    test_failures_do_not_stall()
+    test_spanish_failures_are_resumed()
+    test_resume_skips_checkpointed_searches()
+    print("Pipeline tests passed")
@@ -0,0 +1,57 @@
+"""
+Test script for the per-host rate limiter
+"""
+
+import time
+import threading
+
+from rate_limiter import TokenBucket, HostRateLimiter
+
+def test_burst_then_spaced():
+    """A full bucket lets burst requests through at once, and each waiter after that gets the next free slot"""
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert abs(waits[2] - 0.1) < 0.01 and abs(waits[3] - 0.2) < 0.01
+
+def test_waiters_do_not_bunch_up():
+    """Threads waiting on one host go out one rate interval apart"""
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.acquire()
+    finished = []
+    lock = threading.Lock()
+
+    def acquire():
+        bucket.acquire()
+        with lock:
+            finished.append(time.monotonic())
+
+    threads = [threading.Thread(target=acquire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    finished.sort()
+    assert all(later - earlier >= 0.04 for earlier, later in zip(finished, finished[1:]))
+
+def test_hosts_are_independent():
+    """Hosts share a bucket only through a configured suffix or alias; other hosts are never delayed"""
+    limiter = HostRateLimiter(
+        limits={'bing.com': {'rate': 1, 'burst': 1}},
+        default_limit={'rate': 1, 'burst': 1},
+        host_aliases={'127.0.0.1:8001': 'www.bing.com'}
+    )
+    assert limiter.acquire('https://www.bing.com/search?q=camp') == 0
+    # Same bucket: the subdomain, the alias and the bare domain
+    assert limiter._get_bucket('https://cc.bing.com/')[0] == 'bing.com'
+    assert limiter._get_bucket('http://127.0.0.1:8001/search')[0] == 'bing.com'
+    assert limiter._get_bucket('bing.com')[1].reserve() > 0.9
+    # Different buckets: a look-alike domain and an unconfigured host
+    assert limiter._get_bucket('notbing.com')[0] == 'notbing.com'
+    assert limiter.acquire('https://duckduckgo.com/html/') == 0
+
+if __name__ == "__main__":
+    test_burst_then_spaced()
+    test_waiters_do_not_bunch_up()
+    test_hosts_are_independent()
+    print("Rate limiter tests passed")
@@ -0,0 +1,69 @@
+"""
+Test script for the cross-process run lease
+"""
+
+import os
+import time
+import tempfile
+
+from run_lock import RunLease, run_single_flight
+
+def make_lease(lock_file, lease_seconds=60, skip_within_minutes=120):
+    return RunLease(lock_file=lock_file, lease_seconds=lease_seconds, skip_within_minutes=skip_within_minutes)
+
+def test_one_holder_at_a_time():
+    """A held lease turns other processes away until it is released"""
+    lock_file = os.path.join(tempfile.mkdtemp(), 'run_lock.sqlite')
+    first, second = make_lease(lock_file), make_lease(lock_file, skip_within_minutes=0)
+
+    assert first.acquire('scheduled') == (True, None)
+    acquired, reason = second.acquire('manual', force=True)
+    assert not acquired and 'scheduled run is already in progress' in reason
+
+    first.release(completed=False)
+    assert second.acquire('manual')[0]
+    second.release()
+
+def test_expired_lease_is_taken_over():
+    """A holder that stopped renewing (e.g. crashed) loses the lease once it expires"""
+    lock_file = os.path.join(tempfile.mkdtemp(), 'run_lock.sqlite')
+    crashed, successor = make_lease(lock_file, lease_seconds=0.2), make_lease(lock_file)
+
+    assert crashed.acquire('scheduled')[0]
+    crashed.stop_renewing.set()
+    crashed.renew_thread.join()
+    assert not successor.acquire('manual')[0]
+
+    time.sleep(0.3)
+    assert successor.acquire('manual') == (True, None)
+    assert not crashed.renew()
+    successor.release()
+
+def test_recent_run_is_skipped():
+    """After a completed run, others are skipped for the window unless forced; a failed run starts no window"""
+    lock_file = os.path.join(tempfile.mkdtemp(), 'run_lock.sqlite')
+    calls = []
+
+    def run():
+        calls.append(1)
+        return len(calls)
+
+    assert run_single_flight('scheduled', run, lease=make_lease(lock_file)) == 1
+    assert run_single_flight('manual', run, lease=make_lease(lock_file)) is None
+    assert run_single_flight('manual', run, force=True, lease=make_lease(lock_file)) == 2
+
+    def fail():
+        raise RuntimeError('upload failed')
+
+    other_lock_file = os.path.join(tempfile.mkdtemp(), 'run_lock.sqlite')
+    try:
+        run_single_flight('scheduled', fail, lease=make_lease(other_lock_file))
+    except RuntimeError:
+        pass
+    assert run_single_flight('manual', run, lease=make_lease(other_lock_file)) == 3
+
+if __name__ == "__main__":
+    test_one_holder_at_a_time()
+    test_expired_lease_is_taken_over()
+    test_recent_run_is_skipped()
+    print("Run lock tests passed")
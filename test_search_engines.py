@@ -0,0 +1,202 @@
+"""
+Test script for the search engine registry and scheduler
+"""
+
+import os
+import time
+import logging
+import tempfile
+import threading
+
+from scraper import WebScraper
+from engine_health import EngineHealthTracker, CircuitBreaker, CLOSED
+from search_engines import (
+    ENGINE_TYPES, EngineScheduler, ScraperEngine, build_engines, get_results_per_engine, register_engine
+)
+from config import MAX_RESULTS_PER_KEYWORD
+from quota_ledger import QuotaLedger
+
+class RecordingEngine(ScraperEngine):
+    """Sleeps for each search and records the start times and the most searches it had in flight"""
+
+    def __init__(self, scraper, name, settings, delay=0.05):
+        super().__init__(scraper, name, settings, search_function=self._search)
+        self.delay = delay
+        self.clock = time.monotonic
+        self.started = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def _search(self, keyword, max_results):
+        with self.lock:
+            self.started.append(self.clock())
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return [{'url': f"https://{self.name}.org/{keyword}"}]
+
+def build_scraper():
+    scraper = WebScraper.__new__(WebScraper)
+    scraper.logger = logging.getLogger(__name__)
+    scraper.engine_health = EngineHealthTracker()
+    return scraper
+
+def run_scheduler(engines, keywords, **kwargs):
+    collected = []
+    EngineScheduler(engines, **kwargs).run(
+        keywords, 10, lambda engine, keyword, max_results: engine.search(keyword, max_results), collected.extend
+    )
+    return collected
+
+class FakeClock:
+    """Time that only moves when the scheduler sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_concurrency():
+    """Each engine fills its own concurrency, and the engines run side by side rather than one after the other"""
+    scraper = build_scraper()
+    other_done = threading.Event()
+    first_wave = threading.Barrier(3, timeout=5)
+    waited = []
+
+    class FastEngine(RecordingEngine):
+        def _search(self, keyword, max_results):
+            if keyword in ('keyword0', 'keyword1', 'keyword2'):
+                # Passes only if all three are in flight at once; then holds until the other engine is done
+                first_wave.wait()
+                waited.append(other_done.wait(5))
+            return super()._search(keyword, max_results)
+
+    class OtherEngine(RecordingEngine):
+        def _search(self, keyword, max_results):
+            results = super()._search(keyword, max_results)
+            if len(self.started) == 6:
+                other_done.set()
+            return results
+
+    fast = FastEngine(scraper, 'fast', {'max_concurrency': 3}, delay=0)
+    other = OtherEngine(scraper, 'other', {'max_concurrency': 1}, delay=0)
+    results = run_scheduler([fast, other], [f"keyword{index}" for index in range(6)])
+
+    # The first wave only gets past the barrier with three searches in flight at once
+    assert len(results) == 12 and waited == [True, True, True]
+    assert fast.peak_in_flight <= 3 and other.peak_in_flight == 1
+
+def test_rate():
+    """An engine with a rate starts its searches at least 1/rate apart"""
+    scraper = build_scraper()
+    clock = FakeClock()
+    paced = RecordingEngine(scraper, 'paced', {'max_concurrency': 3, 'rate': 20}, delay=0)
+    paced.clock = clock
+
+    assert len(run_scheduler([paced], [f"keyword{index}" for index in range(5)], clock=clock, sleep=clock.sleep)) == 5
+    gaps = [later - earlier for earlier, later in zip(paced.started, paced.started[1:])]
+    assert len(gaps) == 4 and min(gaps) >= 0.05 - 1e-9
+
+def test_sequential_mode():
+    """With one search per engine, no engine ever has two searches in flight"""
+    scraper = build_scraper()
+    engines = [RecordingEngine(scraper, name, {'max_concurrency': 4}) for name in ('one', 'two')]
+    run_scheduler(engines, ['a', 'b', 'c'], max_per_engine=1)
+    assert [engine.peak_in_flight for engine in engines] == [1, 1]
+
+def test_build_engines():
+    """Enabled entries are built in order by their type's class; disabled and unknown entries are left out"""
+    scraper = build_scraper()
+    register_engine('recording', RecordingEngine)
+    try:
+        engines = build_engines(scraper, {
+            'first': {'type': 'recording', 'label': 'First'},
+            'disabled': {'type': 'recording', 'enabled': False},
+            'unknown': {'max_concurrency': 2},
+            'second': {'type': 'recording', 'max_concurrency': 2}
+        })
+    finally:
+        ENGINE_TYPES.pop('recording')
+    assert [(engine.name, engine.label, engine.max_concurrency) for engine in engines] == [
+        ('first', 'First', 1), ('second', 'Second', 2)
+    ]
+
+def test_results_per_engine():
+    """Each enabled engine gets an equal share of MAX_RESULTS_PER_KEYWORD, the same in a run and in the usage check"""
+    assert get_results_per_engine() == get_results_per_engine(len(build_engines(build_scraper())))
+    assert get_results_per_engine(5) == max(1, MAX_RESULTS_PER_KEYWORD // 5)
+    assert get_results_per_engine(1000) == 1
+
+def test_paid_engine_budget():
+    """A paid engine is scheduled after free ones and only gets the keywords today's budget covers"""
+    scraper = build_scraper()
+    paid = RecordingEngine(scraper, 'paid', {'cost_per_query': 0.01, 'expected_yield': 100})
+    paid.ledger = QuotaLedger(os.path.join(tempfile.mkdtemp(), 'paid_quota.sqlite'), daily_quota=3)
+    paid.ledger.reserve('earlier run', 1)
+    free = RecordingEngine(scraper, 'free', {'expected_yield': 1})
+
+    assert EngineScheduler([paid, free]).engines == [free, paid]
+    assert paid.plan(['a', 'b', 'c'], 10) == ['a', 'b']
+
+def run_with_blocked_engine(cooldown, probe_fails=False, healthy_delay=0.1):
+    """Run a blocked engine (circuit just opened) beside a healthy one that takes healthy_delay per search;
+    returns (blocked engine, breaker, the run's results, seconds the run took)"""
+    scraper = build_scraper()
+    breaker = CircuitBreaker('blocked', cooldown=cooldown)
+    scraper.engine_health.breakers['blocked'] = breaker
+    breaker.record_failure(blocked=True)
+
+    class ProbedEngine(RecordingEngine):
+        """Searches through the circuit like the real engines do"""
+
+        def _search(self, keyword, max_results):
+            assert breaker.allow_request()
+            results = super()._search(keyword, max_results)
+            if probe_fails:
+                breaker.record_failure(blocked=True)
+                return []
+            breaker.record_success()
+            return results
+
+    blocked = ProbedEngine(scraper, 'blocked', {'max_concurrency': 2}, delay=0)
+    healthy = RecordingEngine(scraper, 'healthy', {}, delay=healthy_delay)
+    started_at = time.monotonic()
+    results = run_scheduler([blocked, healthy], ['a', 'b', 'c'])
+    return blocked, breaker, results, time.monotonic() - started_at
+
+def test_open_circuit_is_skipped():
+    """An engine whose circuit stays open past the other engines' work is skipped, not waited for"""
+    blocked, breaker, results, elapsed = run_with_blocked_engine(cooldown=300)
+    assert len(results) == 3 and blocked.started == []
+    assert elapsed < 2
+
+def test_one_probe_while_others_run():
+    """If the cooldown ends while the other engines are still searching, one search goes out as the probe"""
+    blocked, breaker, results, elapsed = run_with_blocked_engine(cooldown=0.05)
+    assert len(results) == 4 and len(blocked.started) == 1
+    assert breaker.state == CLOSED
+
+def test_failing_probe_does_not_stall():
+    """A probe that fails again ends the engine's part in the run instead of waiting out the doubled cooldown"""
+    blocked, breaker, results, elapsed = run_with_blocked_engine(cooldown=0.05, probe_fails=True)
+    assert len(results) == 3 and len(blocked.started) == 1
+    assert breaker.state != CLOSED and elapsed < 1
+
+if __name__ == "__main__":
+    test_concurrency()
+    test_rate()
+    test_sequential_mode()
+    test_build_engines()
+    test_results_per_engine()
+    test_paid_engine_budget()
+    test_open_circuit_is_skipped()
+    test_one_probe_while_others_run()
+    test_failing_probe_does_not_stall()
+    print("Search engine scheduler tests passed")
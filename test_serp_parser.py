@@ -0,0 +1,32 @@
+"""
+Test script for the SERP parser backends
+"""
+
+import os
+
+from serp_parser import parse_serp, get_available_backends
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture:
+        return fixture.read()
+
+def test_backends_agree():
+    """Every installed backend gets the same results from the saved Bing and DuckDuckGo pages"""
+    for engine in ['bing', 'duckduckgo']:
+        content = read_fixture(f'{engine}_serp.html')
+        outputs = [parse_serp(engine, content, 10, backend=backend) for backend in get_available_backends()]
+        assert len(outputs[0]) == 10
+        assert all(output == outputs[0] for output in outputs)
+
+def test_empty_body():
+    """An empty or blank page has no results on any backend (lxml refuses to parse it at all)"""
+    for backend in get_available_backends():
+        for content in [b'', '', b'  \n ']:
+            assert parse_serp('bing', content, backend=backend) == []
+
+if __name__ == "__main__":
+    test_backends_agree()
+    test_empty_body()
+    print("SERP parser tests passed")
@@ -0,0 +1,88 @@
+"""
+Test script for the Sheets writes (against mock_server.py)
+"""
+
+from config import COLUMNS, SHEET_NAME, SPANISH_SHEET_NAME
+from mock_server import MockServer, find_free_base_port
+from test_url_index import SHEET_ID, HeaderTranslator, make_sheets_manager, sheets_requests
+
+def make_results(start, count):
+    return [
+        {'title': f"AI camp {rank}", 'url': f"https://camp-{rank}.org/", 'category': 'Other',
+         'description': f"Summer program {rank}", 'source': 'Bing'}
+        for rank in range(start, start + count)
+    ]
+
+translate = HeaderTranslator().translate_data
+
+def get_rows(server, title):
+    for sheet in server.state.get_spreadsheet(SHEET_ID)['sheets']:
+        if sheet['title'] == title:
+            return sheet['rows']
+    return None
+
+def test_both_tabs_in_one_batch_update():
+    """An upload appends to both tabs with a single batchUpdate after one header read, adding headers to new tabs"""
+    server = MockServer(base_port=find_free_base_port()).start()
+    try:
+        sheets_manager = make_sheets_manager(server)
+        first, second = make_results(0, 2), make_results(2, 3)
+        assert sheets_manager.upload_batch(first, translate(first))
+
+        # Handles are cached, so the next upload is the header read and the batchUpdate
+        requests_before = sheets_requests(server)
+        assert sheets_manager.upload_batch(second, translate(second))
+        assert sheets_requests(server) - requests_before == 2
+
+        english, spanish = get_rows(server, SHEET_NAME), get_rows(server, SPANISH_SHEET_NAME)
+        assert english[0] == COLUMNS and spanish[0] == sheets_manager.translator.get_spanish_headers(COLUMNS)
+        assert [row[1] for row in english[1:]] == [item['url'] for item in first + second]
+        assert [row[0] for row in spanish[1:]] == [f"ES AI camp {rank}" for rank in range(5)]
+        assert 'https://camp-4.org/' in sheets_manager.url_index
+    finally:
+        server.stop()
+
+def test_tab_batches_skip_the_header_read():
+    """Once a tab's header is known, each English batch is one appendCells request"""
+    server = MockServer(base_port=find_free_base_port()).start()
+    try:
+        sheets_manager = make_sheets_manager(server)
+        assert sheets_manager.upload_english_batch(make_results(0, 2))
+        requests_before = sheets_requests(server)
+        assert sheets_manager.upload_english_batch(make_results(2, 2))
+        assert sheets_requests(server) - requests_before == 1
+        assert len(get_rows(server, SHEET_NAME)) == 5
+    finally:
+        server.stop()
+
+def test_stale_handles_are_refreshed():
+    """A tab renamed or deleted behind the cached handles is looked up (or created) again and the write retried once"""
+    server = MockServer(base_port=find_free_base_port()).start()
+    try:
+        sheets_manager = make_sheets_manager(server)
+        first = make_results(0, 2)
+        assert sheets_manager.upload_batch(first, translate(first))
+
+        # The header read by tab name fails, so both handles are refreshed and the Spanish tab is recreated
+        for sheet in server.state.get_spreadsheet(SHEET_ID)['sheets']:
+            if sheet['title'] == SPANISH_SHEET_NAME:
+                sheet['title'] = 'Renamed'
+        second = make_results(2, 2)
+        assert sheets_manager.upload_batch(second, translate(second))
+        assert len(get_rows(server, 'Renamed')) == 3 and len(get_rows(server, SPANISH_SHEET_NAME)) == 3
+
+        # With its header known, appendCells on the cached sheet id is what fails, and the English tab is
+        # created again with its header
+        assert sheets_manager.upload_english_batch(make_results(4, 2))
+        spreadsheet = server.state.get_spreadsheet(SHEET_ID)
+        spreadsheet['sheets'] = [sheet for sheet in spreadsheet['sheets'] if sheet['title'] != SHEET_NAME]
+        assert sheets_manager.upload_english_batch(make_results(6, 2))
+        assert get_rows(server, SHEET_NAME)[0] == COLUMNS and len(get_rows(server, SHEET_NAME)) == 3
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    test_both_tabs_in_one_batch_update()
+    test_tab_batches_skip_the_header_read()
+    test_stale_handles_are_refreshed()
+    print("Sheets manager tests passed")
@@ -2,7 +2,8 @@
 Test script for translation functionality
 """
 
-from translator import TranslationService
+from translator import TranslationService, BATCH_SEPARATOR
+from types import SimpleNamespace
 import logging
 
 # Setup logging
@@ -59,5 +60,58 @@ def test_translation():
     
     print("\nTranslation test completed!")
 
+class StubTranslator:
+    """Prefixes every line with 'ES '; with merge_lines, joined batches come back with their first two lines merged"""
+
+    def __init__(self, merge_lines=False):
+        self.merge_lines = merge_lines
+        self.requests = []
+
+    def translate(self, text, src='en', dest='es'):
+        self.requests.append(text)
+        lines = [f"ES {line}" for line in text.split(BATCH_SEPARATOR)]
+        if self.merge_lines and len(lines) > 1:
+            lines[:2] = [f"{lines[0]} {lines[1]}"]
+        return SimpleNamespace(text=BATCH_SEPARATOR.join(lines))
+
+class NoRateLimit:
+    def acquire(self, host):
+        pass
+
+def make_service(translator):
+    service = TranslationService.__new__(TranslationService)
+    service.translator = translator
+    service.rate_limiter = NoRateLimit()
+    service.cache = None
+    service.logger = logger
+    return service
+
+def test_batch_maps_lines_back():
+    """Unique strings share one request, and each translated line goes back to its own string"""
+    translator = StubTranslator()
+    translations = make_service(translator).translate_batch(['AI camp', 'Robotics camp', 'AI camp', '', '  '])
+    assert translations == {'AI camp': 'ES AI camp', 'Robotics camp': 'ES Robotics camp', '': '', '  ': '  '}
+    assert translator.requests == ['AI camp\nRobotics camp']
+
+def test_line_mismatch_falls_back():
+    """A batch that comes back with the wrong number of lines is translated again one string at a time"""
+    translator = StubTranslator(merge_lines=True)
+    translations = make_service(translator).translate_batch(['AI camp', 'Robotics camp', 'Coding camp'])
+    assert translations == {'AI camp': 'ES AI camp', 'Robotics camp': 'ES Robotics camp', 'Coding camp': 'ES Coding camp'}
+    assert translator.requests == ['AI camp\nRobotics camp\nCoding camp', 'AI camp', 'Robotics camp', 'Coding camp']
+
+def test_separator_in_text():
+    """A string with line breaks of its own gets a request to itself instead of joining a batch"""
+    translator = StubTranslator()
+    translations = make_service(translator).translate_batch(['AI camp', 'Apply now\nFree tuition', 'Robotics camp'])
+    assert translations == {
+        'AI camp': 'ES AI camp', 'Apply now\nFree tuition': 'ES Apply now\nES Free tuition',
+        'Robotics camp': 'ES Robotics camp'
+    }
+    assert translator.requests == ['Apply now\nFree tuition', 'AI camp\nRobotics camp']
+
 if __name__ == "__main__":
+    test_batch_maps_lines_back()
+    test_line_mismatch_falls_back()
+    test_separator_in_text()
     test_translation()
@@ -0,0 +1,57 @@
+"""
+Test script for the persistent translation cache
+"""
+
+import os
+import time
+import tempfile
+
+from translation_cache import TranslationCache
+
+def make_cache(max_entries=100, cache_file=None):
+    return TranslationCache(cache_file or os.path.join(tempfile.mkdtemp(), 'translations.sqlite'), max_entries)
+
+def test_get_many_and_put_many():
+    """Only cached texts come back, per language pair, and hits and misses are counted"""
+    cache = make_cache()
+    cache.put_many({'AI camp': 'Campamento de IA', 'Robotics camp': 'Campamento de robótica'})
+    cache.put('AI camp', 'Camp IA', dest='fr')
+
+    assert cache.get_many(['AI camp', 'Coding camp', 'Robotics camp']) == {
+        'AI camp': 'Campamento de IA', 'Robotics camp': 'Campamento de robótica'
+    }
+    assert cache.get('AI camp', dest='fr') == 'Camp IA'
+    assert cache.get('Coding camp') is None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+def test_least_recently_used_is_evicted():
+    """Over max_entries, the entry looked up or stored longest ago goes first"""
+    cache = make_cache(max_entries=2)
+    cache.put('AI camp', 'Campamento de IA')
+    time.sleep(0.01)
+    cache.put('Robotics camp', 'Campamento de robótica')
+    time.sleep(0.01)
+    # The hit makes 'AI camp' the most recently used
+    assert cache.get('AI camp') == 'Campamento de IA'
+    time.sleep(0.01)
+    cache.put('Coding camp', 'Campamento de programación')
+
+    assert cache.get_many(['AI camp', 'Robotics camp', 'Coding camp']) == {
+        'AI camp': 'Campamento de IA', 'Coding camp': 'Campamento de programación'
+    }
+    assert cache.evictions == 1
+
+def test_persists_across_instances():
+    """A new cache on the same file serves what an earlier run stored"""
+    cache_file = os.path.join(tempfile.mkdtemp(), 'translations.sqlite')
+    make_cache(cache_file=cache_file).put_many({'AI camp': 'Campamento de IA'})
+
+    reopened = make_cache(cache_file=cache_file)
+    assert reopened.get('AI camp') == 'Campamento de IA'
+    assert reopened.summary() == "1 hits, 0 misses (100.0% hit rate), 0 evicted"
+
+if __name__ == "__main__":
+    test_get_many_and_put_many()
+    test_least_recently_used_is_evicted()
+    test_persists_across_instances()
+    print("Translation cache tests passed")
@@ -0,0 +1,44 @@
+"""
+Test script for URL canonicalization and duplicate removal
+"""
+
+from url_canonicalizer import clean_url, canonical_key
+from scraper import WebScraper
+
+def test_redirect_unwrapping():
+    """Bing and DuckDuckGo click-tracking wrappers resolve to the destination URL"""
+    bing = 'https://www.bing.com/ck/a?!&&p=5f65&ptn=3&ver=2&hsh=3&u=a1aHR0cHM6Ly9haTRhbGwuc3RhbmZvcmQuZWR1Lw&ntb=1'
+    duckduckgo = '//duckduckgo.com/l/?uddg=https%3A%2F%2Fai4all.stanford.edu%2F%3Futm_source%3Dddg&rut=95e6'
+    
+    assert clean_url(bing) == 'https://ai4all.stanford.edu/'
+    assert clean_url(duckduckgo) == 'https://ai4all.stanford.edu/'
+
+def test_canonical_keys():
+    """Scheme, www., trailing slashes, tracking parameters and parameter order don't make a URL distinct"""
+    variants = [
+        'https://www.example.com/camp/?a=1&b=2',
+        'http://example.com/camp?b=2&a=1&utm_source=newsletter',
+        'https://EXAMPLE.com:443/camp?a=1&b=2&gclid=abc#apply'
+    ]
+    keys = {canonical_key(url) for url in variants}
+    assert keys == {'example.com/camp?a=1&b=2'}
+    assert canonical_key('https://example.com/camp?a=2') != canonical_key('https://example.com/camp?a=1')
+
+def test_remove_duplicates():
+    """The first occurrence of each canonical URL is kept, and known URLs are dropped"""
+    scraper = WebScraper.__new__(WebScraper)
+    results = [
+        {'url': 'https://www.example.com/camp/'},
+        {'url': 'http://example.com/camp?utm_medium=email'},
+        {'url': 'https://other.org/program'}
+    ]
+    
+    unique = scraper.remove_duplicates(results, set())
+    assert [result['url'] for result in unique] == ['https://www.example.com/camp/', 'https://other.org/program']
+    assert scraper.remove_duplicates(results, {'https://other.org/program'})[-1]['url'] == 'https://www.example.com/camp/'
+
+if __name__ == "__main__":
+    test_redirect_unwrapping()
+    test_canonical_keys()
+    test_remove_duplicates()
+    print("URL canonicalization tests passed")
@@ -0,0 +1,113 @@
+"""
+Test script for the local URL index and its seeding from the sheet (against mock_server.py)
+"""
+
+import os
+import logging
+import sqlite3
+import tempfile
+
+import gspread
+
+from config import COLUMNS, SHEET_NAME, SPANISH_SHEET_NAME, MOCK_SERVICE_PORT_OFFSETS
+from mock_server import MockServer, find_free_base_port
+from rate_limiter import HostRateLimiter
+from sheets_manager import GoogleSheetsManager, EndpointRewriteSession
+from url_index import UrlIndex
+
+SHEET_ID = 'test-sheet'
+
+def make_index(index_file=None):
+    return UrlIndex(index_file or os.path.join(tempfile.mkdtemp(), 'url_index.sqlite'))
+
+class HeaderTranslator:
+    """Stands in for TranslationService, so no translation cache or backend is opened"""
+
+    def get_spanish_headers(self, columns):
+        return [f"ES {column}" for column in columns]
+
+    def translate_data(self, data):
+        return [dict(item, title=f"ES {item['title']}") for item in data]
+
+def make_sheets_manager(server):
+    """A GoogleSheetsManager writing to the mock server's Sheets API, with a temporary URL index and no rate limit;
+    built without __init__, so the real caches and indexes under CACHE_DIR are never opened"""
+    sheets_manager = GoogleSheetsManager.__new__(GoogleSheetsManager)
+    sheets_manager.sheet_id = SHEET_ID
+    sheets_manager.sheet_name = SHEET_NAME
+    sheets_manager.columns = COLUMNS
+    sheets_manager.credentials = None
+    sheets_manager.sheet = None
+    sheets_manager.worksheets = {}
+    sheets_manager.headed_worksheets = set()
+    sheets_manager.translator = HeaderTranslator()
+    sheets_manager.rate_limiter = HostRateLimiter(limits={}, default_limit={'rate': 1000, 'burst': 1000})
+    sheets_manager.url_index = make_index()
+    sheets_manager.near_duplicates = None
+    sheets_manager.logger = logging.getLogger(__name__)
+    sheets_url = f"http://{server.host}:{server.base_port + MOCK_SERVICE_PORT_OFFSETS['sheets']}"
+    sheets_manager.client = gspread.Client(auth=None, session=EndpointRewriteSession(sheets_url))
+    return sheets_manager
+
+def sheets_requests(server):
+    return server.state.summary()['sheets']['requests']
+
+def test_lookups_use_canonical_keys():
+    """Tracking parameters, www. and trailing slashes don't hide an indexed URL"""
+    index = make_index()
+    index.add_many(['https://www.example.com/camp/?utm_source=bing', 'https://ai4all.org/', ''])
+    assert len(index) == 2
+    assert 'http://example.com/camp' in index
+    assert 'https://ai4all.org/?gclid=abc' in index
+    assert 'https://example.com/other-camp' not in index
+
+def test_replace_all_persists():
+    """replace_all swaps the contents and marks the index reconciled; a reopened index keeps both"""
+    index_file = os.path.join(tempfile.mkdtemp(), 'url_index.sqlite')
+    index = make_index(index_file)
+    assert index.last_reconciled_at() is None
+    index.add_many(['https://old-camp.org/'])
+    index.replace_all(['https://ai4all.org/', 'https://example.com/camp'])
+
+    reopened = make_index(index_file)
+    assert reopened.last_reconciled_at() is not None
+    assert len(reopened) == 2 and 'https://old-camp.org/' not in reopened
+
+def test_old_key_format_is_rebuilt():
+    """An index written with another key format is emptied and marked for reseeding"""
+    index_file = os.path.join(tempfile.mkdtemp(), 'url_index.sqlite')
+    make_index(index_file).replace_all(['https://ai4all.org/'])
+    connection = sqlite3.connect(index_file)
+    connection.execute("UPDATE metadata SET value = 'raw-url' WHERE name = 'key_format'")
+    connection.commit()
+    connection.close()
+
+    index = make_index(index_file)
+    assert len(index) == 0 and index.last_reconciled_at() is None
+
+def test_seeded_from_sheet_once():
+    """The first lookup reads the URLs of both tabs into the index; later ones never touch the sheet"""
+    server = MockServer(base_port=find_free_base_port()).start()
+    try:
+        sheets_manager = make_sheets_manager(server)
+        english = [COLUMNS, ['AI camp', 'https://ai4all.org/', 'Other', '', 'Bing']]
+        spanish = [['Título', 'URL'], ['Campamento', 'https://example.com/camp?utm_source=ddg']]
+        spreadsheet = server.state.get_spreadsheet(SHEET_ID)
+        server.state.add_sheet(spreadsheet, {'title': SHEET_NAME})['rows'].extend(english)
+        server.state.add_sheet(spreadsheet, {'title': SPANISH_SHEET_NAME})['rows'].extend(spanish)
+
+        existing_urls = sheets_manager.get_existing_urls()
+        assert len(existing_urls) == 2 and 'https://example.com/camp' in existing_urls
+
+        requests_after_seeding = sheets_requests(server)
+        assert sheets_manager.get_existing_urls() is existing_urls
+        assert sheets_requests(server) == requests_after_seeding
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    test_lookups_use_canonical_keys()
+    test_replace_all_persists()
+    test_old_key_format_is_rebuilt()
+    test_seeded_from_sheet_once()
+    print("URL index tests passed")
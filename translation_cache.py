@@ -0,0 +1,106 @@
+"""
+Persistent translation memory shared across scraper runs
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+
+from config import TRANSLATION_CACHE_FILE, TRANSLATION_CACHE_MAX_ENTRIES
+
+class TranslationCache:
+    """SQLite-backed translation memory keyed by (source language, target language, content hash), with LRU eviction"""
+
+    def __init__(self, cache_file=TRANSLATION_CACHE_FILE, max_entries=TRANSLATION_CACHE_MAX_ENTRIES):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                src TEXT NOT NULL,
+                dest TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (src, dest, content_hash)
+            )
+        """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)"
+        )
+        self.connection.commit()
+
+    def _hash(self, text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, texts, src='en', dest='es'):
+        """Look up translations; returns {text: translated} for the texts that are cached"""
+        found = {}
+        now = time.time()
+        with self.lock:
+            for text in texts:
+                row = self.connection.execute(
+                    "SELECT translated FROM translations WHERE src = ? AND dest = ? AND content_hash = ?",
+                    (src, dest, self._hash(text))
+                ).fetchone()
+                if row:
+                    found[text] = row[0]
+
+            # Touch hits so they survive eviction
+            self.connection.executemany(
+                "UPDATE translations SET last_used = ? WHERE src = ? AND dest = ? AND content_hash = ?",
+                [(now, src, dest, self._hash(text)) for text in found]
+            )
+            self.connection.commit()
+
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def get(self, text, src='en', dest='es'):
+        """Look up a single translation, or None"""
+        return self.get_many([text], src, dest).get(text)
+
+    def put_many(self, translations, src='en', dest='es'):
+        """Store {text: translated} pairs and evict the least recently used entries over the limit"""
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (src, dest, content_hash, translated, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(src, dest, self._hash(text), translated, now) for text, translated in translations.items()]
+            )
+
+            count = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self.connection.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self.connection.commit()
+
+    def put(self, text, translated, src='en', dest='es'):
+        """Store a single translation"""
+        self.put_many({text: translated}, src, dest)
+
+    def summary(self):
+        """Get a one-line summary of the hit-rate statistics"""
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), {self.evictions} evicted"
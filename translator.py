@@ -3,12 +3,45 @@ Translation service for converting English content to Spanish
 """
 
 import logging
+from types import SimpleNamespace
+import requests
 from googletrans import Translator
 import time
+from rate_limiter import get_rate_limiter
+from translation_cache import TranslationCache
+from metrics import TRANSLATION_REQUESTS, TRANSLATION_REQUEST_SECONDS, get_request_status
+from config import (
+    TRANSLATION_BATCH_CHAR_LIMIT,
+    TRANSLATION_BATCH_MAX_ITEMS,
+    TRANSLATION_CACHE_ENABLED,
+    TRANSLATE_API_URL,
+    COLUMNS
+)
+
+TRANSLATE_HOST = 'translate.google.com'
+BATCH_SEPARATOR = '\n'  # Line breaks survive translation, so one request can carry many strings
+
+class EndpointTranslator:
+    """googletrans-compatible client for a Cloud Translation v2-style endpoint (e.g. the mock server)"""
+    
+    def __init__(self, url):
+        self.url = url
+        self.session = requests.Session()
+    
+    def translate(self, text, src='en', dest='es'):
+        response = self.session.post(
+            self.url,
+            json={'q': text, 'source': src, 'target': dest, 'format': 'text'},
+            timeout=15
+        )
+        response.raise_for_status()
+        return SimpleNamespace(text=response.json()['data']['translations'][0]['translatedText'])
 
 class TranslationService:
     def __init__(self):
-        self.translator = Translator()
+        self.translator = EndpointTranslator(TRANSLATE_API_URL) if TRANSLATE_API_URL else Translator()
+        self.rate_limiter = get_rate_limiter()
+        self.cache = TranslationCache() if TRANSLATION_CACHE_ENABLED else None
         self.logger = logging.getLogger(__name__)
         
         # Spanish column headers
@@ -17,7 +50,10 @@ class TranslationService:
             'URL': 'URL',
             'Category': 'Categoría',
             'Description': 'Descripción',
-            'Source': 'Fuente'
+            'Source': 'Fuente',
+            'Deadline': 'Fecha límite',
+            'Tuition': 'Costo',
+            'Grades': 'Grados'
         }
         
         # Spanish category translations
@@ -34,16 +70,27 @@ class TranslationService:
         if not text or not text.strip():
             return text
         
+        if self.cache:
+            cached = self.cache.get(text)
+            if cached is not None:
+                return cached
+        
         for attempt in range(max_retries):
             try:
                 # Add delay to avoid rate limiting
                 if attempt > 0:
                     time.sleep(2)
                 
-                result = self.translator.translate(text, src='en', dest='es')
+                self.rate_limiter.acquire(TRANSLATE_HOST)
+                with TRANSLATION_REQUEST_SECONDS.time('single'):
+                    result = self.translator.translate(text, src='en', dest='es')
+                TRANSLATION_REQUESTS.inc('single', 'ok')
+                if self.cache:
+                    self.cache.put(text, result.text)
                 return result.text
                 
             except Exception as e:
+                TRANSLATION_REQUESTS.inc('single', get_request_status(e))
                 self.logger.warning(f"Translation attempt {attempt + 1} failed for text '{text[:50]}...': {str(e)}")
                 if attempt == max_retries - 1:
                     self.logger.error(f"Failed to translate text after {max_retries} attempts: {text[:50]}...")
@@ -52,20 +99,115 @@ class TranslationService:
         
         return text
     
+    def _make_batches(self, texts):
+        """Group texts into batches that stay under the backend's per-request limits"""
+        batches = []
+        current_batch = []
+        current_size = 0
+        
+        for text in texts:
+            size = len(text) + len(BATCH_SEPARATOR)
+            if current_batch and (current_size + size > TRANSLATION_BATCH_CHAR_LIMIT
+                                  or len(current_batch) >= TRANSLATION_BATCH_MAX_ITEMS):
+                batches.append(current_batch)
+                current_batch = []
+                current_size = 0
+            current_batch.append(text)
+            current_size += size
+        
+        if current_batch:
+            batches.append(current_batch)
+        
+        return batches
+    
+    def _translate_joined(self, batch, max_retries=3):
+        """Translate a batch in one request; returns None if the lines can't be mapped back"""
+        joined_text = BATCH_SEPARATOR.join(batch)
+        
+        for attempt in range(max_retries):
+            try:
+                # Add delay to avoid rate limiting
+                if attempt > 0:
+                    time.sleep(2)
+                
+                self.rate_limiter.acquire(TRANSLATE_HOST)
+                with TRANSLATION_REQUEST_SECONDS.time('batch'):
+                    result = self.translator.translate(joined_text, src='en', dest='es')
+                TRANSLATION_REQUESTS.inc('batch', 'ok')
+                lines = [line.strip() for line in result.text.split(BATCH_SEPARATOR)]
+                if len(lines) != len(batch):
+                    self.logger.warning(f"Batch translation returned {len(lines)} lines for {len(batch)} strings")
+                    return None
+                if self.cache:
+                    self.cache.put_many(dict(zip(batch, lines)))
+                return lines
+                
+            except Exception as e:
+                TRANSLATION_REQUESTS.inc('batch', get_request_status(e))
+                self.logger.warning(f"Batch translation attempt {attempt + 1} failed for {len(batch)} strings: {str(e)}")
+        
+        self.logger.error(f"Failed to translate batch of {len(batch)} strings after {max_retries} attempts")
+        return list(batch)  # Return original text if translation fails
+    
+    def translate_batch(self, texts):
+        """Translate many strings with as few requests as possible; returns {original: translated}"""
+        translations = {}
+        pending = []
+        seen = set()
+        
+        for text in texts:
+            if text in seen:
+                continue
+            seen.add(text)
+            if not text or not text.strip():
+                translations[text] = text
+            elif BATCH_SEPARATOR in text or len(text) > TRANSLATION_BATCH_CHAR_LIMIT:
+                # Can't be split back out of a joined batch
+                translations[text] = self.translate_text(text)
+            else:
+                pending.append(text)
+        
+        # Only text that has never been translated before goes over the network
+        if self.cache and pending:
+            cached = self.cache.get_many(pending)
+            translations.update(cached)
+            pending = [text for text in pending if text not in cached]
+        
+        batches = self._make_batches(pending)
+        for batch in batches:
+            translated_lines = self._translate_joined(batch)
+            if translated_lines is None:
+                # Line structure got lost; translate this batch one string at a time
+                translated_lines = [self.translate_text(text) for text in batch]
+            translations.update(zip(batch, translated_lines))
+        
+        self.logger.info(f"Translated {len(translations)} unique strings in {len(batches)} batch requests")
+        return translations
+    
     def translate_data(self, data):
         """Translate relevant fields in the data"""
-        translated_data = []
+        # Collect every unique string across the whole upload first
+        texts = []
+        for item in data:
+            texts.append(item.get('title', ''))
+            texts.append(item.get('description', ''))
+            category = item.get('category')
+            if category and category not in self.spanish_categories:
+                texts.append(category)
         
+        translations = self.translate_batch(texts)
+        
+        translated_data = []
         for item in data:
             translated_item = item.copy()
             
             # Translate title
             if 'title' in translated_item:
-                translated_item['title'] = self.translate_text(translated_item['title'])
+                translated_item['title'] = translations.get(translated_item['title'], translated_item['title'])
             
             # Translate description
             if 'description' in translated_item:
-                translated_item['description'] = self.translate_text(translated_item['description'])
+                translated_item['description'] = translations.get(translated_item['description'], translated_item['description'])
             
             # Translate category
             if 'category' in translated_item:
@@ -74,15 +216,18 @@ class TranslationService:
                     translated_item['category'] = self.spanish_categories[category]
                 else:
                     # Fallback to direct translation if not in predefined list
-                    translated_item['category'] = self.translate_text(category)
+                    translated_item['category'] = translations.get(category, category)
             
             translated_data.append(translated_item)
         
+        if self.cache:
+            self.logger.info(f"Translation cache: {self.cache.summary()}")
+        
         return translated_data
     
-    def get_spanish_headers(self):
+    def get_spanish_headers(self, columns=COLUMNS):
         """Get Spanish column headers"""
-        return list(self.spanish_headers.values())
+        return self.translate_headers(columns)
     
     def translate_headers(self, english_headers):
         """Translate English headers to Spanish"""
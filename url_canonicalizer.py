@@ -0,0 +1,98 @@
+"""
+URL canonicalization: redirect unwrapping, tracking-parameter removal and dedupe keys
+"""
+
+import base64
+import binascii
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+from config import TRACKING_PARAMS, REDIRECT_CACHE_SIZE
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+def _decode_bing(query):
+    """Bing /ck/a links carry the target as u=a1<base64url without padding>"""
+    target = dict(parse_qsl(query)).get('u', '')
+    if not target.startswith('a1'):
+        return None
+    encoded = target[2:]
+    try:
+        return base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+def _decode_query_param(name):
+    def decode(query):
+        return dict(parse_qsl(query)).get(name) or None
+    return decode
+
+# (host suffix, path) -> decoder for the wrapper's query string
+REDIRECT_WRAPPERS = {
+    ('bing.com', '/ck/a'): _decode_bing,
+    ('duckduckgo.com', '/l/'): _decode_query_param('uddg'),
+    ('google.com', '/url'): _decode_query_param('q')
+}
+
+def _match_host(host, suffix):
+    return host == suffix or host.endswith('.' + suffix)
+
+@lru_cache(maxsize=REDIRECT_CACHE_SIZE)
+def unwrap_redirect(url):
+    """Get the destination of a known redirect wrapper, or the URL itself; decoded wrappers are memoized"""
+    if url.startswith('//'):
+        url = 'https:' + url
+
+    # Wrappers can be nested (an ad link pointing at another tracker), so keep going a few levels
+    for _ in range(3):
+        parts = urlsplit(url)
+        host = parts.hostname or ''
+        decoder = next(
+            (decoder for (suffix, path), decoder in REDIRECT_WRAPPERS.items()
+             if _match_host(host, suffix) and parts.path == path),
+            None
+        )
+        if decoder is None:
+            break
+        target = decoder(parts.query)
+        if not target or not target.startswith(('http://', 'https://')):
+            break
+        url = target
+    return url
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return any(name.startswith(param) if param.endswith('_') else name == param for param in TRACKING_PARAMS)
+
+def clean_url(url):
+    """Unwrap redirects and drop tracking parameters and fragments; the result is still a usable URL"""
+    if not url:
+        return url
+    url = unwrap_redirect(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+
+    host = (parts.hostname or '').rstrip('.')
+    if parts.port and str(parts.port) != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not _is_tracking_param(name)]
+
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+def canonical_key(url):
+    """Get the dedupe key of a URL: scheme, 'www.', trailing slashes and parameter order don't matter"""
+    url = clean_url(url)
+    parts = urlsplit(url)
+    if parts.scheme not in DEFAULT_PORTS:
+        return url
+
+    host = parts.netloc
+    if host.startswith('www.'):
+        host = host[4:]
+    path = unquote(parts.path).rstrip('/')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
@@ -0,0 +1,103 @@
+"""
+Local persistent index of URLs already uploaded to Google Sheets
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+
+from config import URL_INDEX_FILE
+from url_canonicalizer import canonical_key
+
+KEY_FORMAT = 'canonical-v1'  # Bump when canonical_key changes so old keys get rebuilt
+
+class UrlIndex:
+    """Set-like SQLite index of uploaded URLs by canonical key; lookups are primary-key reads, so startup cost doesn't grow with the sheet"""
+
+    def __init__(self, index_file=URL_INDEX_FILE):
+        self.index_file = index_file
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        index_dir = os.path.dirname(index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(index_file, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                added_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        self.connection.commit()
+        self._check_key_format()
+
+    def _check_key_format(self):
+        """Drop an index built with another key format; the next lookup reseeds it from the sheet"""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM metadata WHERE name = 'key_format'").fetchone()
+            if row and row[0] == KEY_FORMAT:
+                return
+            if row or self.connection.execute("SELECT 1 FROM urls LIMIT 1").fetchone():
+                self.logger.info("URL index uses an old key format; it will be rebuilt from the sheet")
+            self.connection.execute("DELETE FROM urls")
+            self.connection.execute("DELETE FROM metadata WHERE name = 'last_reconciled_at'")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES ('key_format', ?)", (KEY_FORMAT,)
+            )
+            self.connection.commit()
+
+    def __contains__(self, url):
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM urls WHERE url = ?", (canonical_key(url),)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def add_many(self, urls):
+        """Add URLs to the index"""
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO urls (url, added_at) VALUES (?, ?)",
+                [(canonical_key(url), now) for url in urls if url]
+            )
+            self.connection.commit()
+
+    def replace_all(self, urls):
+        """Replace the index contents with the given URLs and mark it as reconciled"""
+        now = time.time()
+        with self.lock:
+            self.connection.execute("DELETE FROM urls")
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO urls (url, added_at) VALUES (?, ?)",
+                [(canonical_key(url), now) for url in urls if url]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO metadata (name, value) VALUES ('last_reconciled_at', ?)",
+                (str(now),)
+            )
+            self.connection.commit()
+
+    def clear(self):
+        """Remove every URL from the index"""
+        self.replace_all([])
+
+    def last_reconciled_at(self):
+        """Get the timestamp of the last reconciliation with the sheet, or None if it never happened"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM metadata WHERE name = 'last_reconciled_at'"
+            ).fetchone()
+        return float(row[0]) if row else None